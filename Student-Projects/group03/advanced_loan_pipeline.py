@@ -11,13 +11,17 @@ Run:
 from __future__ import annotations
 
 import argparse
+import math
+import time
+import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
@@ -25,8 +29,7 @@ from sklearn.impute import SimpleImputer
 from sklearn.model_selection import (
     StratifiedKFold,
     train_test_split,
-    cross_validate,
-    RandomizedSearchCV,
+    ParameterSampler,
 )
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
@@ -38,10 +41,17 @@ from sklearn.metrics import (
     roc_auc_score,
     confusion_matrix,
     classification_report,
+    get_scorer,
 )
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.inspection import permutation_importance
 import joblib
+from joblib import Memory, Parallel, delayed
+
+from model_artifacts import save_artifact
+
+
+SCORING = ("accuracy", "precision", "recall", "f1", "roc_auc")
 
 
 @dataclass(frozen=True)
@@ -53,6 +63,51 @@ class Config:
     cv_splits: int = 5
 
 
+@dataclass(frozen=True)
+class FoldData:
+    """Preprocessed matrices of one CV fold (preprocessor fitted on its train part)."""
+    index: int
+    X_train: np.ndarray
+    X_valid: np.ndarray
+    y_train: np.ndarray
+    y_valid: np.ndarray
+
+
+@dataclass
+class SearchResult:
+    """
+    Outcome of a search, with the attribute names of RandomizedSearchCV.
+
+    tune_logreg scores its candidates on the cached CV folds instead of
+    running RandomizedSearchCV, and returns this instead. best_estimator_,
+    best_params_ and cv_results_ use pipeline keys ("model__C"), and
+    best_score_ is the mean CV ROC-AUC. Other RandomizedSearchCV attributes
+    and methods (predict, refit_time_, ...) are not provided; call
+    best_estimator_ instead.
+    """
+    best_estimator_: Pipeline
+    best_params_: Dict[str, object]
+    best_score_: float
+    cv_results_: Dict[str, object] | pd.DataFrame
+
+
+@dataclass(frozen=True)
+class SearchSpace:
+    """
+    Successive-halving space: `resource` is the warm-startable budget parameter.
+
+    `cumulative` is True when the resource counts the total trained so far
+    (n_estimators, boosting iterations) and False when it limits a single
+    fit (LogisticRegression max_iter).
+    """
+    estimator: object
+    resource: str
+    min_resource: int
+    max_resource: int
+    params: Dict[str, object]
+    cumulative: bool = True
+
+
 def load_data(path: str | Path, cfg: Config) -> pd.DataFrame:
     df = pd.read_csv(path)
     if cfg.target_col not in df.columns:
@@ -130,54 +185,301 @@ def make_pipeline(preprocessor: ColumnTransformer, model: object) -> Pipeline:
     return Pipeline(steps=[("preprocess", preprocessor), ("model", model)])
 
 
+def _preprocess_fold(
+    preprocessor: ColumnTransformer,
+    X: pd.DataFrame,
+    y: pd.Series,
+    train_idx: np.ndarray,
+    valid_idx: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    fitted = clone(preprocessor).fit(X.iloc[train_idx], y.iloc[train_idx])
+    return fitted.transform(X.iloc[train_idx]), fitted.transform(X.iloc[valid_idx])
+
+
+def build_fold_cache(
+    X: pd.DataFrame,
+    y: pd.Series,
+    preprocessor: ColumnTransformer,
+    cfg: Config,
+    cache_dir: Optional[str | Path] = None,
+) -> List[FoldData]:
+    """
+    Fits the preprocessor once per CV fold and keeps the transformed matrices.
+
+    Every candidate model and hyperparameter trial is then scored on the same
+    matrices, so only the estimator itself is fitted per fold (the fit stays
+    leakage-safe: imputers, scaler and one-hot are fitted on the train part).
+    With `cache_dir`, folds are also memoized on disk by joblib, keyed by the
+    fold indices, the preprocessor parameters and a hash of the data, so
+    later runs on the same data skip preprocessing entirely.
+    """
+    cv = StratifiedKFold(n_splits=cfg.cv_splits, shuffle=True, random_state=cfg.random_state)
+    preprocess = Memory(cache_dir, verbose=0).cache(_preprocess_fold) if cache_dir else _preprocess_fold
+
+    y_values = y.to_numpy()
+    folds = []
+    for index, (train_idx, valid_idx) in enumerate(cv.split(X, y)):
+        X_train, X_valid = preprocess(preprocessor, X, y, train_idx, valid_idx)
+        folds.append(FoldData(index, X_train, X_valid, y_values[train_idx], y_values[valid_idx]))
+    return folds
+
+
+def _fit_score_fold(model: object, fold: FoldData, scoring: Tuple[str, ...]) -> Dict[str, float]:
+    fitted = clone(model).fit(fold.X_train, fold.y_train)
+    return {name: float(get_scorer(name)(fitted, fold.X_valid, fold.y_valid)) for name in scoring}
+
+
+def evaluate_on_folds(
+    models: Dict[str, object],
+    folds: List[FoldData],
+    scoring: Tuple[str, ...] = SCORING,
+    n_jobs: int = -1,
+) -> Dict[str, Dict[str, float]]:
+    """Mean CV score of every model, with all (model, fold) fits run in one parallel batch."""
+    names = list(models)
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score_fold)(models[name], fold, scoring) for name in names for fold in folds
+    )
+    per_model = [scores[i * len(folds):(i + 1) * len(folds)] for i in range(len(names))]
+    return {
+        name: {metric: float(np.mean([s[metric] for s in fold_scores])) for metric in scoring}
+        for name, fold_scores in zip(names, per_model)
+    }
+
+
 def cv_benchmark(
     X: pd.DataFrame,
     y: pd.Series,
     preprocessor: ColumnTransformer,
     models: Dict[str, object],
     cfg: Config,
+    folds: Optional[List[FoldData]] = None,
 ) -> pd.DataFrame:
-    cv = StratifiedKFold(n_splits=cfg.cv_splits, shuffle=True, random_state=cfg.random_state)
-    scoring = {
-        "accuracy": "accuracy",
-        "precision": "precision",
-        "recall": "recall",
-        "f1": "f1",
-        "roc_auc": "roc_auc",
-    }
+    if folds is None:
+        folds = build_fold_cache(X, y, preprocessor, cfg)
 
-    rows = []
-    for name, model in models.items():
-        pipe = make_pipeline(preprocessor, model)
-        scores = cross_validate(pipe, X, y, cv=cv, scoring=scoring, n_jobs=-1, error_score="raise")
-        row = {"model": name}
-        for k, v in scores.items():
-            if k.startswith("test_"):
-                row[k.replace("test_", "")] = float(np.mean(v))
-        rows.append(row)
+    scores = evaluate_on_folds(models, folds)
+    rows = [{"model": name, **scores[name]} for name in models]
 
     out = pd.DataFrame(rows).sort_values(by="roc_auc", ascending=False).reset_index(drop=True)
     return out
 
 
-def tune_logreg(X: pd.DataFrame, y: pd.Series, preprocessor: ColumnTransformer, cfg: Config) -> RandomizedSearchCV:
-    pipe = make_pipeline(preprocessor, LogisticRegression(max_iter=20000, class_weight="balanced", solver="lbfgs"))
+def _pipeline_params(params: Dict[str, object]) -> Dict[str, object]:
+    """Estimator params as params of the "model" step of make_pipeline."""
+    return {f"model__{key}": value for key, value in params.items()}
+
+
+def tune_logreg(
+    X: pd.DataFrame,
+    y: pd.Series,
+    preprocessor: ColumnTransformer,
+    cfg: Config,
+    folds: Optional[List[FoldData]] = None,
+) -> SearchResult:
+    """
+    Random search over C, scored on the cached folds.
+
+    cv_results_ has the RandomizedSearchCV columns params, param_model__C,
+    mean_test_score and rank_test_score (no per-split or timing columns).
+    """
+    if folds is None:
+        folds = build_fold_cache(X, y, preprocessor, cfg)
+
+    # Same 25 candidates as RandomizedSearchCV(n_iter=25, random_state=cfg.random_state)
+    base = LogisticRegression(max_iter=20000, class_weight="balanced", solver="lbfgs")
     param_distributions = {
-        "model__C": np.logspace(-3, 3, 80),
+        "C": np.logspace(-3, 3, 80),
     }
-    cv = StratifiedKFold(n_splits=cfg.cv_splits, shuffle=True, random_state=cfg.random_state)
-    search = RandomizedSearchCV(
-        pipe,
-        param_distributions=param_distributions,
-        n_iter=25,
-        scoring="roc_auc",
-        cv=cv,
-        random_state=cfg.random_state,
-        n_jobs=-1,
-        verbose=0,
+    candidates = list(ParameterSampler(param_distributions, n_iter=25, random_state=cfg.random_state))
+
+    trials = {str(i): clone(base).set_params(**params) for i, params in enumerate(candidates)}
+    scores = evaluate_on_folds(trials, folds, scoring=("roc_auc",))
+    mean_scores = np.array([scores[str(i)]["roc_auc"] for i in range(len(candidates))])
+    cv_results = {
+        "params": [_pipeline_params(params) for params in candidates],
+        "param_model__C": np.array([params["C"] for params in candidates]),
+        "mean_test_score": mean_scores,
+        "rank_test_score": pd.Series(-mean_scores).rank(method="min").to_numpy(dtype=np.int32),
+    }
+
+    best = int(mean_scores.argmax())
+    best_estimator = make_pipeline(clone(preprocessor), trials[str(best)])
+    best_estimator.fit(X, y)
+    return SearchResult(
+        best_estimator_=best_estimator,
+        best_params_=cv_results["params"][best],
+        best_score_=float(mean_scores[best]),
+        cv_results_=cv_results,
     )
-    search.fit(X, y)
-    return search
+
+
+def get_search_spaces(random_state: int) -> Dict[str, SearchSpace]:
+    models = get_models(random_state)
+    return {
+        "logreg_balanced": SearchSpace(
+            models["logreg_balanced"], "max_iter", 50, 20000,
+            {"C": np.logspace(-3, 3, 80)},
+            cumulative=False,
+        ),
+        "random_forest": SearchSpace(
+            models["random_forest"], "n_estimators", 25, 600,
+            {
+                "max_depth": [None, 4, 6, 8, 12],
+                "min_samples_leaf": [1, 2, 4, 8],
+                "max_features": ["sqrt", 0.5, 1.0],
+            },
+        ),
+        "grad_boosting": SearchSpace(
+            models["grad_boosting"], "n_estimators", 20, 300,
+            {
+                "learning_rate": np.logspace(-2.5, -0.5, 20),
+                "max_depth": [2, 3, 4],
+                "subsample": [0.6, 0.8, 1.0],
+            },
+        ),
+        "hist_gbdt": SearchSpace(
+            models["hist_gbdt"], "max_iter", 20, 300,
+            {
+                "learning_rate": np.logspace(-2.5, -0.5, 20),
+                "max_leaf_nodes": [7, 15, 31],
+                "min_samples_leaf": [5, 10, 20, 40],
+                "l2_regularization": [0.0, 0.1, 1.0],
+            },
+        ),
+    }
+
+
+def _warm_fit_score(estimator: object, fold: FoldData, resource: str, value: int) -> Tuple[object, float, float]:
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # Convergence warnings at small budgets; class_weight presets with warm_start
+        warnings.simplefilter("ignore")
+        estimator.set_params(**{resource: value}).fit(fold.X_train, fold.y_train)
+    score = float(get_scorer("roc_auc")(estimator, fold.X_valid, fold.y_valid))
+    return estimator, score, time.perf_counter() - start
+
+
+def halving_search(
+    name: str,
+    space: SearchSpace,
+    folds: List[FoldData],
+    cfg: Config,
+    n_candidates: int = 27,
+    factor: int = 3,
+    budget_s: Optional[float] = None,
+    n_jobs: int = -1,
+) -> Tuple[Dict[str, object], float, List[Dict[str, object]]]:
+    """
+    Successive halving over randomly sampled candidates, scored by CV ROC-AUC.
+
+    Every rung fits the surviving candidates on all folds with `factor` times
+    more resource (iterations / trees) than the previous one, and keeps the
+    best 1/factor of them; the last rung uses max_resource. Fits are warm
+    started, so a promoted candidate only trains its additional iterations
+    or trees: a non-cumulative resource (see SearchSpace) is set to the
+    difference from the previous rung. When `budget_s` is exceeded no further
+    rung is started and the best candidate of the last completed rung is
+    returned.
+
+    Returns (best params including the resource, best mean ROC-AUC, trial log).
+    """
+    start = time.perf_counter()
+    candidates = list(ParameterSampler(space.params, n_iter=n_candidates, random_state=cfg.random_state))
+    # Rungs until one candidate is left: smallest n with factor ** (n - 1) >= candidates
+    n_rungs, capacity = 1, 1
+    while capacity < len(candidates):
+        capacity *= factor
+        n_rungs += 1
+
+    # One warm-startable estimator per (candidate, fold)
+    fitted = {
+        i: [clone(space.estimator).set_params(warm_start=True, **params) for _ in folds]
+        for i, params in enumerate(candidates)
+    }
+    alive = list(range(len(candidates)))
+    trials: List[Dict[str, object]] = []
+    best_i, best_score, best_resource = alive[0], -np.inf, space.min_resource
+    previous = 0
+
+    for rung in range(n_rungs):
+        if rung > 0 and budget_s is not None and time.perf_counter() - start > budget_s:
+            break
+        resource = max(space.min_resource, int(space.max_resource / factor ** (n_rungs - 1 - rung)))
+        # Per-fit limits continue from the previous rung's coefficients
+        fit_value = resource if space.cumulative else max(1, resource - previous)
+        previous = resource
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_warm_fit_score)(fitted[i][k], fold, space.resource, fit_value)
+            for i in alive for k, fold in enumerate(folds)
+        )
+
+        scores = {}
+        for j, i in enumerate(alive):
+            rows = results[j * len(folds):(j + 1) * len(folds)]
+            fitted[i] = [estimator for estimator, _, _ in rows]
+            scores[i] = float(np.mean([score for _, score, _ in rows]))
+            trials.append({
+                "model": name,
+                "candidate": i,
+                "rung": rung,
+                "resource": space.resource,
+                "resource_value": resource,
+                "roc_auc": scores[i],
+                "fit_s": float(sum(seconds for _, _, seconds in rows)),
+                "elapsed_s": time.perf_counter() - start,
+                **candidates[i],
+            })
+
+        ranked = sorted(alive, key=lambda i: scores[i], reverse=True)
+        best_i, best_score, best_resource = ranked[0], scores[ranked[0]], resource
+        alive = ranked[:max(1, math.ceil(len(alive) / factor))]
+
+    return {**candidates[best_i], space.resource: best_resource}, best_score, trials
+
+
+def tune_models(
+    X: pd.DataFrame,
+    y: pd.Series,
+    preprocessor: ColumnTransformer,
+    cfg: Config,
+    folds: Optional[List[FoldData]] = None,
+    model_names: Optional[List[str]] = None,
+    n_candidates: int = 27,
+    factor: int = 3,
+    budget_s: Optional[float] = None,
+) -> Dict[str, SearchResult]:
+    """
+    Successive-halving search for every model in `model_names` (default: all of get_models).
+
+    `budget_s` is the total time budget, shared evenly by the models; time a
+    model does not use is passed on to the next ones. Each SearchResult holds
+    the refitted pipeline and, in cv_results_, the per-trial timing log
+    (a DataFrame, with the model's own parameter names).
+    """
+    if folds is None:
+        folds = build_fold_cache(X, y, preprocessor, cfg)
+    spaces = get_search_spaces(cfg.random_state)
+    names = model_names or list(spaces)
+
+    results: Dict[str, SearchResult] = {}
+    start = time.perf_counter()
+    for k, name in enumerate(names):
+        model_budget = None
+        if budget_s is not None:
+            model_budget = max(0.0, budget_s - (time.perf_counter() - start)) / (len(names) - k)
+        params, score, trials = halving_search(
+            name, spaces[name], folds, cfg, n_candidates=n_candidates, factor=factor, budget_s=model_budget
+        )
+        best_estimator = make_pipeline(clone(preprocessor), clone(spaces[name].estimator).set_params(**params))
+        best_estimator.fit(X, y)
+        results[name] = SearchResult(
+            best_estimator_=best_estimator,
+            best_params_=_pipeline_params(params),
+            best_score_=score,
+            cv_results_=pd.DataFrame(trials),
+        )
+    return results
 
 
 def fit_final_and_report(
@@ -208,30 +510,113 @@ def fit_final_and_report(
     return report
 
 
-def tune_threshold(y_true: np.ndarray, proba: np.ndarray, metric: str = "f1") -> Tuple[float, float]:
-    thresholds = np.linspace(0.05, 0.95, 91)
-    best_t, best_score = 0.5, -1.0
-
-    for t in thresholds:
-        pred = (proba >= t).astype(int)
-        if metric == "f1":
-            score = f1_score(y_true, pred, zero_division=0)
-        elif metric == "recall":
-            score = recall_score(y_true, pred, zero_division=0)
-        elif metric == "precision":
-            score = precision_score(y_true, pred, zero_division=0)
-        else:
-            raise ValueError("metric must be one of: f1, recall, precision")
-        if score > best_score:
-            best_t, best_score = float(t), float(score)
-
-    return best_t, best_score
+def threshold_curve(
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    thresholds: np.ndarray,
+    sample_weight: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Confusion counts and precision / recall / F1 at every threshold, in one pass.
+
+    Scores are sorted once; cumulative sums of the (weighted) positives and
+    negatives give the true / false positives of every cut, and each
+    threshold is mapped to its cut with a binary search, so the cost is
+    O((N + T) log N) instead of one sklearn metric call per threshold.
+    A sample is predicted positive when proba >= threshold, as in
+    (proba >= t).astype(int). Empty denominators give 0 (zero_division=0).
+    """
+    y_true = np.asarray(y_true)
+    proba = np.asarray(proba, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    weight = np.ones_like(proba) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+
+    order = np.argsort(-proba, kind="mergesort")
+    positive = (y_true[order] == 1) * weight[order]
+    negative = (y_true[order] != 1) * weight[order]
+    tp_cum = np.concatenate(([0.0], np.cumsum(positive)))
+    fp_cum = np.concatenate(([0.0], np.cumsum(negative)))
+
+    # Number of samples with proba >= t (scores sorted in descending order)
+    n_predicted = np.searchsorted(-proba[order], -thresholds, side="right")
+    tp = tp_cum[n_predicted]
+    fp = fp_cum[n_predicted]
+    fn = tp_cum[-1] - tp
+    tn = fp_cum[-1] - fp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+
+    return {
+        "threshold": thresholds,
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "tn": tn,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
 
 
-def export_model(model: Pipeline, out_path: str | Path) -> None:
+def tune_threshold(
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    metric: str = "f1",
+    thresholds: str | np.ndarray | None = None,
+    fp_cost: float = 1.0,
+    fn_cost: float = 1.0,
+    sample_weight: Optional[np.ndarray] = None,
+) -> Tuple[float, float]:
+    """
+    Best decision threshold for `metric` and its score.
+
+    thresholds: None for the 0.05..0.95 grid (step 0.01), "unique" for every
+    distinct score, or an explicit array. metric "cost" minimizes the total
+    misclassification cost fp_cost * FP + fn_cost * FN (approving a risky
+    loan vs rejecting a good applicant) and returns that cost. Ties go to
+    the lowest threshold.
+    """
+    if thresholds is None:
+        thresholds = np.linspace(0.05, 0.95, 91)
+    elif isinstance(thresholds, str):
+        if thresholds != "unique":
+            raise ValueError("thresholds must be None, 'unique' or an array")
+        thresholds = np.unique(proba)
+    thresholds = np.sort(np.asarray(thresholds, dtype=float))
+
+    curve = threshold_curve(y_true, proba, thresholds, sample_weight=sample_weight)
+    if metric in ("f1", "recall", "precision"):
+        best = int(np.argmax(curve[metric]))
+        return float(thresholds[best]), float(curve[metric][best])
+    if metric == "cost":
+        cost = fp_cost * curve["fp"] + fn_cost * curve["fn"]
+        best = int(np.argmin(cost))
+        return float(thresholds[best]), float(cost[best])
+    raise ValueError("metric must be one of: f1, recall, precision, cost")
+
+
+def export_model(
+    model: Pipeline,
+    out_path: str | Path,
+    fmt: str = "joblib",
+    manifest: Optional[Dict[str, object]] = None,
+) -> None:
+    """
+    fmt "joblib": a single pickle of the model at out_path.
+    fmt "mmap": an artifact directory at out_path (see model_artifacts.py) with
+    memory-mappable arrays and a manifest of features, threshold and metrics.
+    """
     out_path = Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(model, out_path)
+    if fmt == "mmap":
+        save_artifact(model, out_path, manifest)
+    elif fmt == "joblib":
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, out_path)
+    else:
+        raise ValueError("fmt must be one of: joblib, mmap")
     print(f"\nSaved model to: {out_path.resolve()}")
 
 
@@ -239,9 +624,21 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", type=str, default="loan.csv", help="Path to dataset CSV.")
     parser.add_argument("--out", type=str, default="models/loan_model.joblib", help="Output path for saved model.")
+    parser.add_argument("--export_format", type=str, default="joblib", choices=["joblib", "mmap"],
+                        help="joblib: single pickle; mmap: artifact directory with memory-mappable arrays and a manifest.")
     parser.add_argument("--no_tune", action="store_true", help="Skip hyperparameter tuning.")
+    parser.add_argument("--tuner", type=str, default="random", choices=["random", "halving"],
+                        help="random: RandomizedSearch over logreg C; halving: successive halving over all models.")
+    parser.add_argument("--tune_models", type=str, nargs="+", default=None, help="Models searched by --tuner halving.")
+    parser.add_argument("--tune_budget_s", type=float, default=None, help="Total time budget of --tuner halving.")
+    parser.add_argument("--trial_log", type=str, default=None, help="CSV path for the per-trial timing log (halving).")
     parser.add_argument("--calibrate", action="store_true", help="Calibrate probabilities (Platt scaling).")
-    parser.add_argument("--threshold_metric", type=str, default="f1", choices=["f1", "precision", "recall"])
+    parser.add_argument("--threshold_metric", type=str, default="f1", choices=["f1", "precision", "recall", "cost"])
+    parser.add_argument("--threshold_grid", type=str, default="grid", choices=["grid", "unique"],
+                        help="Candidate thresholds: 0.05..0.95 grid or every unique test score.")
+    parser.add_argument("--fp_cost", type=float, default=1.0, help="Cost of approving a loan that should be rejected.")
+    parser.add_argument("--fn_cost", type=float, default=1.0, help="Cost of rejecting a loan that should be approved.")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Directory to memoize preprocessed CV folds across runs.")
     args = parser.parse_args()
 
     cfg = Config()
@@ -254,10 +651,13 @@ def main() -> None:
         X, y, test_size=cfg.test_size, random_state=cfg.random_state, stratify=y
     )
 
-    preprocessor, _, _ = build_preprocessor(X_train)
+    preprocessor, numeric_cols, categorical_cols = build_preprocessor(X_train)
+
+    # Preprocessed once per fold, shared by the benchmark and the tuning trials
+    folds = build_fold_cache(X_train, y_train, preprocessor, cfg, cache_dir=args.cache_dir)
 
     models = get_models(cfg.random_state)
-    bench = cv_benchmark(X_train, y_train, preprocessor, models, cfg)
+    bench = cv_benchmark(X_train, y_train, preprocessor, models, cfg, folds=folds)
     print("\n=== Cross-Validation Benchmark (train split) ===")
     print(bench.to_string(index=False))
 
@@ -267,8 +667,27 @@ def main() -> None:
         best_model.fit(X_train, y_train)
         best_estimator = best_model
         print(f"\nSelected (no-tune): {top_name}")
+    elif args.tuner == "halving":
+        searches = tune_models(
+            X_train, y_train, preprocessor, cfg, folds=folds,
+            model_names=args.tune_models, budget_s=args.tune_budget_s,
+        )
+        print("\n=== Successive Halving Tuning (ROC-AUC) ===")
+        for name, result in searches.items():
+            trials = result.cv_results_
+            print(
+                f"{name}: CV ROC-AUC {result.best_score_:.4f} | {len(trials)} trials | "
+                f"{trials['elapsed_s'].max():.1f}s | {result.best_params_}"
+            )
+        top_name = max(searches, key=lambda name: searches[name].best_score_)
+        best_estimator = searches[top_name].best_estimator_
+        print(f"Selected: {top_name}")
+        if args.trial_log:
+            Path(args.trial_log).parent.mkdir(parents=True, exist_ok=True)
+            pd.concat([r.cv_results_ for r in searches.values()]).to_csv(args.trial_log, index=False)
+            print(f"Trial log written to: {args.trial_log}")
     else:
-        search = tune_logreg(X_train, y_train, preprocessor, cfg)
+        search = tune_logreg(X_train, y_train, preprocessor, cfg, folds=folds)
         best_estimator = search.best_estimator_
         print("\n=== Logistic Regression Tuning (ROC-AUC) ===")
         print("Best params:", search.best_params_)
@@ -286,7 +705,14 @@ def main() -> None:
     final_model.fit(X_train, y_train)
     proba = final_model.predict_proba(X_test)[:, 1]
 
-    best_t, best_s = tune_threshold(y_test.to_numpy(), proba, metric=args.threshold_metric)
+    best_t, best_s = tune_threshold(
+        y_test.to_numpy(),
+        proba,
+        metric=args.threshold_metric,
+        thresholds=None if args.threshold_grid == "grid" else "unique",
+        fp_cost=args.fp_cost,
+        fn_cost=args.fn_cost,
+    )
     pred_tuned = (proba >= best_t).astype(int)
 
     print(f"\n=== Threshold Tuning ({args.threshold_metric}) ===")
@@ -294,12 +720,16 @@ def main() -> None:
     print("Confusion Matrix (tuned):\n", confusion_matrix(y_test, pred_tuned))
 
 
+    tuned_metrics = {
+        "accuracy": float(accuracy_score(y_test, pred_tuned)),
+        "precision": float(precision_score(y_test, pred_tuned, zero_division=0)),
+        "recall": float(recall_score(y_test, pred_tuned, zero_division=0)),
+        "f1": float(f1_score(y_test, pred_tuned, zero_division=0)),
+        "roc_auc": float(roc_auc_score(y_test, proba)),
+    }
     print("\nMetrics at tuned threshold:")
-    print("accuracy:", accuracy_score(y_test, pred_tuned))
-    print("precision:", precision_score(y_test, pred_tuned, zero_division=0))
-    print("recall:", recall_score(y_test, pred_tuned, zero_division=0))
-    print("f1:", f1_score(y_test, pred_tuned, zero_division=0))
-    print("roc_auc:", roc_auc_score(y_test, proba))
+    for name, value in tuned_metrics.items():
+        print(f"{name}:", value)
 
 
     base_for_importance = best_estimator
@@ -318,7 +748,19 @@ def main() -> None:
     print(imp.to_string(index=False))
 
 
-    export_model(final_model, args.out)
+    manifest = {
+        "model": type(model).__name__,
+        "calibrated": bool(args.calibrate),
+        "features": {
+            "numeric": numeric_cols,
+            "categorical": categorical_cols,
+            "transformed": [str(name) for name in feature_names],
+        },
+        "threshold": best_t,
+        "threshold_metric": args.threshold_metric,
+        "metrics": tuned_metrics,
+    }
+    export_model(final_model, args.out, fmt=args.export_format, manifest=manifest)
 
 
 if __name__ == "__main__":
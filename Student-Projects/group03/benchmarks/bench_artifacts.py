@@ -0,0 +1,158 @@
+"""
+Model artifact benchmark
+------------------------
+Cold load time and memory of the export formats, for a pipeline with the
+600-tree random forest of get_models (or any --model):
+
+    joblib       : single pickle, joblib.load
+    joblib+mmap  : the same pickle, joblib.load(mmap_mode="r")
+    artifact     : model_artifacts directory, load_artifact (mmap, flat forest)
+
+For each format `--workers` fresh processes load the model at the same time
+(libraries are imported before the clock starts) and score one row; the
+parent then reads their memory from /proc: RSS, PSS (shared pages split
+between the processes that map them) and USS (pages private to a worker).
+Memory-mapped arrays show up in RSS but not in USS: the workers share one
+copy. Predict latency (1 row and --batch_rows rows) is measured in-process.
+
+Linux only (/proc). Run from the group03 directory:
+    python -m benchmarks.bench_artifacts --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import joblib
+
+from advanced_loan_pipeline import Config, add_features, build_preprocessor, get_models, make_pipeline, split_xy
+from model_artifacts import load_artifact, save_artifact
+
+
+FORMATS = ["joblib", "joblib+mmap", "artifact"]
+
+
+def load(fmt: str, path: str) -> object:
+    if fmt == "joblib":
+        return joblib.load(path)
+    if fmt == "joblib+mmap":
+        return joblib.load(path, mmap_mode="r")
+    return load_artifact(path)[0]
+
+
+def proc_memory_mb(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS (private clean + dirty) of a process, in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def worker(fmt: str, path: str, data: str) -> None:
+    """Loads the model, scores one row, reports, then waits for the parent to measure it."""
+    cfg = Config()
+    X, _ = split_xy(add_features(pd.read_csv(data)), cfg)
+    before = proc_memory_mb("self")
+    start = time.perf_counter()
+    model = load(fmt, path)
+    load_s = time.perf_counter() - start
+    model.predict_proba(X.head(1))
+    after = proc_memory_mb("self")
+    print(json.dumps({"load_s": load_s, "uss_before": before["uss"], "rss_before": before["rss"],
+                      "rss_after": after["rss"]}), flush=True)
+    sys.stdin.readline()
+
+
+def run_workers(fmt: str, path: str, data: str, n: int) -> List[Dict[str, float]]:
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_artifacts", "--worker", fmt, path, "--data", data],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(n)
+    ]
+    reports = [json.loads(proc.stdout.readline()) for proc in procs]
+
+    # All workers hold the model now: shared pages are split between them
+    for proc, report in zip(procs, reports):
+        memory = proc_memory_mb(proc.pid)
+        report["rss_model"] = report["rss_after"] - report["rss_before"]
+        report["pss"] = memory["pss"]
+        report["uss_model"] = memory["uss"] - report["uss_before"]
+    for proc in procs:
+        proc.stdin.write("\n")
+        proc.stdin.flush()
+        proc.wait()
+    return reports
+
+
+def time_predict(model: object, X: pd.DataFrame, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict_proba(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default=None, help="Fitted joblib model (default: train the random forest).")
+    parser.add_argument("--data", type=str, default="loan.csv")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch_rows", type=int, default=10_000)
+    parser.add_argument("--worker", type=str, nargs=2, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.data)
+        return
+
+    cfg = Config()
+    X, y = split_xy(add_features(pd.read_csv(args.data)), cfg)
+    if args.model:
+        model = joblib.load(args.model)
+    else:
+        preprocessor, _, _ = build_preprocessor(X)
+        model = make_pipeline(preprocessor, get_models(cfg.random_state)["random_forest"]).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"joblib": str(Path(tmp) / "model.joblib"), "artifact": str(Path(tmp) / "artifact")}
+        joblib.dump(model, paths["joblib"])
+        save_artifact(model, paths["artifact"], {"threshold": 0.5})
+        paths["joblib+mmap"] = paths["joblib"]
+
+        print(f"{args.workers} concurrent workers per format (MB per worker, model only)")
+        print(f"{'format':>12} | {'load s':>7} | {'RSS':>6} | {'USS':>6} | {'PSS':>6} | {'1 row ms':>8} | {args.batch_rows:>6,} rows s")
+        batch = X.sample(args.batch_rows, replace=True, random_state=0)
+        for fmt in FORMATS:
+            reports = run_workers(fmt, paths[fmt], args.data, args.workers)
+            loaded = load(fmt, paths[fmt])
+            time_predict(loaded, X.head(1), 3)  # warm-up
+            one_row_ms = 1000 * time_predict(loaded, X.head(1), 20)
+            batch_s = time_predict(loaded, batch, 1)
+            print(
+                f"{fmt:>12} | {np.mean([r['load_s'] for r in reports]):>7.3f} | "
+                f"{np.mean([r['rss_model'] for r in reports]):>6.1f} | "
+                f"{np.mean([r['uss_model'] for r in reports]):>6.1f} | "
+                f"{np.mean([r['pss'] for r in reports]):>6.1f} | {one_row_ms:>8.1f} | {batch_s:>11.2f}"
+            )
+    print("\nPSS is the whole worker (libraries included); compare it across formats.")
+
+
+if __name__ == "__main__":
+    main()
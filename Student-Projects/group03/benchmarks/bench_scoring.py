@@ -0,0 +1,136 @@
+"""
+Scoring benchmark
+-----------------
+Throughput of the batch CLI path and latency of the HTTP endpoint
+(score_loans.py) for an exported model.
+
+- batch: a synthetic CSV of `--rows` applications (loan.csv rows resampled)
+  is scored in chunks; reports rows/s and the peak RSS growth.
+- endpoint: `--clients` concurrent clients send `--requests` requests each
+  of `--rows_per_request` rows, with micro-batching on and off
+  (max_batch_rows=1); reports rows/s and p50 / p99 request latency.
+  Clients run in the same process, so numbers are a lower bound.
+
+Run from the group03 directory:
+    python -m benchmarks.bench_scoring --rows 1000000 --clients 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from score_loans import load_model, make_server, score_csv
+
+
+def make_csv(source: str, rows: int, path: Path, seed: int = 0, chunk: int = 100_000) -> Path:
+    """`rows` applications resampled from `source`, written in chunks to keep the peak RSS low."""
+    df = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        sample = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+        sample["Loan_ID"] = [f"LP{i:09d}" for i in range(start, start + n)]
+        sample.to_csv(path, mode="a" if start else "w", header=start == 0, index=False)
+    return path
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_clients(url: str, payloads: List[bytes], clients: int, requests: int) -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client(k: int) -> None:
+        own = []
+        for i in range(requests):
+            body = payloads[(k * requests + i) % len(payloads)]
+            start = time.perf_counter()
+            with urllib.request.urlopen(urllib.request.Request(url, data=body)) as response:
+                response.read()
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def bench_endpoint(model: object, source: str, args: argparse.Namespace, max_batch_rows: int) -> None:
+    records = json.loads(pd.read_csv(source).to_json(orient="records"))
+    payloads = [
+        json.dumps({"rows": records[i:i + args.rows_per_request]}).encode("utf-8")
+        for i in range(0, len(records) - args.rows_per_request + 1, args.rows_per_request)
+    ]
+
+    server = make_server(model, port=0, max_batch_rows=max_batch_rows, max_wait_ms=args.max_wait_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+    try:
+        run_clients(url, payloads, args.clients, 5)  # warm-up
+        start = time.perf_counter()
+        latencies = np.array(run_clients(url, payloads, args.clients, args.requests)) * 1000
+        seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    rows = len(latencies) * args.rows_per_request
+    label = "micro-batched" if max_batch_rows > 1 else "unbatched"
+    print(
+        f"{label:>13} | {rows / seconds:>8,.0f} | {np.percentile(latencies, 50):>7.1f} | "
+        f"{np.percentile(latencies, 99):>7.1f} | {server.batcher.stats()['avg_batch_rows']:>9.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default="models/loan_model.joblib")
+    parser.add_argument("--data", type=str, default="loan.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client.")
+    parser.add_argument("--rows_per_request", type=int, default=1)
+    parser.add_argument("--max_batch_rows", type=int, default=256)
+    parser.add_argument("--max_wait_ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model, _ = load_model(args.model)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = make_csv(args.data, args.rows, Path(tmp) / "applications.csv")
+        rss_before = peak_rss_mb()
+        stats = score_csv(model, csv_path, Path(tmp) / "predictions.csv", chunksize=args.chunksize, verbose=False)
+        rss_growth = peak_rss_mb() - rss_before
+    print(
+        f"batch: {stats['rows']:,} rows in {stats['seconds']:.1f}s = {stats['rows_per_s']:,.0f} rows/s "
+        f"(chunksize {args.chunksize:,}, peak RSS +{rss_growth:.0f} MB)\n"
+    )
+
+    print(
+        f"endpoint: {args.clients} clients x {args.requests} requests x {args.rows_per_request} row(s)\n"
+        f"{'mode':>13} | {'rows/s':>8} | {'p50 ms':>7} | {'p99 ms':>7} | {'avg batch':>9}"
+    )
+    bench_endpoint(model, args.data, args, args.max_batch_rows)
+    bench_endpoint(model, args.data, args, 1)
+
+
+if __name__ == "__main__":
+    main()
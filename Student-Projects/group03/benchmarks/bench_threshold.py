@@ -0,0 +1,73 @@
+"""
+Threshold search benchmark
+--------------------------
+The previous tune_threshold (one sklearn f1/precision/recall call per
+threshold) versus the sort-and-cumsum version, on synthetic scored rows.
+Both must pick the same threshold and score; the vectorized search is
+also timed over every unique score and with the cost metric.
+
+Run from the group03 directory:
+    python -m benchmarks.bench_threshold --rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Tuple
+
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+from advanced_loan_pipeline import tune_threshold
+
+
+def tune_threshold_loop(y_true: np.ndarray, proba: np.ndarray, metric: str = "f1") -> Tuple[float, float]:
+    """The original implementation, kept as the reference."""
+    thresholds = np.linspace(0.05, 0.95, 91)
+    best_t, best_score = 0.5, -1.0
+    metric_fn = {"f1": f1_score, "precision": precision_score, "recall": recall_score}[metric]
+    for t in thresholds:
+        score = metric_fn(y_true, (proba >= t).astype(int), zero_division=0)
+        if score > best_score:
+            best_t, best_score = float(t), float(score)
+    return best_t, best_score
+
+
+def make_scores(rows: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Labels with ~69% positives (as in loan.csv) and overlapping scores."""
+    rng = np.random.default_rng(seed)
+    y = (rng.random(rows) < 0.69).astype(int)
+    logits = rng.normal(loc=np.where(y == 1, 0.8, -0.4), scale=1.0)
+    return y, 1.0 / (1.0 + np.exp(-logits))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--metrics", type=str, nargs="+", default=["f1", "precision", "recall"])
+    args = parser.parse_args()
+
+    y, proba = make_scores(args.rows)
+    print(f"{args.rows:,} scored rows\n")
+    print(f"{'metric':>9} | {'loop s':>7} | {'vectorized s':>12} | {'speedup':>8} | {'same result':>11}")
+    for metric in args.metrics:
+        loop_s, loop_result = timed(tune_threshold_loop, y, proba, metric)
+        fast_s, fast_result = timed(tune_threshold, y, proba, metric)
+        same = loop_result[0] == fast_result[0] and np.isclose(loop_result[1], fast_result[1])
+        print(f"{metric:>9} | {loop_s:>7.2f} | {fast_s:>12.3f} | {loop_s / fast_s:>7.0f}x | {str(same):>11}")
+
+    unique_s, (t, score) = timed(tune_threshold, y, proba, "f1", thresholds="unique")
+    print(f"\nf1 over all {len(np.unique(proba)):,} unique scores: {unique_s:.3f} s (t={t:.4f}, f1={score:.4f})")
+    cost_s, (t, cost) = timed(tune_threshold, y, proba, "cost", thresholds="unique", fp_cost=5.0, fn_cost=1.0)
+    print(f"cost (FP=5, FN=1) over all unique scores: {cost_s:.3f} s (t={t:.4f}, cost={cost:,.0f})")
+
+
+if __name__ == "__main__":
+    main()
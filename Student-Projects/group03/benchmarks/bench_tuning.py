@@ -0,0 +1,132 @@
+"""
+Tuning benchmark
+----------------
+The current search (RandomizedSearchCV: 25 values of C for the logistic
+regression, full 5-fold CV of the whole pipeline per candidate) versus
+successive halving over all four models (tune_models, warm-started fits on
+the cached folds).
+
+Reports the time each search needs to first reach the current search's
+best CV ROC-AUC (time-to-equal-AUC), the best CV ROC-AUC of each model and
+its search time, and writes the per-trial timing log of the halving run.
+
+Run from the group03 directory:
+    python -m benchmarks.bench_tuning --budget_s 60 --trial_log reports/trials.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import RandomizedSearchCV, StratifiedKFold, train_test_split
+
+from advanced_loan_pipeline import (
+    Config,
+    add_features,
+    build_fold_cache,
+    build_preprocessor,
+    load_data,
+    make_pipeline,
+    split_xy,
+    tune_models,
+)
+
+
+def current_search(X: pd.DataFrame, y: pd.Series, cfg: Config) -> pd.DataFrame:
+    """The previous tune_logreg, timed per candidate (sequential, so times add up)."""
+    preprocessor, _, _ = build_preprocessor(X)
+    pipe = make_pipeline(preprocessor, LogisticRegression(max_iter=20000, class_weight="balanced", solver="lbfgs"))
+    cv = StratifiedKFold(n_splits=cfg.cv_splits, shuffle=True, random_state=cfg.random_state)
+    search = RandomizedSearchCV(
+        pipe,
+        param_distributions={"model__C": np.logspace(-3, 3, 80)},
+        n_iter=25,
+        scoring="roc_auc",
+        cv=cv,
+        random_state=cfg.random_state,
+        n_jobs=1,
+    )
+    search.fit(X, y)
+    results = search.cv_results_
+    per_candidate = (results["mean_fit_time"] + results["mean_score_time"]) * cfg.cv_splits
+    return pd.DataFrame({
+        "model": "logreg_balanced",
+        "roc_auc": results["mean_test_score"],
+        "elapsed_s": np.cumsum(per_candidate),
+    })
+
+
+def time_to_auc(trials: pd.DataFrame, target: float) -> float:
+    reached = trials.loc[trials["roc_auc"] >= target - 1e-12, "elapsed_s"]
+    return float(reached.min()) if len(reached) else float("nan")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", type=str, default="loan.csv")
+    parser.add_argument("--budget_s", type=float, default=None, help="Total budget of the halving search.")
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--trial_log", type=str, default=None)
+    args = parser.parse_args()
+
+    cfg = Config()
+    X, y = split_xy(add_features(load_data(args.data, cfg)), cfg)
+    X_train, _, y_train, _ = train_test_split(
+        X, y, test_size=cfg.test_size, random_state=cfg.random_state, stratify=y
+    )
+
+    current = current_search(X_train, y_train, cfg)
+    target = float(current["roc_auc"].max())
+
+    start = time.perf_counter()
+    preprocessor, _, _ = build_preprocessor(X_train)
+    folds = build_fold_cache(X_train, y_train, preprocessor, cfg)
+    offset = time.perf_counter() - start
+    searches = tune_models(
+        X_train, y_train, preprocessor, cfg, folds=folds,
+        n_candidates=args.candidates, factor=args.factor, budget_s=args.budget_s,
+    )
+
+    # Trial logs restart at 0 for every model: shift them onto one timeline
+    logs = []
+    for result in searches.values():
+        log = result.cv_results_.copy()
+        log["elapsed_s"] += offset
+        offset = float(log["elapsed_s"].max())
+        logs.append(log)
+    halving = pd.concat(logs, ignore_index=True)
+    best = max(result.best_score_ for result in searches.values())
+
+    print(f"Target: best CV ROC-AUC of the current search = {target:.4f}\n")
+    print(f"{'search':>22} | {'trials':>6} | {'total s':>7} | {'time to target s':>16} | {'best AUC':>8}")
+    print(
+        f"{'current (logreg C)':>22} | {len(current):>6} | {current['elapsed_s'].max():>7.2f} | "
+        f"{time_to_auc(current, target):>16.2f} | {target:>8.4f}"
+    )
+    print(
+        f"{'halving (all models)':>22} | {len(halving):>6} | {halving['elapsed_s'].max():>7.2f} | "
+        f"{time_to_auc(halving, target):>16.2f} | {best:>8.4f}"
+    )
+
+    print(f"\n{'model':>16} | {'trials':>6} | {'search s':>8} | {'best AUC':>8} | best params")
+    for name, result in searches.items():
+        log = result.cv_results_
+        print(
+            f"{name:>16} | {len(log):>6} | {log['elapsed_s'].max():>8.2f} | "
+            f"{result.best_score_:>8.4f} | {result.best_params_}"
+        )
+
+    if args.trial_log:
+        Path(args.trial_log).parent.mkdir(parents=True, exist_ok=True)
+        halving.to_csv(args.trial_log, index=False)
+        print(f"\nTrial log written to: {args.trial_log}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Loan Scoring
+------------
+Scores loan applications with a pipeline exported by advanced_loan_pipeline.py.
+
+Two entry points share the same feature preparation (add_features, column
+types as seen in training):
+
+- batch: streams a CSV of any size in chunks through the model and appends
+  the predictions to the output CSV after every chunk, so memory stays
+  bounded by the chunk size.
+- serve: a lightweight HTTP endpoint that loads the model once. Concurrent
+  requests are queued and scored together in micro-batches (one
+  predict_proba call per batch), which keeps per-request overhead low under
+  load.
+
+Run:
+    python score_loans.py batch --input loan.csv --output predictions.csv
+    python score_loans.py serve --port 8080
+
+    curl -X POST localhost:8080/predict -d '{"rows": [{"Gender": "Male", ...}]}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+
+from advanced_loan_pipeline import Config, add_features
+from model_artifacts import is_artifact, load_artifact
+
+
+def load_model(path: str | Path) -> Tuple[object, Dict[str, object]]:
+    """(model, manifest): artifact directories are memory-mapped, joblib files have no manifest."""
+    if is_artifact(path):
+        return load_artifact(path, mmap_mode="r")
+    return joblib.load(path), {}
+
+
+def find_preprocessor(model: object) -> ColumnTransformer:
+    """The fitted ColumnTransformer of a pipeline, calibrated or not."""
+    if isinstance(model, CalibratedClassifierCV):
+        model = model.calibrated_classifiers_[0].estimator
+    if isinstance(model, Pipeline):
+        return model.named_steps["preprocess"]
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+def feature_columns(model: object) -> Tuple[List[str], List[str]]:
+    """(numeric, categorical) input columns the model was trained on."""
+    columns = {name: list(cols) for name, _, cols in find_preprocessor(model).transformers_ if name != "remainder"}
+    return columns.get("num", []), columns.get("cat", [])
+
+
+def prepare_frame(df: pd.DataFrame, categorical_cols: List[str]) -> pd.DataFrame:
+    """
+    Engineered features plus training-time column types.
+
+    Categorical values are compared as strings by the one-hot encoder, so
+    JSON numbers or booleans sent for a categorical field are turned into
+    text, as in the training CSV (unseen values are ignored by the encoder).
+    """
+    df = add_features(df)
+    for col in categorical_cols:
+        if col in df.columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype(object)
+    return df
+
+
+def score_frame(model: object, df: pd.DataFrame, categorical_cols: List[str]) -> np.ndarray:
+    return model.predict_proba(prepare_frame(df, categorical_cols))[:, 1]
+
+
+# ---------------- Batch scoring ----------------
+
+def score_csv(
+    model: object,
+    input_path: str | Path,
+    output_path: str | Path,
+    threshold: float = 0.5,
+    chunksize: int = 50_000,
+    cfg: Config = Config(),
+    verbose: bool = True,
+) -> Dict[str, float]:
+    """
+    Streams `input_path` through the model and writes id, probability and
+    prediction for every row to `output_path` (overwritten), one chunk at a time.
+
+    Returns rows, seconds and rows_per_s.
+    """
+    _, categorical_cols = feature_columns(model)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    rows = 0
+    start = time.perf_counter()
+    # Categorical columns are read as text, so every chunk gets the training dtypes
+    # (a chunk where a column is entirely empty would otherwise parse as float)
+    reader = pd.read_csv(input_path, chunksize=chunksize, dtype={col: str for col in categorical_cols})
+    with reader, open(output_path, "w", newline="") as out:
+        for i, chunk in enumerate(reader):
+            proba = score_frame(model, chunk, categorical_cols)
+            result = pd.DataFrame({"probability": proba, "prediction": (proba >= threshold).astype(int)})
+            if cfg.id_col in chunk.columns:
+                result.insert(0, cfg.id_col, chunk[cfg.id_col].to_numpy())
+            result.to_csv(out, header=(i == 0), index=False)
+            out.flush()
+
+            rows += len(chunk)
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f"chunk {i + 1}: {rows:,} rows | {rows / elapsed:,.0f} rows/s")
+
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_s": rows / seconds if seconds else 0.0}
+
+
+# ---------------- HTTP scoring ----------------
+
+class MicroBatcher:
+    """
+    Scores queued requests together in a background thread.
+
+    A batch is closed when it holds `max_batch_rows` rows or when
+    `max_wait_ms` have passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, model: object, max_batch_rows: int = 256, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_ms / 1000
+        _, self.categorical_cols = feature_columns(model)
+        self._queue: "queue.Queue[Tuple[List[Dict[str, object]], Future]]" = queue.Queue()
+        # Updated by the batching thread, read by /health handler threads
+        self._stats = {"requests": 0, "rows": 0, "batches": 0}
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: List[Dict[str, object]]) -> Future:
+        """Queues one request (a list of application records); the future resolves to its probabilities."""
+        future: Future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def score(self, records: List[Dict[str, object]], timeout: Optional[float] = 30.0) -> np.ndarray:
+        return self.submit(records).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch_rows"] = stats["rows"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _collect(self) -> List[Tuple[List[Dict[str, object]], Future]]:
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_s
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _score_records(self, records: List[Dict[str, object]]) -> np.ndarray:
+        return score_frame(self.model, pd.DataFrame.from_records(records), self.categorical_cols)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            sizes = [len(records) for records, _ in batch]
+            try:
+                proba = self._score_records([record for records, _ in batch for record in records])
+            except Exception:
+                # One bad request must not fail the others: score them one by one
+                for records, future in batch:
+                    try:
+                        future.set_result(self._score_records(records))
+                    except Exception as exc:
+                        future.set_exception(exc)
+            else:
+                offsets = np.cumsum([0] + sizes)
+                for (_, future), lo, hi in zip(batch, offsets[:-1], offsets[1:]):
+                    future.set_result(proba[lo:hi])
+
+            with self._stats_lock:
+                self._stats["requests"] += len(batch)
+                self._stats["rows"] += sum(sizes)
+                self._stats["batches"] += 1
+
+
+def parse_rows(payload: object) -> List[Dict[str, object]]:
+    """{"rows": [...]}, a list of records or a single record -> list of records."""
+    if isinstance(payload, dict) and "rows" in payload:
+        payload = payload["rows"]
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list) or not payload or not all(isinstance(r, dict) for r in payload):
+        raise ValueError('Expected a JSON object, a list of objects or {"rows": [...]}')
+    return payload
+
+
+def make_handler(batcher: MicroBatcher, threshold: float) -> type:
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict[str, object]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self._send(200, {"status": "ok", **batcher.stats()})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            # Every failure gets a JSON answer instead of a dropped connection
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                records = parse_rows(json.loads(self.rfile.read(length)))
+                proba = batcher.score(records)
+            except (ValueError, KeyError, TypeError) as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            except FutureTimeoutError:
+                self._send(503, {"error": "scoring timed out, try again later"})
+                return
+            except Exception as exc:
+                self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+                return
+            self._send(200, {
+                "probability": proba.tolist(),
+                "prediction": (proba >= threshold).astype(int).tolist(),
+                "threshold": threshold,
+            })
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return ScoringHandler
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # The default listen backlog (5) drops connections of concurrent clients
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_server(
+    model: object,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    threshold: float = 0.5,
+    max_batch_rows: int = 256,
+    max_wait_ms: float = 5.0,
+) -> ThreadingHTTPServer:
+    """HTTP server (not started) with POST /predict and GET /health."""
+    batcher = MicroBatcher(model, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+    server = ScoringServer((host, port), make_handler(batcher, threshold))
+    server.batcher = batcher
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default="models/loan_model.joblib", help="Exported model (file or artifact directory).")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Approval threshold on the probability (default: the artifact's tuned threshold, else 0.5).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Score a CSV file in chunks.")
+    batch.add_argument("--input", type=str, required=True)
+    batch.add_argument("--output", type=str, default="predictions.csv")
+    batch.add_argument("--chunksize", type=int, default=50_000)
+
+    serve = commands.add_parser("serve", help="Serve POST /predict over HTTP.")
+    serve.add_argument("--host", type=str, default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--max_batch_rows", type=int, default=256)
+    serve.add_argument("--max_wait_ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model, manifest = load_model(args.model)
+    threshold = args.threshold if args.threshold is not None else float(manifest.get("threshold", 0.5))
+    if args.command == "batch":
+        stats = score_csv(model, args.input, args.output, threshold=threshold, chunksize=args.chunksize)
+        print(f"\nScored {stats['rows']:,} rows in {stats['seconds']:.1f}s ({stats['rows_per_s']:,.0f} rows/s)")
+        print(f"Predictions written to: {Path(args.output).resolve()}")
+    else:
+        server = make_server(
+            model, args.host, args.port, threshold=threshold,
+            max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms,
+        )
+        print(f"Serving on http://{args.host}:{args.port} (POST /predict, GET /health)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+# Benchmark scripts for the Persian summarizer.
+# Run them from the group07 directory, e.g.:
+#   python -m benchmarks.bench_chunk_batching
@@ -0,0 +1,125 @@
+
+# bench_assisted.py
+# Assisted (draft-model) decoding versus plain greedy and 5-beam decoding
+# of the full model, on the direct inputs of the fixed benchmark corpus
+# and on the merged chunk summaries of its long texts (the final stage).
+#
+#   tokens/s      : generated tokens per second of generate time
+#   speedup       : assisted tokens/s over greedy tokens/s
+#   acceptance    : share of draft-proposed tokens accepted by the full model
+#   same output   : assisted summaries identical to greedy ones (expected 100%)
+#
+# Build the draft first (python build_draft_model.py), then run from the
+# group07 directory:
+#   python -m benchmarks.bench_assisted --modes short medium
+
+
+import argparse
+import time
+
+from model import get_tokenizer, get_model, get_draft_model, generate_summaries_from_ids, warm_up
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import get_direct_lengths
+from chunk_summarizer import chunk_document, get_chunk_lengths, summarize_chunks
+from decoding import get_profile
+from benchmarks.corpus import load_corpus
+
+
+class ForwardCounter:
+    """Counts forward calls of a module (one per decoding step)."""
+
+    def __init__(self, module):
+        self.calls = 0
+        self._handle = module.register_forward_hook(self._hook)
+
+    def _hook(self, module, inputs, output):
+        self.calls += 1
+
+    def reset(self):
+        self.calls = 0
+
+    def remove(self):
+        self._handle.remove()
+
+
+def final_inputs(mode, tokenizer):
+    """(token_ids, min_len, max_len) of every final pass over the corpus."""
+
+    inputs = []
+    for record in load_corpus():
+        doc = PreparedDocument(record["text"], tokenizer)
+        if is_long_text(doc, tokenizer):
+            # Final stage of the chunked path: the merged chunk summaries
+            (chunk_min, chunk_max), (final_min, final_max) = get_chunk_lengths(
+                mode, input_len=doc.num_tokens
+            )
+            merged = " ".join(summarize_chunks(chunk_document(doc), chunk_min, chunk_max))
+            inputs.append((tokenizer.encode(merged, add_special_tokens=False), final_min, final_max))
+        else:
+            min_len, max_len = get_direct_lengths(mode, min(doc.num_tokens, 512))
+            inputs.append((doc.token_ids, min_len, max_len))
+    return inputs
+
+
+def run_profile(inputs, profile, tokenizer):
+    """Returns (summaries, generated tokens, generate seconds)."""
+
+    summaries = []
+    tokens = 0
+    seconds = 0.0
+    for token_ids, min_len, max_len in inputs:
+        start = time.perf_counter()
+        summary = generate_summaries_from_ids(
+            [token_ids], min_len, max_len, decoding=get_profile(profile)
+        )[0]
+        seconds += time.perf_counter() - start
+        summaries.append(summary)
+        tokens += len(tokenizer.encode(summary, add_special_tokens=False))
+    return summaries, tokens, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", type=str, nargs="+", default=["short", "medium", "long"])
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    warm_up(background=False)
+    main_counter = ForwardCounter(get_model().decoder)
+    draft_counter = ForwardCounter(get_draft_model().decoder)
+
+    print(
+        f"{'mode':>6} | {'inputs':>6} | {'beam5 tok/s':>11} | {'greedy tok/s':>12} | "
+        f"{'assisted tok/s':>14} | {'speedup':>7} | {'acceptance':>10} | {'same output':>11}"
+    )
+    for mode in args.modes:
+        inputs = final_inputs(mode, tokenizer)
+
+        _, beam_tokens, beam_s = run_profile(inputs, "full_beam", tokenizer)
+        greedy, greedy_tokens, greedy_s = run_profile(inputs, "greedy", tokenizer)
+
+        main_counter.reset()
+        draft_counter.reset()
+        assisted, assisted_tokens, assisted_s = run_profile(inputs, "assisted", tokenizer)
+
+        # Every verification step keeps the accepted draft tokens plus one
+        # token of the full model itself
+        accepted = max(0, assisted_tokens - main_counter.calls)
+        acceptance = accepted / draft_counter.calls if draft_counter.calls else 0.0
+        same = sum(a == g for a, g in zip(assisted, greedy)) / len(inputs)
+
+        greedy_rate = greedy_tokens / greedy_s
+        assisted_rate = assisted_tokens / assisted_s
+        print(
+            f"{mode:>6} | {len(inputs):>6} | {beam_tokens / beam_s:>11.1f} | {greedy_rate:>12.1f} | "
+            f"{assisted_rate:>14.1f} | {assisted_rate / greedy_rate:>6.2f}x | "
+            f"{acceptance:>10.1%} | {same:>11.0%}"
+        )
+
+    main_counter.remove()
+    draft_counter.remove()
+
+
+if __name__ == "__main__":
+    main()
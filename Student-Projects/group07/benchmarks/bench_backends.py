@@ -0,0 +1,84 @@
+
+# bench_backends.py
+# Parity and performance of the inference backends in model.py
+# (torch / int8 / onnx) on a fixed Persian sample set.
+#
+# Each backend runs in its own subprocess so load time and peak RSS are
+# measured in isolation. ROUGE is computed against the "torch" backend
+# outputs, which serve as the baseline.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_backends --backends torch int8 onnx
+
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def run_worker(mode):
+    # Executed inside the subprocess; SUMMARIZER_BACKEND is already set
+    start = time.perf_counter()
+    from direct_summarizer import summarize_direct
+    from benchmarks.common import sample_set, peak_rss_mb
+    load_s = time.perf_counter() - start
+
+    summaries, latencies = [], []
+    for text in sample_set():
+        t0 = time.perf_counter()
+        summaries.append(summarize_direct(text, mode))
+        latencies.append(time.perf_counter() - t0)
+
+    json.dump({
+        "load_s": load_s,
+        "latencies": latencies,
+        "summaries": summaries,
+        "peak_rss_mb": peak_rss_mb(),
+    }, sys.stdout, ensure_ascii=False)
+
+
+def run_backend(backend, mode):
+    env = dict(os.environ, SUMMARIZER_BACKEND=backend)
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_backends", "--worker", "--mode", mode],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--mode", type=str, default="medium")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.mode)
+        return
+
+    from benchmarks.rouge import mean_rouge
+
+    results = {backend: run_backend(backend, args.mode) for backend in args.backends}
+    baseline = results.get("torch", results[args.backends[0]])["summaries"]
+
+    print(
+        f"{'backend':>8} | {'load s':>7} | {'mean ms':>8} | {'p95 ms':>7} | "
+        f"{'RSS MB':>7} | {'R-1':>5} | {'R-2':>5} | {'R-L':>5}"
+    )
+    for backend, res in results.items():
+        lat = sorted(res["latencies"])
+        scores = mean_rouge(res["summaries"], baseline)
+        print(
+            f"{backend:>8} | {res['load_s']:>7.2f} | "
+            f"{1000 * sum(lat) / len(lat):>8.1f} | {1000 * lat[int(0.95 * (len(lat) - 1))]:>7.1f} | "
+            f"{res['peak_rss_mb']:>7.0f} | {scores['rouge1']:>5.3f} | "
+            f"{scores['rouge2']:>5.3f} | {scores['rougeL']:>5.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
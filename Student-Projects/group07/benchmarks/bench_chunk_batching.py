@@ -0,0 +1,53 @@
+
+# bench_chunk_batching.py
+# Compares the original per-chunk generate loop (batch_size=1) with
+# the batched Stage 1 of chunk_summarizer, in documents per second.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_chunk_batching --repeat 3
+
+
+import argparse
+
+from model import get_tokenizer
+from document import PreparedDocument
+from chunk_summarizer import split_token_ids, get_chunk_lengths, summarize_chunks
+from benchmarks.common import make_document, tokens_for_chunks, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--mode", type=str, default="short")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    print(f"{'chunks':>6} | {'loop docs/s':>11} | {'batched docs/s':>14} | {'speedup':>7}")
+
+    for n_chunks in args.chunks:
+        text = make_document(tokens_for_chunks(n_chunks), tokenizer, seed=n_chunks)
+        doc = PreparedDocument(text, tokenizer)
+        chunks = split_token_ids(doc.token_ids)
+        (chunk_min, chunk_max), _ = get_chunk_lengths(
+            args.mode, input_len=doc.num_tokens
+        )
+
+        loop_s, _ = time_call(
+            summarize_chunks, chunks, chunk_min, chunk_max,
+            batch_size=1, use_cache=False, repeat=args.repeat
+        )
+        batched_s, _ = time_call(
+            summarize_chunks, chunks, chunk_min, chunk_max,
+            batch_size=args.batch_size, use_cache=False, repeat=args.repeat
+        )
+
+        print(
+            f"{len(chunks):>6} | {1 / loop_s:>11.3f} | "
+            f"{1 / batched_s:>14.3f} | {loop_s / batched_s:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
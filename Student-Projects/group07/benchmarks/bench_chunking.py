@@ -0,0 +1,57 @@
+
+# bench_chunking.py
+# Fixed 450/50 token windows versus sentence-aware chunking:
+# number of chunks (generate inputs), total chunk tokens and Stage 1 latency.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_chunking --tokens 2000 4000 8000
+
+
+import argparse
+
+from model import get_tokenizer
+from document import PreparedDocument
+from chunk_summarizer import (
+    split_token_ids,
+    chunk_document,
+    get_chunk_lengths,
+    summarize_chunks,
+)
+from benchmarks.common import make_document, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[2000, 4000, 8000])
+    parser.add_argument("--overlap", type=int, default=0, help="Sentence chunker overlap (tokens).")
+    parser.add_argument("--mode", type=str, default="short")
+    parser.add_argument("--no_generate", action="store_true", help="Only count chunks.")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    print(
+        f"{'tokens':>6} | {'chunker':>8} | {'chunks':>6} | "
+        f"{'chunk tokens':>12} | {'stage 1 s':>9}"
+    )
+
+    for n_tokens in args.tokens:
+        doc = PreparedDocument(make_document(n_tokens, tokenizer, seed=n_tokens), tokenizer)
+        (chunk_min, chunk_max), _ = get_chunk_lengths(args.mode, input_len=doc.num_tokens)
+
+        for name, chunks in [
+            ("window", split_token_ids(doc.token_ids)),
+            ("sentence", chunk_document(doc, overlap=args.overlap)),
+        ]:
+            seconds = float("nan")
+            if not args.no_generate:
+                seconds, _ = time_call(
+                    summarize_chunks, chunks, chunk_min, chunk_max, use_cache=False
+                )
+            print(
+                f"{doc.num_tokens:>6} | {name:>8} | {len(chunks):>6} | "
+                f"{sum(len(c) for c in chunks):>12} | {seconds:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+
+# bench_decoding.py
+# ROUGE versus latency for every decoding plan (intermediate, final profile).
+# The default plan (4-beam chunks, 5-beam final) is the baseline: the other
+# plans are scored against its summaries, since the sample texts have no
+# human references. Use the table to pick production defaults and to
+# update PROFILE_COST_MS in decoding.py.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_decoding --tokens 300 2000 4000 --mode short
+
+
+import argparse
+
+from model import get_tokenizer, warm_up
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import summarize_direct
+from chunk_summarizer import summarize_chunked
+from decoding import PLANS, DEFAULT_PLAN
+from summary_cache import chunk_cache
+from benchmarks.common import make_document, time_call
+from benchmarks.rouge import mean_rouge
+
+
+def summarize_with_plan(doc, mode, plan, tokenizer):
+    if is_long_text(doc, tokenizer):
+        return summarize_chunked(doc, mode, plan=plan)
+    # Direct texts only have a final pass
+    return summarize_direct(doc, mode, plan=plan)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[300, 2000, 4000])
+    parser.add_argument("--per_size", type=int, default=2, help="Documents per size.")
+    parser.add_argument("--mode", type=str, default="short")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    warm_up(background=False)
+
+    docs = [
+        PreparedDocument(make_document(n_tokens, tokenizer, seed=n_tokens + i), tokenizer)
+        for n_tokens in args.tokens
+        for i in range(args.per_size)
+    ]
+
+    results = {}
+    for plan in PLANS:
+        # Cached chunk summaries would hide the Stage 1 cost
+        chunk_cache.clear()
+        summaries = []
+        total_s = 0.0
+        for doc in docs:
+            seconds, summary = time_call(summarize_with_plan, doc, args.mode, plan, tokenizer)
+            total_s += seconds
+            summaries.append(summary)
+        results[plan] = (1000 * total_s / len(docs), summaries)
+
+    baseline_ms, baseline = results[DEFAULT_PLAN]
+    print(
+        f"{'chunks':>10} | {'final':>10} | {'ms/doc':>8} | {'speedup':>7} | "
+        f"{'R-1':>5} | {'R-2':>5} | {'R-L':>5}"
+    )
+    for plan, (ms, summaries) in results.items():
+        scores = mean_rouge(summaries, baseline)
+        print(
+            f"{plan[0]:>10} | {plan[1]:>10} | {ms:>8.0f} | {baseline_ms / ms:>6.2f}x | "
+            f"{scores['rouge1']:>5.3f} | {scores['rouge2']:>5.3f} | {scores['rougeL']:>5.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
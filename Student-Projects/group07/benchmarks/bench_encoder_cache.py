@@ -0,0 +1,107 @@
+
+# bench_encoder_cache.py
+# Milliseconds saved per mode switch by the encoder-output cache, on the
+# direct (short / medium) texts of the fixed benchmark corpus.
+#
+#   switch   : the text was summarized in `--first` mode, then is summarized
+#              in every other mode, with an empty encoder cache (cold) and
+#              with the states kept from the first request (cached)
+#   all modes: one summarize_direct call per mode versus a single
+#              summarize_direct_modes call decoding every mode in one batch
+#
+# The summary cache is not involved (summarize_direct does not use it), so
+# the difference is the encoder pass alone.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_encoder_cache --modes short medium long --profile full_beam
+
+
+import argparse
+
+from model import get_tokenizer, warm_up
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import summarize_direct, summarize_direct_modes
+from decoding import PLANS
+from encoder_cache import encoder_cache, ENCODER_CACHE_MAX_BYTES
+from benchmarks.common import time_call
+from benchmarks.corpus import load_corpus
+
+
+def direct_docs(tokenizer):
+    docs = []
+    for record in load_corpus():
+        doc = PreparedDocument(record["text"], tokenizer)
+        if not is_long_text(doc, tokenizer):
+            docs.append(doc)
+    return docs
+
+
+def time_switch(docs, first, mode, plan, cached, repeat):
+    """Mean ms of summarizing every doc in `mode` after `first`."""
+
+    total = 0.0
+    for doc in docs:
+        for _ in range(repeat):
+            encoder_cache.clear()
+            summarize_direct(doc, first, plan=plan)
+            if not cached:
+                encoder_cache.clear()
+            seconds, _ = time_call(summarize_direct, doc, mode, plan=plan)
+            total += seconds
+    return 1000 * total / (len(docs) * repeat)
+
+
+def time_all_modes(docs, modes, plan, batched, repeat):
+    """Mean ms of summarizing every doc in all `modes`, starting from an empty cache."""
+
+    total = 0.0
+    for doc in docs:
+        for _ in range(repeat):
+            encoder_cache.clear()
+            if batched:
+                seconds, _ = time_call(summarize_direct_modes, doc, modes, plan=plan)
+            else:
+                seconds, _ = time_call(lambda: [summarize_direct(doc, m, plan=plan) for m in modes])
+            total += seconds
+    return 1000 * total / (len(docs) * repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--first", type=str, default="medium", help="Mode of the first request.")
+    parser.add_argument("--modes", type=str, nargs="+", default=["short", "long", "auto"])
+    parser.add_argument("--profile", type=str, default="full_beam", help="Final decoding profile.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not encoder_cache.enabled:
+        encoder_cache.max_bytes = ENCODER_CACHE_MAX_BYTES or 64 * 1024 * 1024
+    plan = (PLANS[0][0], args.profile)
+
+    tokenizer = get_tokenizer()
+    warm_up(background=False)
+    docs = direct_docs(tokenizer)
+    print(f"{len(docs)} direct texts, first mode {args.first}, profile {args.profile}\n")
+
+    print(f"{'switch to':>9} | {'cold ms':>8} | {'cached ms':>9} | {'saved ms':>8} | {'saved':>6}")
+    for mode in args.modes:
+        cold = time_switch(docs, args.first, mode, plan, cached=False, repeat=args.repeat)
+        cached = time_switch(docs, args.first, mode, plan, cached=True, repeat=args.repeat)
+        print(
+            f"{mode:>9} | {cold:>8.1f} | {cached:>9.1f} | {cold - cached:>8.1f} | "
+            f"{(cold - cached) / cold:>6.1%}"
+        )
+
+    modes = [args.first] + [m for m in args.modes if m != args.first]
+    separate = time_all_modes(docs, modes, plan, batched=False, repeat=args.repeat)
+    batched = time_all_modes(docs, modes, plan, batched=True, repeat=args.repeat)
+    print(
+        f"\nall {len(modes)} modes: separate calls {separate:.1f} ms, "
+        f"one batched call {batched:.1f} ms ({separate / batched:.2f}x)"
+    )
+    print(f"encoder cache: {encoder_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+
+# bench_extractive.py
+# Full chunked summarization versus the extractive pre-filter at several
+# token budgets: chunks generated, latency and ROUGE against the full path
+# (the sample texts have no human references, so the full chunked summary
+# is the baseline).
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_extractive --tokens 4000 8000 --budgets 900 1800 2700
+
+
+import argparse
+
+from model import get_tokenizer, warm_up
+from document import PreparedDocument
+from chunk_summarizer import summarize_chunked, chunk_document
+from extractive import extract_top_sentences
+from summary_cache import chunk_cache
+from benchmarks.common import make_document, time_call
+from benchmarks.rouge import rouge_scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[4000, 8000])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[900, 1800, 2700])
+    parser.add_argument("--mode", type=str, default="medium")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    warm_up(background=False)
+
+    print(
+        f"{'tokens':>6} | {'budget':>6} | {'chunks':>6} | {'filter ms':>9} | "
+        f"{'total s':>7} | {'speedup':>7} | {'R-1':>5} | {'R-2':>5} | {'R-L':>5}"
+    )
+
+    for n_tokens in args.tokens:
+        doc = PreparedDocument(make_document(n_tokens, tokenizer, seed=n_tokens), tokenizer)
+
+        # Cached chunk summaries would hide the Stage 1 cost
+        chunk_cache.clear()
+        full_s, reference = time_call(summarize_chunked, doc, args.mode)
+        print(
+            f"{doc.num_tokens:>6} | {'full':>6} | {len(chunk_document(doc)):>6} | "
+            f"{0.0:>9.1f} | {full_s:>7.2f} | {1.0:>6.2f}x | "
+            f"{1.0:>5.3f} | {1.0:>5.3f} | {1.0:>5.3f}"
+        )
+
+        for budget in args.budgets:
+            filter_s, filtered = time_call(extract_top_sentences, doc, budget, repeat=10)
+            chunk_cache.clear()
+            total_s, summary = time_call(
+                summarize_chunked, doc, args.mode, extractive_budget=budget
+            )
+            scores = rouge_scores(summary, reference)
+            print(
+                f"{doc.num_tokens:>6} | {budget:>6} | {len(chunk_document(filtered)):>6} | "
+                f"{1000 * filter_s:>9.1f} | {total_s:>7.2f} | {full_s / total_s:>6.2f}x | "
+                f"{scores['rouge1']:>5.3f} | {scores['rouge2']:>5.3f} | {scores['rougeL']:>5.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
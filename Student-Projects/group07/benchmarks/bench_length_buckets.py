@@ -0,0 +1,114 @@
+
+# bench_length_buckets.py
+# Padded batches in arrival order versus length-bucketed batches with
+# per-item length targets, on a realistic mix of message lengths.
+#
+# Message lengths follow a log-normal distribution (most chat messages are
+# short, a few are close to the 450-token direct limit).
+#   arrival  : requests with the same (min_len, max_len) batched in arrival
+#              order, padded to the longest text of each batch
+#              ("auto" mode splits into many small groups)
+#   bucketed : 64/128/256/512 buckets, sorted by length, one batch may mix
+#              length targets
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_length_buckets --requests 64 --modes short auto
+
+
+import argparse
+import math
+import random
+
+from model import get_tokenizer, generate_summaries_from_ids, warm_up
+from document import PreparedDocument
+from direct_summarizer import get_direct_lengths
+from length_buckets import plan_batches, padding_stats
+from benchmarks.common import make_document, time_call
+
+
+def sample_lengths(n, median=120, sigma=0.7, low=20, high=450, seed=0):
+    rng = random.Random(seed)
+    return [
+        int(min(high, max(low, rng.lognormvariate(math.log(median), sigma))))
+        for _ in range(n)
+    ]
+
+
+def run_arrival(docs, lengths, batch_size):
+    # One generate call per micro-batch of each (min, max) group
+    groups = {}
+    for i, target in enumerate(lengths):
+        groups.setdefault(target, []).append(i)
+
+    summaries = [None] * len(docs)
+    for (min_len, max_len), indices in groups.items():
+        results = generate_summaries_from_ids(
+            [docs[i].token_ids for i in indices], min_len, max_len,
+            num_beams=5, batch_size=batch_size, buckets=None
+        )
+        for i, summary in zip(indices, results):
+            summaries[i] = summary
+    return summaries
+
+
+def run_bucketed(docs, lengths, batch_size):
+    return generate_summaries_from_ids(
+        [doc.token_ids for doc in docs],
+        [min_len for min_len, _ in lengths],
+        [max_len for _, max_len in lengths],
+        num_beams=5, batch_size=batch_size
+    )
+
+
+def arrival_batches(input_lens, lengths, batch_size):
+    groups = {}
+    for i, target in enumerate(lengths):
+        groups.setdefault(target, []).append(i)
+    batches = []
+    for indices in groups.values():
+        for batch in plan_batches([input_lens[i] for i in indices], batch_size, buckets=None):
+            batches.append([indices[j] for j in batch])
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--modes", type=str, nargs="+", default=["short", "auto"])
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--no_generate", action="store_true", help="Only report padding.")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    if not args.no_generate:
+        warm_up(background=False)
+
+    docs = [
+        PreparedDocument(make_document(n, tokenizer, seed=i), tokenizer)
+        for i, n in enumerate(sample_lengths(args.requests))
+    ]
+    input_lens = [min(doc.num_tokens, 512) for doc in docs]
+
+    print(
+        f"{'mode':>6} | {'layout':>8} | {'calls':>5} | {'padding eff.':>12} | "
+        f"{'seconds':>7} | {'docs/s':>6}"
+    )
+    for mode in args.modes:
+        lengths = [get_direct_lengths(mode, n) for n in input_lens]
+        layouts = [
+            ("arrival", arrival_batches(input_lens, lengths, args.batch_size), run_arrival),
+            ("bucketed", plan_batches(input_lens, args.batch_size), run_bucketed),
+        ]
+        for name, batches, fn in layouts:
+            real, padded = padding_stats(input_lens, batches)
+            seconds = float("nan")
+            if not args.no_generate:
+                seconds, _ = time_call(fn, docs, lengths, args.batch_size)
+            print(
+                f"{mode:>6} | {name:>8} | {len(batches):>5} | {real / padded:>12.1%} | "
+                f"{seconds:>7.2f} | {len(docs) / seconds:>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+
+# bench_mapreduce.py
+# Throughput of summarize_chunked (single process) versus the parallel
+# map-reduce summarizer with different worker counts, on a
+# multi-thousand-token Persian corpus.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_mapreduce --tokens 8000 --workers 1 2 4
+
+
+import argparse
+import time
+
+from model import get_tokenizer
+from document import PreparedDocument
+from chunk_summarizer import summarize_chunked
+from mapreduce_summarizer import MapReduceSummarizer
+from benchmarks.common import make_document
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=8000)
+    parser.add_argument("--docs", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", type=str, default="medium")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    corpus = [
+        PreparedDocument(make_document(args.tokens, tokenizer, seed=i), tokenizer)
+        for i in range(args.docs)
+    ]
+    total_tokens = sum(doc.num_tokens for doc in corpus)
+    print(f"corpus: {args.docs} docs, {total_tokens} tokens")
+    print(f"{'pipeline':>16} | {'seconds':>8} | {'tokens/s':>9} | {'docs/s':>7}")
+
+    def report(name, seconds):
+        print(f"{name:>16} | {seconds:>8.2f} | {total_tokens / seconds:>9.1f} | {args.docs / seconds:>7.3f}")
+
+    start = time.perf_counter()
+    for doc in corpus:
+        summarize_chunked(doc, args.mode)
+    report("chunked", time.perf_counter() - start)
+
+    for workers in args.workers:
+        with MapReduceSummarizer(workers=workers) as summarizer:
+            # Load the replicas before timing
+            summarizer.summarize(corpus[0].raw_text[:2000], args.mode)
+            start = time.perf_counter()
+            for doc in corpus:
+                summarizer.summarize(doc, args.mode)
+            report(f"mapreduce x{workers}", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+
+# bench_normalize.py
+# Throughput (MB/s) of the original normalizer versus the precompiled
+# one in preprocess.py (and its batch API), on a large Persian corpus.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_normalize --mb 50
+
+
+import argparse
+import re
+
+from preprocess import normalize_persian_text, normalize_persian_texts
+from benchmarks.common import make_text, time_call
+
+
+def legacy_normalize(text, remove_half_space=True, remove_symbols=True):
+    # The original implementation: six str.replace passes and two regexes
+    if remove_half_space:
+        text = text.replace('\u200c', ' ')
+    for src, tgt in {'ي': 'ی', 'ك': 'ک', 'ة': 'ه', 'ؤ': 'و', 'إ': 'ا', 'أ': 'ا'}.items():
+        text = text.replace(src, tgt)
+    if remove_symbols:
+        text = re.sub(r'[\"\'\(\)\[\]\{\}\*_,;:«»]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def make_corpus(target_mb, doc_sentences=40):
+    # Sample text with Arabic letters, symbols and irregular whitespace mixed in
+    noisy = lambda s: s.replace("ی", "ي").replace("ک", "ك").replace(" ", "  \u200c", 3) + " «نقل» (منبع)\n"
+    docs, size = [], 0
+    seed = 0
+    while size < target_mb * 1024 * 1024:
+        doc = noisy(make_text(doc_sentences, seed=seed))
+        docs.append(doc)
+        size += len(doc.encode("utf-8"))
+        seed += 1
+    return docs, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=20.0, help="Corpus size in MB.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    docs, size = make_corpus(args.mb)
+    mb = size / (1024 * 1024)
+    print(f"corpus: {len(docs)} docs, {mb:.1f} MB")
+
+    runs = [
+        ("legacy", lambda: [legacy_normalize(d) for d in docs]),
+        ("compiled", lambda: [normalize_persian_text(d) for d in docs]),
+        ("batch API", lambda: normalize_persian_texts(docs)),
+    ]
+
+    baseline = None
+    for name, fn in runs:
+        seconds, result = time_call(fn, repeat=args.repeat)
+        if baseline is None:
+            baseline = (seconds, result)
+        assert result == baseline[1], f"{name} output differs from legacy"
+        print(f"{name:>12}: {mb / seconds:8.1f} MB/s  ({baseline[0] / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
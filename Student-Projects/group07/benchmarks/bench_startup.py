@@ -0,0 +1,67 @@
+
+# bench_startup.py
+# Cold-start cost of the summarizer modules, measured in fresh interpreters:
+#   - import time of each module (lazy loading keeps these small)
+#   - time to first summary without warm-up
+#   - time to first summary when warm_up() starts at boot and the first
+#     request arrives `--delay` seconds later (typical for the bot)
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_startup --delay 5
+
+
+import argparse
+import subprocess
+import sys
+
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+FIRST_SUMMARY_SNIPPET = """
+import time
+start = time.perf_counter()
+import model
+from direct_summarizer import summarize_direct
+from benchmarks.common import make_text
+if {warm}:
+    model.warm_up(background=True)
+    time.sleep({delay})
+request_at = time.perf_counter()
+summarize_direct(make_text(6), "short")
+print(time.perf_counter() - request_at)
+"""
+
+
+def run_snippet(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=5.0,
+                        help="Seconds between bot start and the first request.")
+    args = parser.parse_args()
+
+    print("=== Cold import time ===")
+    for module in ["preprocess", "length_router", "direct_summarizer",
+                   "chunk_summarizer", "telegram_bot"]:
+        seconds = run_snippet(IMPORT_SNIPPET.format(module=module))
+        print(f"{module:>18}: {1000 * seconds:8.1f} ms")
+
+    print("\n=== Time to first summary (measured from the first request) ===")
+    cold = run_snippet(FIRST_SUMMARY_SNIPPET.format(warm=False, delay=0))
+    warm = run_snippet(FIRST_SUMMARY_SNIPPET.format(warm=True, delay=args.delay))
+    print(f"{'no warm-up':>18}: {cold:8.2f} s")
+    print(f"{'warm-up at boot':>18}: {warm:8.2f} s  (request {args.delay:.0f}s after boot)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+
+# bench_streaming.py
+# Perceived latency of streamed summaries: time to first progress update,
+# time to first summary token (TTFT) and total time, per input length.
+#
+# The final pass uses --profile (greedy by default: beam search cannot be
+# streamed, so a beam profile only shows the complete summary).
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_streaming --profile greedy
+
+
+import argparse
+import time
+
+from model import get_tokenizer
+from streaming import stream_summary, streaming_metrics
+from summary_cache import summary_cache
+from decoding import PLANS
+from benchmarks.common import make_document
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[150, 400, 1500, 4000])
+    parser.add_argument("--mode", type=str, default="medium")
+    parser.add_argument("--profile", type=str, default="greedy", help="Final decoding profile.")
+    args = parser.parse_args()
+    plan = (PLANS[0][0], args.profile)
+
+    tokenizer = get_tokenizer()
+    print(f"{'tokens':>6} | {'first update s':>14} | {'TTFT s':>7} | {'total s':>7}")
+
+    for n_tokens in args.tokens:
+        text = make_document(n_tokens, tokenizer, seed=n_tokens)
+        summary_cache.clear()
+
+        start = time.perf_counter()
+        first_update = ttft = None
+        for event, _ in stream_summary(text, args.mode, plan=plan):
+            now = time.perf_counter() - start
+            if first_update is None:
+                first_update = now
+            if event == "partial" and ttft is None:
+                ttft = now
+        total = time.perf_counter() - start
+
+        print(f"{n_tokens:>6} | {first_update:>14.3f} | {ttft or total:>7.3f} | {total:>7.3f}")
+
+    print("streaming metrics:", streaming_metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+
+# bench_tokenization.py
+# Tokenizer/normalizer time per request, before and after PreparedDocument.
+# No generate calls are made; only the text preparation work is timed.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.bench_tokenization --repeat 20
+
+
+import argparse
+
+from model import get_tokenizer, with_special_tokens
+from preprocess import normalize_persian_text
+from document import PreparedDocument
+from chunk_summarizer import chunk_document
+from benchmarks.common import make_document, time_call
+
+tokenizer = get_tokenizer()
+
+
+def prepare_legacy(text):
+    # Mirrors the original flow: router, total count, chunker and the
+    # Stage 1 loop each normalize/tokenize the text again
+    routed = normalize_persian_text(text)
+    is_long = len(tokenizer.encode(routed)) > 450
+    if not is_long:
+        return tokenizer(normalize_persian_text(text), return_tensors="pt",
+                         truncation=True, max_length=512)
+
+    text = normalize_persian_text(text)
+    tokens = tokenizer.encode(text)
+    total_tokens = len(tokenizer.encode(text))
+    chunks = []
+    for start in range(0, len(tokens), 400):
+        chunks.append(tokenizer.decode(tokens[start:start + 450], skip_special_tokens=True))
+    return total_tokens, [
+        tokenizer(chunk, return_tensors="pt", truncation=True, max_length=512)
+        for chunk in chunks
+    ]
+
+
+def prepare_single_pass(text):
+    doc = PreparedDocument(text, tokenizer)
+    if doc.num_tokens <= 450:
+        chunks = [doc.token_ids]
+    else:
+        chunks = chunk_document(doc)
+    batch = [with_special_tokens(tokenizer, ids) for ids in chunks]
+    return doc.num_tokens, tokenizer.pad({"input_ids": batch}, return_tensors="pt")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, nargs="+", default=[200, 1000, 4000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>6} | {'before ms':>9} | {'after ms':>8} | {'speedup':>7}")
+
+    for n_tokens in args.tokens:
+        text = make_document(n_tokens, tokenizer, seed=n_tokens)
+        before_s, _ = time_call(prepare_legacy, text, repeat=args.repeat)
+        after_s, _ = time_call(prepare_single_pass, text, repeat=args.repeat)
+        print(
+            f"{n_tokens:>6} | {1000 * before_s:>9.2f} | "
+            f"{1000 * after_s:>8.2f} | {before_s / after_s:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+
+# common.py
+# Shared helpers for the benchmark scripts:
+# a small Persian sample corpus, synthetic document builders and timers.
+
+
+import random
+import resource
+import sys
+import time
+
+
+# Short Persian sentences used to build synthetic documents of any length
+SAMPLE_SENTENCES = [
+    "هوش مصنوعی شاخه‌ای از علوم کامپیوتر است که به ساخت سامانه‌های هوشمند می‌پردازد.",
+    "پردازش زبان طبیعی به رایانه‌ها کمک می‌کند تا متن و گفتار انسان را درک کنند.",
+    "تهران پایتخت ایران و پرجمعیت‌ترین شهر این کشور است.",
+    "خلاصه‌سازی خودکار متن یکی از مسائل مهم در پردازش زبان فارسی به شمار می‌رود.",
+    "مدل‌های ترنسفورمر در سال‌های اخیر پیشرفت چشمگیری در ترجمه ماشینی داشته‌اند.",
+    "دانشگاه آزاد اسلامی واحد تهران مرکزی دانشکده‌های متعددی دارد.",
+    "یادگیری عمیق نیازمند داده‌های فراوان و توان پردازشی بالاست.",
+    "آیا می‌توان با داده‌های اندک مدلی دقیق برای زبان فارسی ساخت؟",
+    "رشد اقتصادی کشور در سال گذشته کمتر از پیش‌بینی کارشناسان بود.",
+    "تیم ملی فوتبال ایران در مسابقات مقدماتی جام جهانی به پیروزی رسید.",
+    "تغییرات اقلیمی باعث کاهش بارندگی در بسیاری از مناطق کشور شده است.",
+    "کتابخانه ملی ایران مجموعه‌ای ارزشمند از نسخه‌های خطی را نگهداری می‌کند.",
+]
+
+
+def make_text(n_sentences, seed=0):
+    """Build a deterministic Persian text from `n_sentences` sample sentences."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(n_sentences))
+
+
+def make_document(n_tokens, tokenizer, seed=0):
+    """Build a Persian text of roughly `n_tokens` tokens (whole sentences)."""
+    rng = random.Random(seed)
+    sentences, count = [], 0
+    while count < n_tokens:
+        sentence = rng.choice(SAMPLE_SENTENCES)
+        sentences.append(sentence)
+        count += len(tokenizer.encode(sentence, add_special_tokens=False))
+    return " ".join(sentences)
+
+
+def tokens_for_chunks(n_chunks, max_tokens=450, overlap=50):
+    """Token count that makes split_to_chunks produce exactly `n_chunks` chunks."""
+    return (max_tokens - overlap) * (n_chunks - 1) + max_tokens
+
+
+def time_call(fn, *args, repeat=1, **kwargs):
+    """Run fn `repeat` times and return (mean seconds, last result)."""
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def sample_set(sizes=(4, 8, 16, 30), per_size=2):
+    """Fixed list of Persian texts of increasing length (same on every run)."""
+    return [
+        make_text(n_sentences, seed=1000 * n_sentences + i)
+        for n_sentences in sizes
+        for i in range(per_size)
+    ]
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process, in MB (Linux/macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,52 @@
+
+# corpus.py
+# Fixed Persian benchmark corpus with reference summaries
+# (benchmarks/data/corpus_fa.jsonl).
+#
+# Short and medium records are single articles with a hand-written
+# reference. Long and very long records list the articles they are made of
+# ("parts"): their text is the articles one after another and their
+# reference is the articles' references in the same order.
+# very_long-02 (over 5k tokens, past the auto-mode length caps) uses every
+# article three times, in orders that never repeat a pair of neighbours,
+# so no two of its chunks are identical and the chunk cache cannot hit.
+
+
+import hashlib
+import json
+import os
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "corpus_fa.jsonl")
+
+# Length classes, from direct single-pass texts to multi-level chunked ones
+LENGTH_CLASSES = ("short", "medium", "long", "very_long")
+
+
+def load_corpus(path=CORPUS_PATH):
+    """
+    Returns a list of {"id", "length", "text", "reference"} dicts,
+    in file order, with composite records resolved.
+    """
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    by_id = {record["id"]: record for record in records}
+    corpus = []
+    for record in records:
+        if "parts" in record:
+            parts = [by_id[part] for part in record["parts"]]
+            record = dict(
+                record,
+                text="\n".join(part["text"] for part in parts),
+                reference=" ".join(part["reference"] for part in parts),
+            )
+        corpus.append({key: record[key] for key in ("id", "length", "text", "reference")})
+    return corpus
+
+
+def corpus_digest(path=CORPUS_PATH):
+    """SHA-256 of the corpus file, stored with results so runs on different corpora are not compared."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
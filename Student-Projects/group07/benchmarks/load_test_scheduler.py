@@ -0,0 +1,79 @@
+
+# load_test_scheduler.py
+# Simulates N concurrent bot users sending summarization requests
+# through the InferenceScheduler and reports latency, throughput and
+# scheduler metrics.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.load_test_scheduler --users 16 --requests 4
+
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from inference_scheduler import InferenceScheduler
+from benchmarks.common import make_text
+
+
+MODES = ["short", "medium", "long", "auto"]
+
+
+async def simulate_user(user_id, scheduler, n_requests, latencies, think_time):
+    rng = random.Random(user_id)
+    for i in range(n_requests):
+        # Mostly short messages with occasional long ones, like real chats
+        n_sentences = rng.choice([3, 5, 8, 12, 20, 60])
+        text = make_text(n_sentences, seed=user_id * 1000 + i)
+        mode = rng.choice(MODES)
+
+        start = time.perf_counter()
+        await scheduler.submit(text, mode)
+        latencies.append(time.perf_counter() - start)
+
+        await asyncio.sleep(rng.uniform(0, think_time))
+
+
+async def run(args):
+    scheduler = InferenceScheduler(
+        max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+    scheduler.start()
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(u, scheduler, args.requests, latencies, args.think_time)
+        for u in range(args.users)
+    ))
+    elapsed = time.perf_counter() - start
+    scheduler.stop()
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"users={args.users} requests={len(latencies)} elapsed={elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.3f} req/s")
+    print(
+        f"latency: p50={statistics.median(latencies):.3f}s "
+        f"p95={p95:.3f}s max={latencies[-1]:.3f}s"
+    )
+    print("scheduler metrics:")
+    for key, value in scheduler.metrics().items():
+        print(f"  {key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per user.")
+    parser.add_argument("--think_time", type=float, default=0.5, help="Max pause between requests (s).")
+    parser.add_argument("--max_batch_size", type=int, default=8)
+    parser.add_argument("--max_wait_ms", type=float, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+
+# make_tiny_model.py
+# Builds a tiny, randomly-initialized bert2bert model for offline runs of
+# the regression suite (no download, seconds on a CI runner).
+#
+# The WordPiece vocabulary is built from the benchmark corpus (whole words
+# plus single characters, so any Persian text still tokenizes), and the
+# encoder/decoder are 2-layer BERTs with the real model's 512-token window.
+# Summaries are meaningless, but every pipeline path (routing, chunking,
+# batching, reduce levels, beam search) runs exactly as with the real model.
+#
+# Run from the group07 directory:
+#   python -m benchmarks.make_tiny_model --out benchmarks/tiny_model
+
+
+import argparse
+import os
+
+from preprocess import normalize_persian_text
+from benchmarks.corpus import load_corpus
+
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_vocab(texts):
+    """Special tokens, single characters (with ## continuations) and whole words."""
+
+    # Same whitespace/punctuation split as the BERT tokenizer
+    from tokenizers.pre_tokenizers import BertPreTokenizer
+
+    pre_tokenizer = BertPreTokenizer()
+    words = set()
+    chars = set()
+    for text in texts:
+        for word, _ in pre_tokenizer.pre_tokenize_str(normalize_persian_text(text)):
+            words.add(word)
+            chars.update(word)
+
+    chars = sorted(chars)
+    return SPECIAL_TOKENS + chars + ["##" + c for c in chars] + sorted(words - set(chars))
+
+
+def build_model(tokenizer, hidden_size=64, num_layers=2, seed=0):
+    import torch
+    from transformers import BertConfig, EncoderDecoderConfig, EncoderDecoderModel
+
+    torch.manual_seed(seed)
+    sizes = dict(
+        vocab_size=len(tokenizer),
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        intermediate_size=4 * hidden_size,
+        max_position_embeddings=512,
+    )
+    config = EncoderDecoderConfig.from_encoder_decoder_configs(
+        BertConfig(**sizes),
+        BertConfig(**sizes, is_decoder=True, add_cross_attention=True),
+    )
+    # Same special-token layout as bert2bert-fa-wiki-summary
+    config.decoder_start_token_id = tokenizer.cls_token_id
+    config.pad_token_id = tokenizer.pad_token_id
+    config.eos_token_id = tokenizer.sep_token_id
+    model = EncoderDecoderModel(config=config).eval()
+
+    # Random weights favour the special tokens (tied embeddings echo the
+    # decoder start token); without them summaries have realistic lengths
+    model.generation_config.suppress_tokens = [
+        tokenizer.convert_tokens_to_ids(token) for token in SPECIAL_TOKENS if token != "[SEP]"
+    ]
+    return model
+
+
+def make_tiny_model(out_dir, hidden_size=64, num_layers=2, seed=0):
+    from transformers import BertTokenizerFast
+
+    os.makedirs(out_dir, exist_ok=True)
+    vocab_path = os.path.join(out_dir, "vocab.txt")
+    corpus = load_corpus()
+    texts = [record["text"] for record in corpus] + [record["reference"] for record in corpus]
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(build_vocab(texts)) + "\n")
+
+    # Positional: the argument is vocab_file in transformers 4 and vocab in 5
+    tokenizer = BertTokenizerFast(vocab_path, do_lower_case=False)
+    tokenizer.save_pretrained(out_dir)
+    build_model(tokenizer, hidden_size, num_layers, seed).save_pretrained(out_dir)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=str, default="benchmarks/tiny_model")
+    parser.add_argument("--hidden_size", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out_dir = make_tiny_model(args.out, args.hidden_size, args.layers, args.seed)
+    print(f"Tiny model written to {out_dir}; use it with SUMMARIZER_MODEL={out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+
+# regression_suite.py
+# Reproducible benchmark and latency regression gate for the summarizer.
+#
+# The fixed corpus (benchmarks/data/corpus_fa.jsonl: short, medium, long
+# and very long Persian texts with reference summaries) goes through the
+# same routing as the bot, in all four modes. For every (length, mode)
+# cell the suite records the latency distribution, throughput, generate
+# calls and ROUGE against the references; peak RSS is recorded per run.
+# Results are written as JSON, so two runs can be diffed.
+#
+# With --baseline, the run fails (exit code 1) when the p50 or p95 latency
+# of any cell is more than --max_regression slower than in the baseline.
+# Baselines are machine-specific: record them on the same runner.
+#
+# Offline / CI, with a tiny random model (see make_tiny_model.py):
+#   python -m benchmarks.make_tiny_model --out benchmarks/tiny_model
+#   python -m benchmarks.regression_suite --model benchmarks/tiny_model --out base.json
+#   python -m benchmarks.regression_suite --model benchmarks/tiny_model --out new.json \
+#       --baseline base.json --max_regression 0.2
+#
+# Real model:
+#   python -m benchmarks.regression_suite --out results.json
+#
+# Compare two saved result files without running:
+#   python -m benchmarks.regression_suite --check new.json --baseline base.json
+
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.common import peak_rss_mb
+from benchmarks.corpus import load_corpus, corpus_digest, LENGTH_CLASSES
+from benchmarks.rouge import mean_rouge
+
+
+MODES = ("short", "medium", "long", "auto")
+
+# Latency statistics compared by the regression gate
+GATED_STATS = ("p50_ms", "p95_ms")
+
+
+# ---------- Running ----------
+
+def summarize(text, mode):
+    """Same routing as the bot: normalize/tokenize once, then direct or chunked."""
+
+    from model import get_tokenizer
+    from document import PreparedDocument
+    from length_router import is_long_text
+    from direct_summarizer import summarize_direct
+    from chunk_summarizer import summarize_chunked
+
+    tokenizer = get_tokenizer()
+    doc = PreparedDocument(text, tokenizer)
+    if is_long_text(doc, tokenizer):
+        return summarize_chunked(doc, mode)
+    return summarize_direct(doc, mode)
+
+
+def latency_stats(seconds):
+    ms = 1000 * np.asarray(seconds)
+    return {
+        "n": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def run_cell(records, mode, repeat):
+    """
+    Summarizes every record `repeat` times (after one untimed warm-up
+    run, whose summary is scored) and returns the cell's results.
+    """
+
+    from model import get_tokenizer
+    from summary_cache import chunk_cache
+    from metrics import registry
+
+    tokenizer = get_tokenizer()
+    summaries = []
+    seconds = []
+    calls_before = registry.counter_value("summarizer_generate_calls_total")
+    for record in records:
+        summaries.append(summarize(record["text"], mode))
+        for _ in range(repeat):
+            # Cached chunk summaries would hide the Stage 1 cost
+            chunk_cache.clear()
+            start = time.perf_counter()
+            summarize(record["text"], mode)
+            seconds.append(time.perf_counter() - start)
+    calls = registry.counter_value("summarizer_generate_calls_total") - calls_before
+
+    total_s = sum(seconds)
+    input_tokens = repeat * sum(len(tokenizer.encode(record["text"])) for record in records)
+    return {
+        "docs": len(records),
+        "latency": latency_stats(seconds),
+        "docs_per_s": len(seconds) / total_s,
+        "tokens_per_s": input_tokens / total_s,
+        "generate_calls_per_doc": calls / (len(records) * (repeat + 1)),
+        "rouge": mean_rouge(summaries, [record["reference"] for record in records]),
+    }
+
+
+def run_meta(args):
+    from model import MODEL_NAME, BACKEND
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "model": MODEL_NAME,
+        "backend": BACKEND,
+        "corpus_sha256": corpus_digest(),
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import torch
+        meta["torch"] = torch.__version__
+        meta["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return meta
+
+
+def run_suite(args):
+    from model import warm_up
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    rss_before_mb = peak_rss_mb()
+    load_start = time.perf_counter()
+    warm_up(background=False)
+    load_s = time.perf_counter() - load_start
+    rss_model_mb = peak_rss_mb()
+
+    corpus = [record for record in load_corpus() if record["length"] in args.lengths]
+    results = {
+        "meta": run_meta(args),
+        "load_s": load_s,
+        "rss_mb": {"before_model": rss_before_mb, "after_model": rss_model_mb},
+        "cells": {},
+    }
+
+    for length in args.lengths:
+        records = [record for record in corpus if record["length"] == length]
+        if not records:
+            continue
+        for mode in args.modes:
+            cell = run_cell(records, mode, args.repeat)
+            results["cells"][f"{length}/{mode}"] = cell
+            print(format_cell(f"{length}/{mode}", cell), flush=True)
+
+    # ru_maxrss is a high-water mark for the whole run
+    results["rss_mb"]["peak"] = peak_rss_mb()
+    return results
+
+
+# ---------- Reporting and gating ----------
+
+def format_cell(name, cell):
+    latency = cell["latency"]
+    return (
+        f"{name:<18} | p50 {latency['p50_ms']:>9.1f} ms | p95 {latency['p95_ms']:>9.1f} ms | "
+        f"{cell['docs_per_s']:>6.2f} docs/s | {cell['tokens_per_s']:>7.0f} tok/s | "
+        f"R-1 {cell['rouge']['rouge1']:.3f} R-L {cell['rouge']['rougeL']:.3f}"
+    )
+
+
+def compare_results(baseline, current, max_regression=0.2, min_delta_ms=5.0):
+    """
+    Latency regressions of `current` against `baseline`.
+
+    A gated statistic regresses when it is more than `max_regression`
+    (a fraction) slower than the baseline and at least `min_delta_ms`
+    slower in absolute terms (so noise on very fast cells is ignored).
+
+    Returns
+    -------
+    list of str
+        One line per regression; empty if the gate passes.
+    """
+
+    regressions = []
+    for name, cell in current["cells"].items():
+        base_cell = baseline["cells"].get(name)
+        if base_cell is None:
+            continue
+        for stat in GATED_STATS:
+            base = base_cell["latency"][stat]
+            new = cell["latency"][stat]
+            if new > base * (1 + max_regression) and new - base >= min_delta_ms:
+                regressions.append(
+                    f"{name} {stat}: {base:.1f} -> {new:.1f} ms ({new / base - 1:+.0%})"
+                )
+    return regressions
+
+
+def print_diff(baseline, current):
+    for key in ("model", "backend", "corpus_sha256"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"Warning: {key} differs from the baseline "
+                  f"({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    print(f"{'cell':<18} | {'p50 base':>9} | {'p50 new':>9} | {'delta':>6} | "
+          f"{'p95 base':>9} | {'p95 new':>9} | {'delta':>6} | {'R-1 delta':>9}")
+    for name, cell in current["cells"].items():
+        base_cell = baseline["cells"].get(name)
+        if base_cell is None:
+            continue
+        base, new = base_cell["latency"], cell["latency"]
+        print(
+            f"{name:<18} | {base['p50_ms']:>9.1f} | {new['p50_ms']:>9.1f} | "
+            f"{new['p50_ms'] / base['p50_ms'] - 1:>+6.0%} | "
+            f"{base['p95_ms']:>9.1f} | {new['p95_ms']:>9.1f} | "
+            f"{new['p95_ms'] / base['p95_ms'] - 1:>+6.0%} | "
+            f"{cell['rouge']['rouge1'] - base_cell['rouge']['rouge1']:>+9.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, default=None,
+                        help="Model id or directory (e.g. benchmarks/tiny_model); default: the bot's model.")
+    parser.add_argument("--out", type=str, default=None, help="Write results to this JSON file.")
+    parser.add_argument("--baseline", type=str, default=None, help="Results JSON to gate against.")
+    parser.add_argument("--check", type=str, default=None,
+                        help="Compare this results JSON with --baseline instead of running.")
+    parser.add_argument("--max_regression", type=float, default=0.2,
+                        help="Allowed latency increase as a fraction (0.2 = 20%%).")
+    parser.add_argument("--min_delta_ms", type=float, default=5.0,
+                        help="Smaller absolute increases never fail the gate.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per document.")
+    parser.add_argument("--modes", type=str, nargs="+", default=list(MODES))
+    parser.add_argument("--lengths", type=str, nargs="+", default=list(LENGTH_CLASSES))
+    parser.add_argument("--threads", type=int, default=None, help="torch threads (fixed for stable CI numbers).")
+    args = parser.parse_args()
+
+    if args.check:
+        if not args.baseline:
+            parser.error("--check needs --baseline")
+        with open(args.check, encoding="utf-8") as f:
+            results = json.load(f)
+    else:
+        # Must be set before model.py is imported (MODEL_NAME is read at import)
+        if args.model:
+            os.environ["SUMMARIZER_MODEL"] = args.model
+        results = run_suite(args)
+        print(f"Peak RSS: {results['rss_mb']['peak']:.0f} MB (model load {results['load_s']:.1f} s)")
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print_diff(baseline, results)
+        regressions = compare_results(baseline, results, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"Latency regressions (> {args.max_regression:.0%}):")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("No latency regressions.")
+
+
+if __name__ == "__main__":
+    main()
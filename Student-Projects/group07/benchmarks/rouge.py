@@ -0,0 +1,67 @@
+
+# rouge.py
+# Minimal ROUGE-1 / ROUGE-2 / ROUGE-L (F1) for Persian text.
+# Whitespace tokenization over normalized text, so no extra dependency
+# (the rouge_score package only tokenizes Latin characters by default).
+
+
+from preprocess import normalize_persian_text
+
+
+def _tokens(text):
+    return normalize_persian_text(text).split()
+
+
+def _ngrams(tokens, n):
+    counts = {}
+    for i in range(len(tokens) - n + 1):
+        gram = tuple(tokens[i:i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _f1(overlap, n_pred, n_ref):
+    if n_pred == 0 or n_ref == 0 or overlap == 0:
+        return 0.0
+    precision = overlap / n_pred
+    recall = overlap / n_ref
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(prediction, reference, n):
+    pred = _ngrams(_tokens(prediction), n)
+    ref = _ngrams(_tokens(reference), n)
+    overlap = sum(min(count, ref.get(gram, 0)) for gram, count in pred.items())
+    return _f1(overlap, sum(pred.values()), sum(ref.values()))
+
+
+def rouge_l(prediction, reference):
+    pred, ref = _tokens(prediction), _tokens(reference)
+    # Longest common subsequence, O(len(pred) * len(ref)) with one row of memory
+    row = [0] * (len(ref) + 1)
+    for p in pred:
+        prev = 0
+        for j, r in enumerate(ref, start=1):
+            current = row[j]
+            row[j] = prev + 1 if p == r else max(row[j], row[j - 1])
+            prev = current
+    return _f1(row[-1], len(pred), len(ref))
+
+
+def rouge_scores(prediction, reference):
+    """Returns {"rouge1", "rouge2", "rougeL"} F1 scores."""
+    return {
+        "rouge1": rouge_n(prediction, reference, 1),
+        "rouge2": rouge_n(prediction, reference, 2),
+        "rougeL": rouge_l(prediction, reference),
+    }
+
+
+def mean_rouge(predictions, references):
+    """Average ROUGE scores over aligned prediction/reference lists."""
+    totals = {"rouge1": 0.0, "rouge2": 0.0, "rougeL": 0.0}
+    for prediction, reference in zip(predictions, references):
+        for key, value in rouge_scores(prediction, reference).items():
+            totals[key] += value
+    n = max(len(predictions), 1)
+    return {key: value / n for key, value in totals.items()}
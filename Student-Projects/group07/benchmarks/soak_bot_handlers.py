@@ -0,0 +1,131 @@
+
+# soak_bot_handlers.py
+# Soak test of the bot's handle_mode under many concurrent chats.
+#
+# Each simulated chat clicks a mode button with a fake callback query
+# (no Telegram connection) and the full handler runs: admission control,
+# summarization, history write. Reported:
+#   - handler latency p50/p99 (admitted requests)
+#   - event loop lag p50/p99/max: how late a 10 ms heartbeat wakes up,
+#     i.e. how long the handlers block every other chat
+#   - back-pressure rejections
+#
+# Run from the group07 directory:
+#   python -m benchmarks.soak_bot_handlers --chats 50 --requests 4
+
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import make_text
+
+
+MODES = ["short", "medium", "long", "auto"]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else float("nan")
+
+
+def fake_callback(user_id, mode, text):
+    # Just enough of Update / CallbackQuery / Context for handle_mode
+    async def noop(*args, **kwargs):
+        return None
+
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    query = SimpleNamespace(
+        data=f"mode_{mode}",
+        from_user=SimpleNamespace(id=user_id),
+        message=SimpleNamespace(reply_text=reply_text),
+        answer=noop,
+        edit_message_text=noop,
+    )
+    update = SimpleNamespace(callback_query=query)
+    context = SimpleNamespace(user_data={"current_text": text})
+    return update, context, replies
+
+
+async def heartbeat(lags, stop, interval=0.01):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def simulate_chat(bot, user_id, n_requests, think_time, latencies, rejected):
+    rng = random.Random(user_id)
+    for i in range(n_requests):
+        text = make_text(rng.choice([3, 5, 8, 12, 20, 60]), seed=user_id * 1000 + i)
+        update, context, replies = fake_callback(user_id, rng.choice(MODES), text)
+
+        start = time.perf_counter()
+        await bot.handle_mode(update, context)
+        if replies:
+            # Back-pressure reply instead of a summary
+            rejected.append(replies[-1])
+        else:
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.sleep(rng.uniform(0, think_time))
+
+
+async def run(args):
+    # Keep the soak history out of the bot's real database
+    os.environ.setdefault("HISTORY_DB", os.path.join(tempfile.mkdtemp(), "history.db"))
+    import telegram_bot as bot
+
+    bot.STREAMING = args.streaming
+    bot.execution.max_pending = args.max_pending
+    bot.execution.cpu_workers = args.cpu_workers
+    await bot.start_scheduler(None)
+
+    latencies, rejected, lags = [], [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_chat(bot, u, args.requests, args.think_time, latencies, rejected)
+        for u in range(args.chats)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    await bot.stop_scheduler(None)
+
+    print(f"chats={args.chats} completed={len(latencies)} rejected={len(rejected)} "
+          f"elapsed={elapsed:.2f}s")
+    print(f"handler latency: p50={percentile(latencies, 0.5):.3f}s "
+          f"p99={percentile(latencies, 0.99):.3f}s")
+    print(f"event loop lag:  p50={1000 * percentile(lags, 0.5):.1f}ms "
+          f"p99={1000 * percentile(lags, 0.99):.1f}ms max={1000 * max(lags, default=0):.1f}ms")
+    print("execution metrics:")
+    for key, value in bot.execution.metrics().items():
+        print(f"  {key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per chat.")
+    parser.add_argument("--think_time", type=float, default=1.0, help="Max pause between requests (s).")
+    parser.add_argument("--max_pending", type=int, default=32)
+    parser.add_argument("--cpu_workers", type=int, default=0)
+    parser.add_argument("--streaming", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
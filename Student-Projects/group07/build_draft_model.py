@@ -0,0 +1,70 @@
+# build_draft_model.py
+# Builds the draft model for assisted decoding (the "assisted" decoding
+# profile) from the existing checkpoint, by dropping decoder layers.
+#
+# The draft keeps the full encoder and the embeddings / LM head of the
+# main model, plus a few evenly spaced decoder layers (first and last
+# included). Sharing the tokenizer and encoder means the draft reads the
+# same encoder states as the main model, and its proposals stay close
+# enough to be accepted often; no training is needed.
+#
+# Usage:
+#   python build_draft_model.py --out draft_model --decoder_layers 3
+#   SUMMARIZER_ASSISTED=1 python telegram_bot.py
+
+
+import argparse
+
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from model import MODEL_NAME
+
+
+def select_layers(n_layers, keep):
+    """`keep` evenly spaced layer indices out of n_layers, first and last included."""
+    if keep >= n_layers:
+        return list(range(n_layers))
+    if keep == 1:
+        return [n_layers - 1]
+    return sorted({round(i * (n_layers - 1) / (keep - 1)) for i in range(keep)})
+
+
+def build_draft(out_dir, model_name=MODEL_NAME, decoder_layers=3):
+    import torch
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+    # bert2bert decoder: BertLMHeadModel -> bert.encoder.layer (self- and cross-attention blocks)
+    layers = model.decoder.bert.encoder.layer
+    keep = select_layers(len(layers), decoder_layers)
+    model.decoder.bert.encoder.layer = torch.nn.ModuleList(layers[i] for i in keep)
+    model.config.decoder.num_hidden_layers = len(keep)
+
+    # Newer transformers versions index the KV-cache by layer position
+    for new_index, layer in enumerate(model.decoder.bert.encoder.layer):
+        for module in layer.modules():
+            if hasattr(module, "layer_idx"):
+                module.layer_idx = new_index
+
+    # Tells model.py that encoder states can be shared with the main model
+    model.config.draft_shares_encoder = True
+    model.config.draft_decoder_layers = keep
+
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+    return keep
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=str, default="draft_model", help="Output directory.")
+    parser.add_argument("--model", type=str, default=MODEL_NAME, help="Hugging Face model id.")
+    parser.add_argument("--decoder_layers", type=int, default=3, help="Decoder layers kept in the draft.")
+    args = parser.parse_args()
+
+    keep = build_draft(args.out, args.model, args.decoder_layers)
+    print(f"Saved draft model (decoder layers {keep}) to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,26 +7,34 @@
 #   2) Re-summarize merged chunk summaries
 
 
-from model import tokenizer, model
-from preprocess import normalize_persian_text
+from model import (
+    get_tokenizer,
+    generate_summaries_from_ids,
+    DEFAULT_BATCH_SIZE,
+)
+from document import PreparedDocument
+from summary_cache import chunk_cache, make_key, hash_token_ids
+from decoding import get_profile, select_plan
+from extractive import extract_top_sentences
+from metrics import request_span, stage_timer, inc, record_cache_lookup
+from functools import partial
 import math
 
 
-# Split text into overlapping token chunks
-def split_to_chunks(text, max_tokens=450, overlap=50):
-    # Tokenize full text
-    tokens = tokenizer.encode(text)
+# Split token IDs into overlapping windows
+def split_token_ids(token_ids, max_tokens=450, overlap=50):
+    """
+    Returns a list of token-ID chunks (without special tokens).
+    The chunks are fed to the model as IDs, with no decode/re-encode.
+    """
+
     chunks = []
 
     # Sliding window over tokens
     start = 0
-    while start < len(tokens):
+    while start < len(token_ids):
         end = start + max_tokens
-        chunk_tokens = tokens[start:end]
-
-        # Decode tokens back to text for the model
-        chunk_text = tokenizer.decode(chunk_tokens, skip_special_tokens=True)
-        chunks.append(chunk_text)
+        chunks.append(token_ids[start:end])
 
         # Move window with overlap
         start += max_tokens - overlap
@@ -34,6 +42,89 @@ def split_to_chunks(text, max_tokens=450, overlap=50):
     return chunks
 
 
+# Pack whole sentences into chunks using the document's boundary index
+def split_sentence_chunks(token_ids, sentence_ends, max_tokens=450, overlap=0):
+    """
+    Greedily packs whole sentences into chunks of at most max_tokens.
+
+    Parameters
+    ----------
+    token_ids : list of int
+        Token IDs of the document (without special tokens).
+    sentence_ends : list of int
+        Token offset just past the end of each sentence
+        (PreparedDocument.sentence_ends).
+    max_tokens : int, optional (default=450)
+        Token budget of one chunk.
+    overlap : int, optional (default=0)
+        Up to this many tokens of trailing whole sentences are repeated at
+        the start of the next chunk. 0 disables overlap.
+
+    A single sentence longer than max_tokens is split with the sliding window.
+    """
+
+    chunks = []
+    # Sentence spans as (start, end) token offsets
+    spans = list(zip([0] + sentence_ends[:-1], sentence_ends))
+
+    i = 0
+    while i < len(spans):
+        start, end = spans[i]
+
+        if end - start > max_tokens:
+            # Oversized sentence: fall back to fixed windows inside it
+            chunks.extend(split_token_ids(token_ids[start:end], max_tokens, overlap=0))
+            i += 1
+            continue
+
+        # Add sentences while the chunk stays within budget
+        j = i
+        while j + 1 < len(spans) and spans[j + 1][1] - start <= max_tokens:
+            j += 1
+        chunks.append(token_ids[start:spans[j][1]])
+
+        if j + 1 >= len(spans):
+            break
+
+        # Step back over trailing sentences that fit in the overlap budget,
+        # as long as the next chunk can still reach a new sentence.
+        # Always advance by at least one sentence.
+        next_i = j + 1
+        while (
+            next_i - 1 > i
+            and spans[j][1] - spans[next_i - 1][0] <= overlap
+            and spans[j + 1][1] - spans[next_i - 1][0] <= max_tokens
+        ):
+            next_i -= 1
+        i = next_i
+
+    return chunks
+
+
+# Chunking used by the summarization pipelines
+def chunk_document(doc, max_tokens=450, overlap=0):
+    """Sentence-aware chunks (token-ID lists) of a PreparedDocument."""
+    return split_sentence_chunks(doc.token_ids, doc.sentence_ends, max_tokens, overlap)
+
+
+# Split text into overlapping token chunks
+def split_to_chunks(text, max_tokens=450, overlap=50):
+    # Text-level wrapper around split_token_ids for callers that need strings
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text, add_special_tokens=False)
+    return [
+        tokenizer.decode(chunk_tokens, skip_special_tokens=True)
+        for chunk_tokens in split_token_ids(tokens, max_tokens, overlap)
+    ]
+
+
+# Generated summaries are capped so that at least two fit in one group
+MAX_SUMMARY_TOKENS = 200
+
+# The final summary may not exceed the model's 512-token window
+MAX_FINAL_TOKENS = 512
+
+
 # Output length controller for different modes
 def get_chunk_lengths(mode, input_len=None):
     """
@@ -62,77 +153,207 @@ def get_chunk_lengths(mode, input_len=None):
         chunk_max = max(80, int(final_max / 2))
         chunk_min = max(40, int(chunk_max * 0.6))
 
+        # Cap the scaled lengths so long inputs stay within the model window
+        # and the reduce levels always merge several summaries
+        chunk_max = min(chunk_max, MAX_SUMMARY_TOKENS)
+        chunk_min = min(chunk_min, chunk_max)
+        final_max = min(final_max, MAX_FINAL_TOKENS)
+        final_min = min(final_min, final_max)
+
         return (chunk_min, chunk_max), (final_min, final_max)
 
     else:
         raise ValueError("Invalid mode")
 
 
-# Two-stage chunk-based summarization
+# Stage 1 helper: summarize a list of chunks
+def summarize_chunks(chunks, chunk_min, chunk_max, batch_size=DEFAULT_BATCH_SIZE,
+                     use_cache=True, profile="beam"):
+    """
+    Returns one summary per chunk, in the same order as `chunks`.
+    `chunks` are token-ID lists as returned by chunk_document.
+
+    Chunks are padded into micro-batches of `batch_size` and each
+    micro-batch runs a single generate call.
+    batch_size=1 is the original per-chunk loop.
+
+    With use_cache=True, chunk summaries are looked up in chunk_cache
+    first and only the missing chunks are generated.
 
-def summarize_chunked(text, mode):
+    profile names the decoding profile (see decoding.py); the default
+    "beam" is the original 4-beam search.
     """
-    Stage 1: Summarize each chunk separately
-    Stage 2: Summarize all chunk summaries into final output
 
+    decoding = get_profile(profile)
+    summaries = [None] * len(chunks)
+    keys = [None] * len(chunks)
+
+    if use_cache:
+        for i, chunk in enumerate(chunks):
+            keys[i] = make_key(
+                "chunk", hash_token_ids(chunk), chunk_min, chunk_max, profile
+            )
+            summaries[i] = chunk_cache.get(keys[i])
+            record_cache_lookup("chunk", summaries[i] is not None)
+
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if missing:
+        generated = generate_summaries_from_ids(
+            [chunks[i] for i in missing],
+            min_length=chunk_min,
+            max_length=chunk_max,
+            batch_size=batch_size,
+            decoding=decoding
+        )
+        for i, summary in zip(missing, generated):
+            summaries[i] = summary
+            if use_cache:
+                chunk_cache.put(keys[i], summary)
+
+    return summaries
+
+
+# Group consecutive token sequences so each group fits in one model input
+def pack_groups(token_id_lists, max_tokens=450):
+    """
+    Greedily concatenates consecutive sequences while the group stays
+    within max_tokens. Returns a list of token-ID lists.
     """
 
-    # Normalize Persian text
-    text = normalize_persian_text(text)
+    groups = []
+    current = []
+    for ids in token_id_lists:
+        if current and len(current) + len(ids) > max_tokens:
+            groups.append(current)
+            current = []
+        current = current + list(ids)
+    if current:
+        groups.append(current)
+    return groups
 
-    # Split text into chunks
-    chunks = split_to_chunks(text)
 
-    intermediate_summaries = []
+# Recursive reduce: merge summaries until they fit the model window
+def merge_summaries(summaries, chunk_lengths, map_fn=None, max_tokens=450):
+    """
+    Token IDs of the intermediate summaries, merged into one model input.
 
-    # Total token count for auto mode
-    total_tokens = len(tokenizer.encode(text))
+    While the concatenated summaries exceed the 512-token input window,
+    they are packed into groups of at most max_tokens and each group is
+    summarized again (one more level), with
+    map_fn(groups, min_len, max_len) (default: the in-process, batched
+    summarize_chunks) and the chunk_lengths limits.
+    """
 
-    (chunk_min, chunk_max), (final_min, final_max) = get_chunk_lengths(
-        mode, input_len=total_tokens
-    )
+    tokenizer = get_tokenizer()
+    if map_fn is None:
+        map_fn = summarize_chunks
 
-    # -------- Stage 1: Chunk summaries --------
-    for chunk in chunks:
-        inputs = tokenizer(
-            chunk,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512
-        )
+    window = 512 - tokenizer.num_special_tokens_to_add()
+    ids = [tokenizer.encode(s, add_special_tokens=False) for s in summaries]
 
-        summary_ids = model.generate(
-            inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            min_length=chunk_min,
-            max_length=chunk_max,
-            num_beams=4,
-            no_repeat_ngram_size=3,
-            early_stopping=True
-        )
+    while sum(len(x) for x in ids) > window:
+        groups = pack_groups(ids, max_tokens)
+        if len(groups) >= len(ids):
+            # Summaries too long to merge pairwise: fall back to truncation
+            break
+        inc("summarizer_reduce_levels_total")
+        level_summaries = map_fn(groups, *chunk_lengths)
+        ids = [tokenizer.encode(s, add_special_tokens=False) for s in level_summaries]
 
-        intermediate_summaries.append(
-            tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        )
+    return [token for seq in ids for token in seq]
+
+
+def reduce_summaries(summaries, chunk_lengths, final_lengths,
+                     map_fn=None, final_fn=None, max_tokens=450):
+    """
+    Merges intermediate summaries into one final summary.
+
+    The summaries are reduced level by level until they fit the model
+    window (see merge_summaries), so the final pass sees the whole merged
+    text instead of a silently truncated prefix.
+
+    map_fn(groups, min_len, max_len) summarizes a list of token-ID groups;
+    it defaults to the in-process, batched summarize_chunks.
+    final_fn(token_ids, min_len, max_len) produces the final summary;
+    it defaults to in-process beam search with 5 beams.
+    """
 
-    # -------- Stage 2: Final summary --------
-    merged_text = " ".join(intermediate_summaries)
+    merged = merge_summaries(summaries, chunk_lengths, map_fn=map_fn, max_tokens=max_tokens)
+    if final_fn is None:
+        final_fn = summarize_final
+    return final_fn(merged, *final_lengths)
 
-    inputs = tokenizer(
-        merged_text,
-        return_tensors="pt",
-        truncation=True,
-        max_length=512
-    )
 
-    final_ids = model.generate(
-        inputs["input_ids"],
-        attention_mask=inputs["attention_mask"],
+# Final pass over the merged summaries
+def summarize_final(token_ids, final_min, final_max, profile="full_beam"):
+    return generate_summaries_from_ids(
+        [token_ids],
         min_length=final_min,
         max_length=final_max,
-        num_beams=5,
-        no_repeat_ngram_size=3,
-        early_stopping=True
-    )
+        decoding=get_profile(profile)
+    )[0]
+
+
+# Two-stage chunk-based summarization
+
+def summarize_chunked(text, mode, batch_size=DEFAULT_BATCH_SIZE,
+                      budget_ms=None, plan=None, extractive_budget=None):
+    """
+    Stage 1: Summarize each chunk separately (batched)
+    Stage 2: Summarize all chunk summaries into final output
+             (recursively, if they do not fit in one model input)
+
+    batch_size controls how many chunks share one generate call.
+    `text` may be a str or an already PreparedDocument.
+
+    budget_ms is an optional per-request latency budget used to pick the
+    decoding plan (intermediate profile, final profile); an explicit
+    `plan` takes precedence. Without either, the original beams are used.
+
+    extractive_budget (tokens) enables the extractive pre-filter: only the
+    most central sentences that fit the budget are summarized
+    (see extractive.py). Length targets then follow the filtered text.
+    """
+
+    with request_span("chunked"):
+        # Normalize and tokenize once
+        doc = text if isinstance(text, PreparedDocument) else PreparedDocument(text, get_tokenizer())
+        inc("summarizer_input_tokens_total", doc.num_tokens, path="chunked")
+
+        # Optional extractive stage: fewer tokens -> fewer chunks to generate
+        if extractive_budget is not None:
+            with stage_timer("extract"):
+                doc = extract_top_sentences(doc, extractive_budget)
+
+        # Split into chunks of whole sentences
+        with stage_timer("chunk"):
+            chunks = chunk_document(doc)
+        inc("summarizer_chunks_total", len(chunks))
+
+        # Total token count for auto mode
+        (chunk_min, chunk_max), (final_min, final_max) = get_chunk_lengths(
+            mode, input_len=doc.num_tokens
+        )
 
-    return tokenizer.decode(final_ids[0], skip_special_tokens=True)
+        if plan is None:
+            plan = select_plan(budget_ms, n_chunks=len(chunks), batch_size=batch_size)
+        intermediate_profile, final_profile = plan
+
+        # -------- Stage 1: Chunk summaries --------
+        # All chunks are padded together and summarized in micro-batches
+        with stage_timer("map"):
+            intermediate_summaries = summarize_chunks(
+                chunks, chunk_min, chunk_max, batch_size=batch_size,
+                profile=intermediate_profile
+            )
+
+        # -------- Stage 2: Final summary --------
+        with stage_timer("reduce"):
+            return reduce_summaries(
+                intermediate_summaries,
+                (chunk_min, chunk_max),
+                (final_min, final_max),
+                map_fn=partial(summarize_chunks, batch_size=batch_size,
+                               profile=intermediate_profile),
+                final_fn=partial(summarize_final, profile=final_profile)
+            )
@@ -0,0 +1,111 @@
+
+# decoding.py
+# Decoding profiles and per-request latency budgets.
+#
+# Stage 1 chunk summaries are only an intermediate product, so they rarely
+# need the same beam width as the final summary. A decoding plan picks one
+# profile for intermediate passes (chunks) and one for the final pass,
+# choosing the highest-quality plan whose estimated cost fits the budget.
+#
+# With SUMMARIZER_ASSISTED=1 the final pass uses assisted decoding: a small
+# draft model (build_draft_model.py) proposes tokens and the full model
+# verifies them. Its output equals greedy decoding of the full model, but
+# several tokens can be accepted per full-model forward pass.
+
+import os
+
+
+# Profiles: keyword arguments passed to model.generate
+DECODING_PROFILES = {
+    "greedy": {"num_beams": 1, "length_penalty": 1.0, "early_stopping": False},
+    "small_beam": {"num_beams": 2, "length_penalty": 1.0, "early_stopping": True},
+    "beam": {"num_beams": 4, "length_penalty": 1.0, "early_stopping": True},
+    "full_beam": {"num_beams": 5, "length_penalty": 1.0, "early_stopping": True},
+    # Greedy, with draft-model proposals (see model.py)
+    "assisted": {"num_beams": 1, "length_penalty": 1.0, "early_stopping": False, "assisted": True},
+}
+
+# Estimated CPU cost of one generate call per profile, in ms, for a
+# 450-token input. Re-measure with benchmarks/bench_decoding.py on the
+# target host and update these numbers.
+PROFILE_COST_MS = {
+    "greedy": 450,
+    "small_beam": 800,
+    "beam": 1400,
+    "full_beam": 1700,
+    "assisted": 250,
+}
+
+# Assisted decoding for the final pass (direct summaries and the final
+# stage of chunked summaries); needs the draft model
+ASSISTED_DECODING = os.getenv("SUMMARIZER_ASSISTED", "0") == "1"
+
+# Plans as (intermediate profile, final profile), best quality first
+if ASSISTED_DECODING:
+    PLANS = [
+        ("beam", "assisted"),
+        ("greedy", "assisted"),
+    ]
+else:
+    PLANS = [
+        ("beam", "full_beam"),
+        ("greedy", "full_beam"),
+        ("greedy", "small_beam"),
+        ("greedy", "greedy"),
+    ]
+
+# Plan used when no latency budget is given (the original beam settings,
+# or beam chunks with an assisted final pass)
+DEFAULT_PLAN = PLANS[0]
+
+
+def get_profile(name):
+    """Returns the generate keyword arguments of a profile."""
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Invalid decoding profile! Choose: {' | '.join(DECODING_PROFILES)}")
+    return DECODING_PROFILES[name]
+
+
+def estimate_cost_ms(plan, n_chunks, batch_size=1):
+    """
+    Rough latency estimate of a plan: one final pass plus the Stage 1
+    passes (batched chunks share a generate call, but not its full cost).
+    """
+
+    intermediate, final = plan
+    stage1_calls = -(-n_chunks // batch_size) if n_chunks else 0
+    # A padded batch of k chunks costs roughly 1 + 0.35 * (k - 1) single calls
+    per_batch = 1 + 0.35 * (min(batch_size, max(n_chunks, 1)) - 1)
+    return (
+        stage1_calls * per_batch * PROFILE_COST_MS[intermediate]
+        + PROFILE_COST_MS[final]
+    )
+
+
+def select_plan(budget_ms=None, n_chunks=0, batch_size=1):
+    """
+    Picks the best-quality plan whose estimated latency fits budget_ms.
+
+    Parameters
+    ----------
+    budget_ms : float, optional
+        Per-request latency budget. None returns DEFAULT_PLAN.
+    n_chunks : int, optional (default=0)
+        Number of Stage 1 chunks (0 for direct summarization).
+    batch_size : int, optional (default=1)
+        Stage 1 micro-batch size.
+
+    Returns
+    -------
+    (str, str)
+        (intermediate profile name, final profile name).
+        If nothing fits, the cheapest plan is returned.
+    """
+
+    if budget_ms is None:
+        return DEFAULT_PLAN
+
+    for plan in PLANS:
+        if estimate_cost_ms(plan, n_chunks, batch_size) <= budget_ms:
+            return plan
+    return PLANS[-1]
@@ -7,13 +7,46 @@
 
 import math
 # Import shared model and tokenizer (loaded once globally)
-from model import tokenizer, model
-# Import Persian preprocessing utilities
-from preprocess import normalize_persian_text
+from model import get_tokenizer, generate_summaries_from_ids
+# Normalized text + token IDs, computed once per request
+from document import PreparedDocument
+# Decoding profiles chosen from the latency budget
+from decoding import get_profile, select_plan
+# Stage timers and counters (see metrics.py)
+from metrics import request_span, inc
+
+
+# Summary length configuration based on mode
+def get_direct_lengths(mode, input_len):
+    """
+    Returns (min_len, max_len) for a direct summary.
+
+    input_len is the (truncated) token count of the input and is only
+    used by "auto" mode.
+    """
+
+    if mode == "short":
+        return 40, 80
+
+    elif mode == "medium":
+        return 70, 160
+
+    elif mode == "long":
+        return 120, 220
+
+    elif mode == "auto":
+        # Generate a summary approximately 25% of the input length
+        ratio = 0.25
+        max_len = max(60, int(math.ceil(input_len * ratio)))
+        min_len = max(30, int(max_len * 0.6))
+        return min_len, max_len
+
+    else:
+        raise ValueError("Invalid mode! Choose: short | medium | long | auto")
 
 
 # Direct (Single‑Pass) Summarization Function
-def summarize_direct(text, mode):
+def summarize_direct(text, mode, budget_ms=None, plan=None):
     """
     Perform direct summarization for short texts.
 
@@ -28,52 +61,66 @@ def summarize_direct(text, mode):
             - "long"   : more detailed summary
             - "auto"   : summary length determined adaptively based on input size
 
+    `text` may also be an already PreparedDocument.
+    budget_ms is an optional latency budget and `plan` an explicit
+    decoding plan; without either the original 5-beam search is used.
     """
 
-#  Persian preprocessing
-    text = normalize_persian_text(text)
+    with request_span("direct"):
+        #  Persian preprocessing and tokenization (skipped if already prepared)
+        doc = text if isinstance(text, PreparedDocument) else PreparedDocument(text, get_tokenizer())
 
-    # Tokenization
-    # The input is truncated to 512 tokens to match the model limit.
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        max_length=512
-    )
+        # Token count after truncation to the 512-token model limit
+        input_len = min(doc.num_tokens, 512)
+        inc("summarizer_input_tokens_total", doc.num_tokens, path="direct")
 
-    input_len = inputs["input_ids"].shape[1]
+        min_len, max_len = get_direct_lengths(mode, input_len)
 
-    # Summary length configuration based on mode
-    if mode == "short":
-        min_len, max_len = 40, 80
+        # Only the final profile applies: there are no intermediate passes
+        if plan is None:
+            plan = select_plan(budget_ms)
+        _, final_profile = plan
 
-    elif mode == "medium":
-        min_len, max_len = 70, 160
+        # Summary generation (beam search unless the budget is tight)
+        summary = generate_summaries_from_ids(
+            [doc.token_ids],
+            min_length=min_len,
+            max_length=max_len,
+            decoding=get_profile(final_profile)
+        )
+        return summary[0]
 
-    elif mode == "long":
-        min_len, max_len = 120, 220
 
-    elif mode == "auto":
-        # Generate a summary approximately 25% of the input length
-        ratio = 0.25
-        max_len = max(60, int(math.ceil(input_len * ratio)))
-        min_len = max(30, int(max_len * 0.6))
+# Several modes of one text in a single batched call
+def summarize_direct_modes(text, modes, budget_ms=None, plan=None):
+    """
+    Direct summaries of one short text in several modes.
 
-    else:
-        raise ValueError("Invalid mode! Choose: short | medium | long | auto")
+    The text is repeated once per mode in a single generate call, with one
+    (min_len, max_len) per row; the encoder runs once for all of them
+    (and not at all if the text is already in the encoder cache).
+
+    Returns
+    -------
+    dict
+        mode -> summary, for every mode in `modes`.
+    """
 
-    # Summary generation using beam search decoding
-    summary_ids = model.generate(
-        inputs["input_ids"],
-        attention_mask=inputs["attention_mask"],
-        min_length=min_len,
-        max_length=max_len,
-        num_beams=5,
-        no_repeat_ngram_size=3,
-        early_stopping=True
-    )
-
-    # Decode token IDs into readable Persian text
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary
+    with request_span("direct_modes"):
+        doc = text if isinstance(text, PreparedDocument) else PreparedDocument(text, get_tokenizer())
+        input_len = min(doc.num_tokens, 512)
+        inc("summarizer_input_tokens_total", doc.num_tokens, path="direct")
+
+        lengths = [get_direct_lengths(mode, input_len) for mode in modes]
+        if plan is None:
+            plan = select_plan(budget_ms)
+        _, final_profile = plan
+
+        summaries = generate_summaries_from_ids(
+            [doc.token_ids] * len(modes),
+            min_length=[min_len for min_len, _ in lengths],
+            max_length=[max_len for _, max_len in lengths],
+            batch_size=len(modes),
+            decoding=get_profile(final_profile)
+        )
+        return dict(zip(modes, summaries))
@@ -0,0 +1,115 @@
+
+# document.py
+# A request-level container that normalizes and tokenizes the input once.
+#
+# Before this, one long message was normalized and tokenized separately by
+# the router, the length controller, the chunker and the Stage 1 loop.
+# Now every step reads the same normalized text and token IDs.
+#
+# While tokenizing, the document also records where each sentence ends
+# (as token offsets), so the chunker can pack whole sentences without
+# looking at the text again.
+
+
+import re
+
+from preprocess import normalize_persian_text
+from metrics import stage_timer
+
+
+# Sentence-final punctuation in Persian text (newlines are handled per line,
+# since normalization turns them into spaces)
+SENTENCE_END = re.compile(r"(?<=[.?؟!])\s+")
+
+
+def split_sentences(text):
+    """
+    Normalizes `text` and splits it into sentences on '.', '?', '؟', '!'
+    and line breaks. Joining the result with single spaces gives exactly
+    normalize_persian_text(text).
+    """
+
+    sentences = []
+    for line in text.splitlines():
+        line = normalize_persian_text(line)
+        if line:
+            sentences.extend(SENTENCE_END.split(line))
+    return sentences
+
+
+class PreparedDocument:
+    """
+    Normalized text plus its token IDs, computed once per request.
+
+    Parameters
+    ----------
+    text : str
+        The original Persian input text.
+    tokenizer : object
+        The tokenizer associated with the summarization model.
+
+    Attributes
+    ----------
+    raw_text : str
+        The text as received from the user.
+    text : str
+        The normalized text.
+    sentences : list of str
+        The normalized sentences (joined with spaces they give `text`).
+    token_ids : list of int
+        Token IDs of the normalized text, without special tokens.
+    sentence_ends : list of int
+        Boundary index: token offset just past the end of each sentence,
+        in increasing order (the last one equals len(token_ids)).
+    """
+
+    def __init__(self, text, tokenizer):
+        self.raw_text = text
+
+        with stage_timer("normalize"):
+            sentences = split_sentences(text)
+        self.sentences = sentences
+        self.text = " ".join(sentences)
+
+        # Sentences are tokenized in one batch call and concatenated.
+        # BERT-style tokenizers split on whitespace first, so this equals
+        # tokenizing the whole text and also yields the boundary index.
+        self.token_ids = []
+        self.sentence_ends = []
+        if sentences:
+            with stage_timer("tokenize"):
+                encoded = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+            for ids in encoded:
+                self.token_ids.extend(ids)
+                self.sentence_ends.append(len(self.token_ids))
+
+        # Number of special tokens ([CLS], [SEP]) added around every model input
+        self._n_special = tokenizer.num_special_tokens_to_add()
+
+    def select_sentences(self, indices):
+        """
+        A new document made of the given sentences (indices in increasing
+        order), reusing their token IDs instead of tokenizing again.
+        """
+
+        starts = [0] + self.sentence_ends[:-1]
+        doc = object.__new__(PreparedDocument)
+        doc.raw_text = self.raw_text
+        doc.sentences = [self.sentences[i] for i in indices]
+        doc.text = " ".join(doc.sentences)
+        doc.token_ids = []
+        doc.sentence_ends = []
+        for i in indices:
+            doc.token_ids.extend(self.token_ids[starts[i]:self.sentence_ends[i]])
+            doc.sentence_ends.append(len(doc.token_ids))
+        doc._n_special = self._n_special
+        return doc
+
+    @property
+    def num_tokens(self):
+        # Same count as tokenizer.encode(text), special tokens included,
+        # so existing thresholds (e.g. 450 tokens) keep their meaning
+        return len(self.token_ids) + self._n_special
+
+    def __len__(self):
+        return self.num_tokens
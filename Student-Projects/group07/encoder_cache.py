@@ -0,0 +1,96 @@
+
+# encoder_cache.py
+# LRU cache of encoder hidden states, per model input.
+#
+# The encoder output of a text does not depend on the summary mode: only
+# decoding uses min_length / max_length. When the user switches mode
+# ("change mode", history items), the same input is decoded again, so its
+# encoder states are kept here and the encoder pass is skipped.
+#
+# Entries are keyed by the exact input token IDs (special tokens included,
+# after truncation) and hold the states of the real (unpadded) positions,
+# so one entry can be placed in any padded batch. The cache is bounded by
+# the total size of the stored tensors.
+
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+# Memory budget of the cache; 0 disables it. A 512-token input of the
+# 768-dim bert2bert encoder takes 1.5 MB in float32.
+ENCODER_CACHE_MAX_BYTES = int(os.getenv("SUMMARIZER_ENCODER_CACHE_MB", "64")) * 1024 * 1024
+
+
+def make_encoder_key(input_ids):
+    """SHA-256 of one model input (token IDs with special tokens)."""
+    return hashlib.sha256(",".join(map(str, input_ids)).encode("ascii")).hexdigest()
+
+
+class EncoderCache:
+    """
+    Thread-safe LRU of encoder states (tensors of shape [tokens, hidden]).
+
+    Parameters
+    ----------
+    max_bytes : int, optional (default=ENCODER_CACHE_MAX_BYTES)
+        Upper bound of the stored tensors; least recently used entries
+        are evicted once it is exceeded. 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes=ENCODER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return state
+
+    def put(self, key, state):
+        size = state.numel() * state.element_size()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.numel() * old.element_size()
+            self._entries[key] = state
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.numel() * evicted.element_size()
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        """Hit/miss/eviction counters and current memory usage."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Shared cache used by model.generate_summaries_from_ids and streaming
+encoder_cache = EncoderCache()
@@ -0,0 +1,211 @@
+
+# execution.py
+# Execution layer for the bot handlers.
+#
+# Handlers run on the asyncio event loop, so any blocking call inside
+# them (model inference, SQLite, HTTP clients) stalls every other chat.
+# This module gives the handlers:
+#   - a thread pool for blocking I/O (SQLite, network clients)
+#   - an optional process pool for CPU-bound inference, with one model
+#     replica per worker process
+#   - admission control: a per-user concurrency limit and a global cap on
+#     requests in flight; requests over either limit are rejected at once
+#     (BackPressureError) so the handler can tell the user to retry,
+#     instead of queueing work without bound
+
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from model import get_tokenizer, init_worker_process, DEFAULT_BATCH_SIZE
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import summarize_direct
+from chunk_summarizer import summarize_chunked
+from summary_cache import summary_cache, make_key, hash_text
+from decoding import select_plan
+from metrics import record_cache_lookup
+
+
+# Thread pool size for blocking I/O
+IO_WORKERS = int(os.getenv("BOT_IO_WORKERS", "8"))
+
+# Inference worker processes; 0 keeps inference in the bot process
+# (InferenceScheduler worker thread)
+CPU_WORKERS = int(os.getenv("BOT_CPU_WORKERS", "0"))
+
+# Requests in flight (all users) before new ones are rejected
+MAX_PENDING = int(os.getenv("BOT_MAX_PENDING", "32"))
+
+# Requests in flight per user
+PER_USER_LIMIT = 1
+
+
+class BackPressureError(Exception):
+    """A request was rejected because the bot is at capacity."""
+
+
+class QueueFullError(BackPressureError):
+    """Too many requests in flight across all users."""
+
+
+class UserBusyError(BackPressureError):
+    """The user already has the maximum number of requests in flight."""
+
+
+# ---------- CPU worker process ----------
+
+def summarize_text(text, mode, budget_ms=None):
+    """
+    Routes and summarizes one text in the calling process.
+    Module-level, so it can be sent to the process pool.
+
+    Uses the same summary_cache keys as InferenceScheduler; worker
+    processes share stored summaries through the SQLite tier.
+    """
+
+    tokenizer = get_tokenizer()
+    doc = PreparedDocument(text, tokenizer)
+    is_long = is_long_text(doc, tokenizer)
+
+    # Same plan and cache key as the scheduler, so both paths share entries
+    n_chunks = -(-len(doc.token_ids) // 450) if is_long else 0
+    plan = select_plan(budget_ms, n_chunks, DEFAULT_BATCH_SIZE)
+    cache_key = make_key("summary", hash_text(doc.text), mode, *plan)
+    cached = summary_cache.get(cache_key)
+    record_cache_lookup("summary", cached is not None)
+    if cached is not None:
+        return cached
+
+    if is_long:
+        summary = summarize_chunked(doc, mode, plan=plan)
+    else:
+        summary = summarize_direct(doc, mode, plan=plan)
+    summary_cache.put(cache_key, summary)
+    return summary
+
+
+# ---------- Execution layer ----------
+
+class ExecutionLayer:
+    """
+    Thread pool, optional process pool and admission control for handlers.
+
+    Parameters
+    ----------
+    io_workers : int, optional (default=IO_WORKERS)
+        Threads for blocking I/O calls (run_io).
+    cpu_workers : int, optional (default=CPU_WORKERS)
+        Processes for CPU-bound calls (run_cpu). With 0, run_cpu uses the
+        thread pool instead (torch releases the GIL during inference).
+    max_pending : int, optional (default=MAX_PENDING)
+        Requests admitted at the same time, across all users.
+    per_user_limit : int, optional (default=PER_USER_LIMIT)
+        Requests admitted at the same time for one user.
+    """
+
+    def __init__(self, io_workers=IO_WORKERS, cpu_workers=CPU_WORKERS,
+                 max_pending=MAX_PENDING, per_user_limit=PER_USER_LIMIT):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+
+        self._io_pool = None
+        self._cpu_pool = None
+
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+        self._per_user = {}
+        self._stats = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_user_busy": 0,
+            "max_pending": 0,
+        }
+
+    # ---------- Lifecycle ----------
+
+    def start(self):
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers, thread_name_prefix="bot-io"
+            )
+        if self._cpu_pool is None and self.cpu_workers > 0:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.cpu_workers)
+            # "spawn" avoids forking a process that already holds torch threads
+            self._cpu_pool = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker_process,
+                initargs=(torch_threads,),
+            )
+
+    def shutdown(self):
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+
+    # ---------- Admission control ----------
+
+    @asynccontextmanager
+    async def admit(self, user_id):
+        """
+        Holds one request slot for `user_id` while the block runs.
+        Raises UserBusyError or QueueFullError instead of waiting.
+        """
+
+        if self._per_user.get(user_id, 0) >= self.per_user_limit:
+            self._stats["rejected_user_busy"] += 1
+            raise UserBusyError(user_id)
+        if self._pending >= self.max_pending:
+            self._stats["rejected_queue_full"] += 1
+            raise QueueFullError(self._pending)
+
+        self._pending += 1
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        self._stats["admitted"] += 1
+        self._stats["max_pending"] = max(self._stats["max_pending"], self._pending)
+        try:
+            yield
+        finally:
+            self._pending -= 1
+            remaining = self._per_user[user_id] - 1
+            if remaining:
+                self._per_user[user_id] = remaining
+            else:
+                del self._per_user[user_id]
+
+    # ---------- Offloading ----------
+
+    async def run_io(self, fn, *args, **kwargs):
+        """Runs a blocking I/O call on the thread pool."""
+        if self._io_pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, partial(fn, *args, **kwargs))
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """
+        Runs a CPU-bound call on the process pool (fn and its arguments
+        must be picklable), or on the thread pool when cpu_workers is 0.
+        """
+        if self._io_pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        pool = self._cpu_pool if self._cpu_pool is not None else self._io_pool
+        return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+    def metrics(self):
+        """Admission counters and current load."""
+        stats = dict(self._stats)
+        stats["pending"] = self._pending
+        stats["busy_users"] = len(self._per_user)
+        return stats
@@ -0,0 +1,40 @@
+
+# export_onnx.py
+# Exports the summarization model to ONNX for the "onnx" backend of model.py.
+# The encoder and decoder are exported separately, and the decoder keeps its
+# past key/values (KV-cache) so each generated token reuses earlier states.
+#
+# Usage:
+#   pip install optimum[onnxruntime]
+#   python export_onnx.py --out onnx_model
+#   SUMMARIZER_BACKEND=onnx python telegram_bot.py
+
+
+import argparse
+
+from optimum.onnxruntime import ORTModelForSeq2SeqLM
+from transformers import AutoTokenizer
+
+from model import MODEL_NAME
+
+
+def export(out_dir, model_name=MODEL_NAME):
+    ort_model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_name, export=True, use_cache=True
+    )
+    ort_model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=str, default="onnx_model", help="Output directory.")
+    parser.add_argument("--model", type=str, default=MODEL_NAME, help="Hugging Face model id.")
+    args = parser.parse_args()
+
+    export(args.out, args.model)
+    print(f"Saved ONNX model to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
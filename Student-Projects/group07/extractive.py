@@ -0,0 +1,92 @@
+
+# extractive.py
+# Optional extractive pre-filter for very long texts.
+#
+# Before the chunked (abstractive) pipeline runs, every sentence is scored
+# by the cosine similarity of its TF-IDF vector to the document centroid,
+# and only the highest-scoring sentences are kept, up to a token budget,
+# in their original order. Fewer tokens means fewer chunks, so fewer
+# beam-search generate calls in Stage 1 and in the reduce levels.
+#
+# Terms are the tokenizer's word pieces, taken from the PreparedDocument,
+# so no extra tokenization is needed. Scoring is vectorized with NumPy over
+# (sentence, term) pairs, so memory grows with the text, not with
+# sentences x vocabulary.
+
+
+import numpy as np
+
+
+# Tokens kept by default: four full 450-token chunks
+DEFAULT_TOKEN_BUDGET = 1800
+
+
+def sentence_scores(doc):
+    """
+    TF-IDF centroid score of every sentence of a PreparedDocument.
+
+    Returns
+    -------
+    numpy.ndarray
+        One score per sentence in [0, 1]; higher means closer to the
+        overall content of the document.
+    """
+
+    n_sentences = len(doc.sentence_ends)
+    if n_sentences == 0:
+        return np.zeros(0)
+
+    ends = np.asarray(doc.sentence_ends)
+    token_ids = np.asarray(doc.token_ids, dtype=np.int64)
+    sentence_of_token = np.repeat(np.arange(n_sentences), np.diff(ends, prepend=0))
+
+    # Compact term indices, then term frequency per (sentence, term) pair
+    _, terms = np.unique(token_ids, return_inverse=True)
+    n_terms = int(terms.max()) + 1 if len(terms) else 0
+    pairs, tf = np.unique(sentence_of_token * n_terms + terms, return_counts=True)
+    pair_sentence = pairs // n_terms
+    pair_term = pairs % n_terms
+
+    # Smoothed inverse document frequency (sentences are the documents)
+    df = np.bincount(pair_term, minlength=n_terms)
+    idf = np.log((1 + n_sentences) / (1 + df)) + 1
+
+    # L2-normalized TF-IDF weights of each pair
+    weights = tf * idf[pair_term]
+    norms = np.sqrt(np.bincount(pair_sentence, weights ** 2, minlength=n_sentences))
+    weights = weights / np.maximum(norms, 1e-12)[pair_sentence]
+
+    # Normalized centroid of all sentence vectors, then cosine per sentence
+    centroid = np.bincount(pair_term, weights, minlength=n_terms)
+    centroid /= max(np.linalg.norm(centroid), 1e-12)
+    return np.bincount(pair_sentence, weights * centroid[pair_term], minlength=n_sentences)
+
+
+def extract_top_sentences(doc, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Keeps the best-scoring sentences of `doc` within `token_budget` tokens.
+
+    Parameters
+    ----------
+    doc : PreparedDocument
+    token_budget : int, optional (default=DEFAULT_TOKEN_BUDGET)
+        Maximum number of tokens (without special tokens) kept.
+
+    Returns
+    -------
+    PreparedDocument
+        `doc` itself if it already fits the budget; otherwise a new
+        document with the selected sentences in their original order.
+        At least one sentence is always kept.
+    """
+
+    if len(doc.token_ids) <= token_budget:
+        return doc
+
+    lengths = np.diff(np.asarray(doc.sentence_ends), prepend=0)
+    order = np.argsort(-sentence_scores(doc), kind="stable")
+
+    # cumsum over the ranking is increasing, so the kept set is a prefix
+    fits = np.cumsum(lengths[order]) <= token_budget
+    keep = order[:max(1, int(fits.sum()))]
+    return doc.select_sentences(sorted(keep.tolist()))
@@ -0,0 +1,270 @@
+
+# history_store.py
+# Per-user summary history for the Telegram bot.
+#
+# Replaces the old in-process dict, which kept every text and summary
+# forever and lost them on restart. A history store:
+#   - keeps at most `max_items` entries per user (oldest are dropped)
+#   - stores texts and summaries compressed
+#   - returns history one page at a time, newest first
+#
+# HistoryStore is the interface; SQLiteHistoryStore is the persistent
+# implementation used by the bot and MemoryHistoryStore a bounded
+# in-process one (e.g. for local runs without a database file).
+#
+# Pages use keyset pagination on the (user_id, created_at) index: a page
+# is read from the position of a cursor, so its cost depends on the page
+# size only, not on how much history the user has.
+
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+# SQLite file of the bot's history
+HISTORY_DB_PATH = os.getenv("HISTORY_DB", "history.db")
+
+# Entries kept per user
+HISTORY_MAX_ITEMS = 50
+
+# Entries shown per history page
+HISTORY_PAGE_SIZE = 5
+
+
+def compress_text(text):
+    return zlib.compress(text.encode("utf-8"))
+
+
+def decompress_text(data):
+    return zlib.decompress(data).decode("utf-8")
+
+
+def now_ms():
+    """Current time in milliseconds (the created_at unit)."""
+    return time.time_ns() // 1_000_000
+
+
+class HistoryStore(ABC):
+    """
+    Interface of a per-user history backend.
+
+    Entries are ordered by (created_at, id). Page items are dicts with
+    "id", "created_at" (ms since the epoch) and "mode"; full entries
+    also have "text" and "summary".
+    """
+
+    @abstractmethod
+    def add(self, user_id, text, summary, mode):
+        """Stores one entry and returns its id."""
+
+    @abstractmethod
+    def get(self, user_id, item_id):
+        """Returns the full entry, or None if it does not exist (or was dropped)."""
+
+    @abstractmethod
+    def page(self, user_id, before=None, after=None, limit=HISTORY_PAGE_SIZE):
+        """
+        Returns (items, has_older, has_newer), items newest first.
+
+        Parameters
+        ----------
+        before : (int, int), optional
+            Cursor (created_at, id): return entries older than it.
+        after : (int, int), optional
+            Cursor (created_at, id): return entries newer than it.
+            Without a cursor the newest page is returned.
+        limit : int, optional (default=HISTORY_PAGE_SIZE)
+        """
+
+    @abstractmethod
+    def count(self, user_id):
+        """Number of entries stored for the user."""
+
+    def close(self):
+        pass
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    Persistent history in one SQLite table, indexed by (user_id, created_at).
+
+    Parameters
+    ----------
+    db_path : str, optional (default=HISTORY_DB_PATH)
+    max_items : int, optional (default=HISTORY_MAX_ITEMS)
+        Per-user cap; older entries are deleted on insert.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH, max_items=HISTORY_MAX_ITEMS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL keeps commits cheap enough to run inside the bot handlers
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id INTEGER NOT NULL, "
+            "created_at INTEGER NOT NULL, "
+            "mode TEXT NOT NULL, "
+            "text BLOB NOT NULL, "
+            "summary BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_history_user_time "
+            "ON history (user_id, created_at)"
+        )
+        self._db.commit()
+
+    def add(self, user_id, text, summary, mode):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO history (user_id, created_at, mode, text, summary) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, now_ms(), mode, compress_text(text), compress_text(summary)),
+            )
+            # Ring behaviour: drop everything past the newest max_items
+            self._db.execute(
+                "DELETE FROM history WHERE id IN ("
+                "SELECT id FROM history WHERE user_id = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?)",
+                (user_id, self.max_items),
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def get(self, user_id, item_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, created_at, mode, text, summary FROM history "
+                "WHERE id = ? AND user_id = ?",
+                (item_id, user_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "created_at": row[1],
+            "mode": row[2],
+            "text": decompress_text(row[3]),
+            "summary": decompress_text(row[4]),
+        }
+
+    def page(self, user_id, before=None, after=None, limit=HISTORY_PAGE_SIZE):
+        # One extra row tells whether another page exists in that direction
+        if after is not None:
+            sql = (
+                "SELECT id, created_at, mode FROM history "
+                "WHERE user_id = ? AND (created_at, id) > (?, ?) "
+                "ORDER BY created_at ASC, id ASC LIMIT ?"
+            )
+            params = (user_id, after[0], after[1], limit + 1)
+        elif before is not None:
+            sql = (
+                "SELECT id, created_at, mode FROM history "
+                "WHERE user_id = ? AND (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?"
+            )
+            params = (user_id, before[0], before[1], limit + 1)
+        else:
+            sql = (
+                "SELECT id, created_at, mode FROM history WHERE user_id = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT ?"
+            )
+            params = (user_id, limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if after is not None:
+            rows.reverse()
+
+        items = [{"id": r[0], "created_at": r[1], "mode": r[2]} for r in rows]
+        if after is not None:
+            return items, True, has_more
+        return items, has_more, before is not None
+
+    def count(self, user_id):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class MemoryHistoryStore(HistoryStore):
+    """
+    Bounded in-process history (lost on restart).
+
+    Parameters
+    ----------
+    max_items : int, optional (default=HISTORY_MAX_ITEMS)
+        Per-user cap; the oldest entry is dropped when it is exceeded.
+    """
+
+    def __init__(self, max_items=HISTORY_MAX_ITEMS):
+        self.max_items = max_items
+        self._users = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, user_id, text, summary, mode):
+        with self._lock:
+            item_id = self._next_id
+            self._next_id += 1
+            entries = self._users.setdefault(user_id, deque(maxlen=self.max_items))
+            entries.append((now_ms(), item_id, mode, compress_text(text), compress_text(summary)))
+            return item_id
+
+    def get(self, user_id, item_id):
+        with self._lock:
+            entries = list(self._users.get(user_id, ()))
+        for created_at, entry_id, mode, text, summary in entries:
+            if entry_id == item_id:
+                return {
+                    "id": entry_id,
+                    "created_at": created_at,
+                    "mode": mode,
+                    "text": decompress_text(text),
+                    "summary": decompress_text(summary),
+                }
+        return None
+
+    def page(self, user_id, before=None, after=None, limit=HISTORY_PAGE_SIZE):
+        with self._lock:
+            entries = list(self._users.get(user_id, ()))
+
+        # Entries are appended in (created_at, id) order
+        keys = [(e[0], e[1]) for e in entries]
+        if after is not None:
+            start = next((i for i, k in enumerate(keys) if k > tuple(after)), len(keys))
+            selected = entries[start:start + limit]
+            has_older, has_newer = True, start + limit < len(entries)
+        else:
+            end = len(keys)
+            if before is not None:
+                end = next((i for i, k in enumerate(keys) if k >= tuple(before)), len(keys))
+            selected = entries[max(0, end - limit):end]
+            has_older, has_newer = end - limit > 0, before is not None
+
+        items = [
+            {"id": e[1], "created_at": e[0], "mode": e[2]}
+            for e in reversed(selected)
+        ]
+        return items, has_older, has_newer
+
+    def count(self, user_id):
+        with self._lock:
+            return len(self._users.get(user_id, ()))
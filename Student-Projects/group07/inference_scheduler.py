@@ -0,0 +1,267 @@
+
+# inference_scheduler.py
+# In-process dynamic batching for the summarizer.
+#
+# The Telegram handlers are async, but model.generate is a blocking CPU call.
+# This scheduler moves inference to a dedicated worker thread:
+#   1) Each caller submits (text, mode) and awaits an asyncio future
+#   2) The worker collects requests arriving within a short time window
+#   3) Short texts are grouped by decoding profile, then split into padded
+#      batches by token-length bucket (each text keeps its own length targets)
+#   4) Each batch runs as one generate call
+#   5) Results are handed back to the event loop thread-safely
+
+
+import asyncio
+import queue
+import threading
+import time
+
+from model import get_tokenizer, generate_summaries_from_ids
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import get_direct_lengths
+from chunk_summarizer import summarize_chunked
+from summary_cache import summary_cache, chunk_cache, make_key, hash_text
+from decoding import get_profile, select_plan
+from length_buckets import plan_batches
+from metrics import request_span, inc, record_cache_lookup
+
+
+class _Request:
+    # One pending summarization request waiting for the worker
+    __slots__ = ("text", "mode", "budget_ms", "future", "loop", "enqueued_at",
+                 "cache_key", "plan")
+
+    def __init__(self, text, mode, future, loop, budget_ms=None):
+        self.text = text
+        self.mode = mode
+        self.budget_ms = budget_ms
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.perf_counter()
+        self.cache_key = None
+        self.plan = None
+
+
+class InferenceScheduler:
+    """
+    Collects summarization requests from many coroutines and runs
+    them as batched generate calls on a single worker thread.
+
+    Parameters
+    ----------
+    max_batch_size : int, optional (default=8)
+        Maximum number of requests in one generate call.
+    max_wait_ms : float, optional (default=20)
+        How long the worker keeps collecting requests after the first
+        one arrives before running a batch.
+    """
+
+    def __init__(self, max_batch_size=8, max_wait_ms=20):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "largest_batch": 0,
+            "max_queue_depth": 0,
+            "total_latency_s": 0.0,
+        }
+
+    # ---------- Lifecycle ----------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="inference-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ---------- Public API ----------
+
+    async def submit(self, text, mode, budget_ms=None):
+        """
+        Queue a request and wait for its summary without blocking the event loop.
+        budget_ms is an optional latency budget that selects the decoding plan.
+        """
+        if self._thread is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Request(text, mode, future, loop, budget_ms))
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+        return await future
+
+    def metrics(self):
+        """Snapshot of scheduler configuration and counters."""
+        with self._lock:
+            stats = dict(self._stats)
+
+        batches = stats["batches"]
+        completed = stats["completed"] + stats["failed"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait_ms
+        stats["avg_batch_size"] = stats["batched_requests"] / batches if batches else 0.0
+        stats["avg_latency_ms"] = (
+            1000 * stats["total_latency_s"] / completed if completed else 0.0
+        )
+        stats["summary_cache"] = summary_cache.stats()
+        stats["chunk_cache"] = chunk_cache.stats()
+        return stats
+
+    # ---------- Worker thread ----------
+
+    def _collect(self):
+        # Block until the first request arrives, then keep collecting for
+        # at most max_wait_ms or until enough requests fill several batches.
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        requests = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(requests) < self.max_batch_size * 4:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                requests.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return requests
+
+    def _group(self, requests):
+        # Direct texts are grouped by decoding profile only: modes and
+        # lengths can be mixed in one batch (per-item length targets).
+        # Long texts are kept apart (chunked pipeline).
+        tokenizer = get_tokenizer()
+        groups = {}
+        for req in requests:
+            try:
+                # Normalize and tokenize once; every later step reuses the IDs
+                doc = PreparedDocument(req.text, tokenizer)
+                is_long = is_long_text(doc, tokenizer)
+
+                # Decoding plan from the latency budget; the chunk count is
+                # estimated from the 450-token chunk size
+                n_chunks = -(-len(doc.token_ids) // 450) if is_long else 0
+                req.plan = select_plan(req.budget_ms, n_chunks, self.max_batch_size)
+
+                # Same normalized text + mode + plan -> reuse the stored summary
+                cache_key = make_key("summary", hash_text(doc.text), req.mode, *req.plan)
+                cached = summary_cache.get(cache_key)
+                record_cache_lookup("summary", cached is not None)
+                if cached is not None:
+                    self._finish(req, result=cached)
+                    continue
+                req.cache_key = cache_key
+
+                if is_long:
+                    key = ("chunked", req.mode)
+                else:
+                    # Validates the mode before the request joins a batch
+                    get_direct_lengths(req.mode, min(doc.num_tokens, 512))
+                    key = ("direct", req.plan[1])
+            except Exception as exc:
+                self._finish(req, error=exc)
+                continue
+            groups.setdefault(key, []).append((req, doc))
+        return groups
+
+    def _run_group(self, key, items):
+        if key[0] == "chunked":
+            # Chunked documents already batch their own chunks internally
+            for req, doc in items:
+                try:
+                    summary = summarize_chunked(doc, mode=key[1], plan=req.plan)
+                    self._finish(req, result=summary)
+                except Exception as exc:
+                    self._finish(req, error=exc)
+            return
+
+        _, profile = key
+        input_lens = [min(doc.num_tokens, 512) for _, doc in items]
+        lengths = [
+            get_direct_lengths(req.mode, input_len)
+            for (req, _), input_len in zip(items, input_lens)
+        ]
+
+        for indices in plan_batches(input_lens, self.max_batch_size):
+            batch = [items[i] for i in indices]
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["batched_requests"] += len(batch)
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            inc("summarizer_input_tokens_total", sum(doc.num_tokens for _, doc in batch),
+                path="direct")
+            try:
+                # One span per micro-batch: its requests share one generate call
+                with request_span("direct_batch"):
+                    summaries = generate_summaries_from_ids(
+                        [doc.token_ids for _, doc in batch],
+                        min_length=[lengths[i][0] for i in indices],
+                        max_length=[lengths[i][1] for i in indices],
+                        batch_size=len(batch),
+                        decoding=get_profile(profile),
+                        buckets=None
+                    )
+            except Exception as exc:
+                for req, _ in batch:
+                    self._finish(req, error=exc)
+                continue
+            for (req, _), summary in zip(batch, summaries):
+                self._finish(req, result=summary)
+
+    def _finish(self, req, result=None, error=None):
+        if error is None and req.cache_key is not None:
+            summary_cache.put(req.cache_key, result)
+
+        with self._lock:
+            self._stats["failed" if error is not None else "completed"] += 1
+            self._stats["total_latency_s"] += time.perf_counter() - req.enqueued_at
+
+        def _resolve():
+            # The awaiting coroutine may have been cancelled meanwhile
+            if req.future.done():
+                return
+            if error is not None:
+                req.future.set_exception(error)
+            else:
+                req.future.set_result(result)
+
+        req.loop.call_soon_threadsafe(_resolve)
+
+    def _run(self):
+        while not self._stop.is_set():
+            requests = self._collect()
+            if not requests:
+                continue
+            for key, items in self._group(requests).items():
+                self._run_group(key, items)
@@ -0,0 +1,124 @@
+
+# length_buckets.py
+# Length bucketing for batched generation.
+#
+# A padded batch costs as much as its longest input times its size, so
+# mixing a 40-token message with a 500-token one wastes most of the batch
+# on padding. Inputs are instead grouped into token-length buckets
+# (64/128/256/512) and each micro-batch only holds inputs from one bucket,
+# sorted by length, so padding never goes past the bucket size.
+#
+# Grouping by length alone would still split "auto" mode, where every
+# input has its own length targets. PerItemLengthProcessor applies a
+# separate min/max summary length to each row of one generate call, so
+# items with different targets can share a batch.
+
+
+# Token-length buckets (special tokens included); inputs are truncated to 512
+LENGTH_BUCKETS = (64, 128, 256, 512)
+
+
+def get_length_bucket(n_tokens, buckets=LENGTH_BUCKETS):
+    """Returns the smallest bucket that fits n_tokens (inputs are truncated to 512)."""
+    for size in buckets:
+        if n_tokens <= size:
+            return size
+    return buckets[-1]
+
+
+def plan_batches(lengths, batch_size, buckets=LENGTH_BUCKETS):
+    """
+    Groups input indices into micro-batches that never mix buckets.
+
+    Parameters
+    ----------
+    lengths : list of int
+        Token length of each input (special tokens included).
+    batch_size : int
+        Maximum number of inputs per micro-batch.
+    buckets : tuple of int or None, optional (default=LENGTH_BUCKETS)
+        None keeps the input order and only splits it into micro-batches
+        (the behaviour before bucketing).
+
+    Returns
+    -------
+    list of list of int
+        Micro-batches of indices into `lengths`. Inside a bucket the
+        inputs are sorted by length, so each batch pads to similar sizes.
+    """
+
+    if buckets is None:
+        order = list(range(len(lengths)))
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+    by_bucket = {}
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        by_bucket.setdefault(get_length_bucket(lengths[i], buckets), []).append(i)
+
+    batches = []
+    for bucket in sorted(by_bucket):
+        indices = by_bucket[bucket]
+        batches.extend(
+            indices[start:start + batch_size]
+            for start in range(0, len(indices), batch_size)
+        )
+    return batches
+
+
+def padding_stats(lengths, batches):
+    """(real tokens, padded tokens) when each batch pads to its longest input."""
+    real = sum(lengths)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+    return real, padded
+
+
+class PerItemLengthProcessor:
+    """
+    Logits processor for model.generate with one (min, max) summary length
+    per input instead of one per call.
+
+    Rows shorter than their item's minimum cannot emit EOS; rows that reach
+    their item's maximum are forced to emit EOS. Run generate with
+    max_length = max(max_lengths) + 1 and no min_length, so every item
+    keeps the same number of content tokens as a call with its own limits.
+
+    Parameters
+    ----------
+    min_lengths, max_lengths : list of int
+        Per-input length limits (same meaning as generate's min_length /
+        max_length).
+    eos_token_id : int or list of int
+    num_beams : int, optional (default=1)
+        Rows of the scores are grouped per input, num_beams rows each.
+    """
+
+    def __init__(self, min_lengths, max_lengths, eos_token_id, num_beams=1):
+        self.min_lengths = list(min_lengths)
+        self.max_lengths = list(max_lengths)
+        self.eos_ids = eos_token_id if isinstance(eos_token_id, (list, tuple)) else [eos_token_id]
+        self.num_beams = num_beams
+        self._limits = None
+
+    def __call__(self, input_ids, scores):
+        if self._limits is None:
+            # Per-row limits, built once on the scores' device
+            def per_row(values):
+                return scores.new_tensor(values).repeat_interleave(self.num_beams)
+            self._limits = (per_row(self.min_lengths), per_row(self.max_lengths))
+
+        min_rows, max_rows = self._limits
+        cur_len = input_ids.shape[-1]
+
+        too_short = min_rows > cur_len
+        if too_short.any():
+            for eos in self.eos_ids:
+                scores[too_short, eos] = -float("inf")
+
+        # At cur_len == max_length a call with that limit would stop with
+        # max_length - 1 tokens after the decoder start token; end the row
+        # with EOS instead (dropped when decoding)
+        at_max = max_rows <= cur_len
+        if at_max.any():
+            scores[at_max] = -float("inf")
+            scores[at_max, self.eos_ids[0]] = 0.0
+        return scores
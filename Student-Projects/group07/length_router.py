@@ -4,6 +4,8 @@
 
 
 from preprocess import normalize_persian_text
+from document import PreparedDocument
+from metrics import stage_timer, inc
 
 
 def is_long_text(text, tokenizer, threshold_tokens=450):
@@ -11,8 +13,9 @@ def is_long_text(text, tokenizer, threshold_tokens=450):
 
     Parameters
     ----------
-    text : str
-        The original Persian input text.
+    text : str or PreparedDocument
+        The original Persian input text, or a document that was
+        already normalized and tokenized (no extra work is done then).
     tokenizer : object
         The tokenizer associated with the summarization model,
         used to count tokens accurately.
@@ -26,12 +29,20 @@ def is_long_text(text, tokenizer, threshold_tokens=450):
         False -> otherwise.
     """
 
-    # Step 1. Normalize text before tokenization
-    text = normalize_persian_text(text)
+    if isinstance(text, PreparedDocument):
+        # Token count was computed once when the document was prepared
+        token_count = text.num_tokens
+    else:
+        # Step 1. Normalize text before tokenization
+        with stage_timer("normalize"):
+            text = normalize_persian_text(text)
 
-    # Step 2. Count tokens using the model's tokenizer
-    token_count = len(tokenizer.encode(text))
+        # Step 2. Count tokens using the model's tokenizer
+        with stage_timer("tokenize"):
+            token_count = len(tokenizer.encode(text))
 
     # Step 3. Return routing decision
     # If the token count exceeds 450 (by default), the system routes the text to the chunk-based summarizer.
-    return token_count > threshold_tokens
+    is_long = token_count > threshold_tokens
+    inc("summarizer_routes_total", route="chunked" if is_long else "direct")
+    return is_long
@@ -0,0 +1,120 @@
+
+# mapreduce_summarizer.py
+# Parallel map-reduce summarization for very long (book-length) Persian texts.
+#
+#   Map    : chunks are summarized in parallel across a process pool,
+#            with one model replica per worker process
+#   Reduce : summaries are merged recursively, in groups that fit the
+#            512-token window, until a single final summary remains
+#
+# The number of workers is bounded by a memory budget, since every worker
+# holds its own copy of the model.
+
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from model import get_tokenizer, init_worker_process
+from document import PreparedDocument
+from chunk_summarizer import (
+    chunk_document,
+    get_chunk_lengths,
+    summarize_chunks,
+    summarize_final,
+    reduce_summaries,
+)
+
+
+# Approximate resident memory of one model replica (bert2bert, fp32), in MB
+MODEL_REPLICA_MB = 1200
+
+# Total memory the worker pool may use, in MB
+DEFAULT_MEMORY_BUDGET_MB = 4096
+
+def get_worker_count(memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Largest worker count that fits the memory budget and the CPU count."""
+    by_memory = max(1, memory_budget_mb // MODEL_REPLICA_MB)
+    return max(1, min(os.cpu_count() or 1, by_memory))
+
+
+# ---------- Worker process ----------
+
+def _summarize_in_worker(groups, min_len, max_len):
+    return summarize_chunks(groups, min_len, max_len)
+
+
+# ---------- Pool ----------
+
+class MapReduceSummarizer:
+    """
+    Owns a process pool of model replicas and summarizes documents of
+    any length with parallel map and recursive reduce.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of worker processes. Defaults to get_worker_count().
+    memory_budget_mb : int, optional (default=DEFAULT_MEMORY_BUDGET_MB)
+        Used to derive the worker count when `workers` is not given.
+    """
+
+    def __init__(self, workers=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.workers = workers or get_worker_count(memory_budget_mb)
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+
+        # "spawn" avoids forking a process that already holds torch threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker_process,
+            initargs=(torch_threads,),
+        )
+
+    def _parallel_map(self, groups, min_len, max_len):
+        # One contiguous slice of groups per worker keeps output order simple
+        per_worker = -(-len(groups) // self.workers)
+        slices = [groups[i:i + per_worker] for i in range(0, len(groups), per_worker)]
+        results = self._pool.map(
+            _summarize_in_worker, slices,
+            [min_len] * len(slices), [max_len] * len(slices)
+        )
+        return [summary for part in results for summary in part]
+
+    def _final_in_pool(self, token_ids, min_len, max_len):
+        # The final pass also runs in a worker, so the parent process
+        # never needs its own model replica
+        return self._pool.submit(summarize_final, token_ids, min_len, max_len).result()
+
+    def summarize(self, text, mode):
+        """
+        Summarizes `text` (str or PreparedDocument) with the given mode.
+        """
+
+        doc = text if isinstance(text, PreparedDocument) else PreparedDocument(text, get_tokenizer())
+        chunks = chunk_document(doc)
+
+        (chunk_min, chunk_max), (final_min, final_max) = get_chunk_lengths(
+            mode, input_len=doc.num_tokens
+        )
+
+        # -------- Map --------
+        summaries = self._parallel_map(chunks, chunk_min, chunk_max)
+
+        # -------- Reduce --------
+        return reduce_summaries(
+            summaries,
+            (chunk_min, chunk_max),
+            (final_min, final_max),
+            map_fn=self._parallel_map,
+            final_fn=self._final_in_pool,
+        )
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
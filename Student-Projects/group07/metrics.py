@@ -0,0 +1,319 @@
+
+# metrics.py
+# In-process metrics for the summarization pipeline.
+#
+# The hot path (normalization, routing, tokenization, chunking, every
+# generate call, decoding, cache lookups) records counters and latency
+# histograms here. They are rendered in the Prometheus text exposition
+# format and served from a small local HTTP endpoint next to the bot:
+#
+#   curl http://127.0.0.1:9108/metrics
+#
+# Recording is a lock + a few dict updates, so it stays negligible next to
+# tokenization and generation. Metrics are per process: with inference
+# worker processes (BOT_CPU_WORKERS) the stage metrics of those workers
+# are not exported.
+#
+# Slow-request profiling is opt-in (SUMMARIZER_PROFILE_SLOW_MS): every
+# request is profiled and the profile is kept only when the request took
+# longer than the threshold.
+
+
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Port of the metrics endpoint (bound to localhost); 0 disables it
+METRICS_PORT = int(os.getenv("SUMMARIZER_METRICS_PORT", "9108"))
+METRICS_HOST = os.getenv("SUMMARIZER_METRICS_HOST", "127.0.0.1")
+
+# Requests slower than this are profiled to PROFILE_DIR; unset disables it
+PROFILE_SLOW_MS = float(os.getenv("SUMMARIZER_PROFILE_SLOW_MS", "0")) or None
+PROFILE_DIR = os.getenv("SUMMARIZER_PROFILE_DIR", "profiles")
+
+# "cprofile" (stdlib, .prof files for pstats/snakeviz) or "pyinstrument"
+# (optional dependency, .html call trees)
+PROFILER = os.getenv("SUMMARIZER_PROFILER", "cprofile")
+
+# Latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+# ---------- Registry ----------
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms with Prometheus text rendering.
+
+    Metrics are identified by name plus a label dict; the help text of a
+    name is given once with describe(). Collectors registered with
+    add_collector() are called at scrape time and return gauge samples,
+    e.g. cache sizes or scheduler queue depth.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # Per-bucket counts, then sum and count
+                hist = self._histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    def add_collector(self, fn):
+        """
+        fn() returns a list of (name, help_text, samples) gauges, where
+        samples is a list of (labels dict, value).
+        """
+        self._collectors.append(fn)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        """Clears counters and histograms (collectors are kept)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Prometheus text exposition (format 0.0.4) of every metric."""
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(hist) for key, hist in self._histograms.items()}
+
+        lines = []
+        for name, samples in _by_name(counters).items():
+            lines.extend(self._header(name, "counter"))
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, samples in _by_name(histograms).items():
+            lines.extend(self._header(name, "histogram"))
+            for labels, hist in samples:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, hist):
+                    cumulative += count
+                    bucket_labels = labels + (("le", _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                inf_labels = labels + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{_format_labels(inf_labels)} {hist[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(hist[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+
+        for collector in self._collectors:
+            try:
+                gauges = collector()
+            except Exception:
+                # A broken collector must not take the endpoint down
+                continue
+            for name, help_text, samples in gauges:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    labels = tuple(sorted(labels.items()))
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name, kind):
+        lines = []
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+        return lines
+
+
+def _by_name(metrics):
+    grouped = {}
+    for (name, labels), value in sorted(metrics.items()):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# Shared registry used by the pipeline
+registry = MetricsRegistry()
+
+registry.describe("summarizer_stage_seconds", "Time spent in each pipeline stage.")
+registry.describe("summarizer_request_seconds", "End-to-end summarization time per path.")
+registry.describe("summarizer_requests_total", "Summarization requests per path (direct / chunked).")
+registry.describe("summarizer_routes_total", "Routing decisions of length_router.")
+registry.describe("summarizer_input_tokens_total", "Input tokens per path.")
+registry.describe("summarizer_chunks_total", "Stage 1 chunks of chunked documents.")
+registry.describe("summarizer_reduce_levels_total", "Extra reduce levels over chunk summaries.")
+registry.describe("summarizer_generate_calls_total", "model.generate calls.")
+registry.describe("summarizer_generate_inputs_total", "Inputs passed to model.generate.")
+registry.describe("summarizer_batch_tokens_total", "Input tokens of generate batches (real vs padded).")
+registry.describe("summarizer_output_tokens_total", "Tokens generated (padding included).")
+registry.describe("summarizer_cache_lookups_total", "Summary / chunk cache lookups by result.")
+registry.describe("summarizer_slow_requests_total", "Requests above the profiling threshold.")
+
+
+# ---------- Recording helpers ----------
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Records the duration of the enclosed block as one pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("summarizer_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def record_cache_lookup(cache, hit):
+    registry.inc("summarizer_cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+
+
+# Set while a request span is profiling the current thread
+_profiling = threading.local()
+
+
+@contextmanager
+def request_span(path):
+    """
+    Times one summarization request end to end and counts it.
+
+    With PROFILE_SLOW_MS set, the request is profiled and the profile is
+    written to PROFILE_DIR if it took longer than the threshold. Nested
+    spans (e.g. a chunked request inside the scheduler) only time.
+    """
+
+    profiler = None
+    if PROFILE_SLOW_MS is not None and not getattr(_profiling, "active", False):
+        profiler = _start_profiler()
+        _profiling.active = profiler is not None
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.inc("summarizer_requests_total", path=path)
+        registry.observe("summarizer_request_seconds", elapsed, path=path)
+
+        if profiler is not None:
+            _profiling.active = False
+            _stop_profiler(profiler, path, elapsed)
+
+
+# ---------- Slow-request profiling ----------
+
+def _start_profiler():
+    if PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            return None
+        profiler = Profiler()
+    else:
+        profiler = cProfile.Profile()
+
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.enable()
+        else:
+            profiler.start()
+    except (RuntimeError, ValueError):
+        # Another profiler is already active in this thread
+        return None
+    return profiler
+
+
+def _stop_profiler(profiler, path, elapsed):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+    if 1000 * elapsed < PROFILE_SLOW_MS:
+        return
+
+    registry.inc("summarizer_slow_requests_total", path=path)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(
+        PROFILE_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{path}-{int(1000 * elapsed)}ms-{threading.get_ident()}"
+    )
+    if isinstance(profiler, cProfile.Profile):
+        profiler.dump_stats(stem + ".prof")
+    else:
+        with open(stem + ".html", "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+
+
+# ---------- HTTP endpoint ----------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the bot's stderr
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """
+    Serves /metrics from a daemon thread. Returns the server (call
+    shutdown() to stop it), or None when port is 0.
+    """
+
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
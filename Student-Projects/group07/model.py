@@ -2,18 +2,405 @@
 # model.py
 # This module loads the Persian summarization model and tokenizer.
 # It serves as the central NLP backbone shared across all other modules.
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+#
+# Loading is lazy: importing this module is cheap, the tokenizer is loaded
+# on the first get_tokenizer() call and the model on the first get_model()
+# call. Code that only routes text never pays for loading the model.
+import os
+import threading
+
+from length_buckets import LENGTH_BUCKETS, plan_batches, PerItemLengthProcessor
+from metrics import stage_timer, inc, record_cache_lookup
+from encoder_cache import encoder_cache, make_encoder_key
 
 
 # Define the model to use for Persian text summarization.
 # Model: "m3hrdadfi/bert2bert-fa-wiki-summary"
 # This transformer model is trained specifically on Persian Wikipedia data and designed for sequence‑to‑sequence summarization tasks.
-MODEL_NAME = "m3hrdadfi/bert2bert-fa-wiki-summary"
+# SUMMARIZER_MODEL may point to another model id or a local directory
+# (e.g. the tiny random model used by the offline benchmark suite).
+MODEL_NAME = os.getenv("SUMMARIZER_MODEL", "m3hrdadfi/bert2bert-fa-wiki-summary")
+
+
+# Inference backend, chosen with the SUMMARIZER_BACKEND environment variable:
+#   "torch" : eager full-precision PyTorch (default)
+#   "int8"  : PyTorch with dynamic int8 quantization of all Linear layers
+#   "onnx"  : ONNX Runtime encoder-decoder export with KV-cache
+#             (create it first with: python export_onnx.py)
+BACKENDS = ("torch", "int8", "onnx")
+BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")
+
+# Directory of the exported ONNX model (used by the "onnx" backend)
+ONNX_MODEL_DIR = os.getenv("SUMMARIZER_ONNX_DIR", "onnx_model")
+
+# Directory of the draft model for assisted decoding (the "assisted"
+# decoding profile); create it with: python build_draft_model.py
+DRAFT_MODEL_DIR = os.getenv("SUMMARIZER_DRAFT_MODEL", "draft_model")
+
+
+def load_model(backend=BACKEND):
+    """
+    Loads the summarization model for the given backend.
+    Every backend returns an object with a Hugging Face `generate` method.
+    """
+
+    from transformers import AutoModelForSeq2SeqLM
+
+    if backend == "torch":
+        return AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
+
+    elif backend == "int8":
+        import torch
+
+        base = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
+        base.eval()
+        return torch.quantization.quantize_dynamic(
+            base, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    elif backend == "onnx":
+        # Optional dependency: pip install optimum[onnxruntime]
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        if not os.path.isdir(ONNX_MODEL_DIR):
+            raise FileNotFoundError(
+                f"ONNX model not found in '{ONNX_MODEL_DIR}'. "
+                "Run `python export_onnx.py` first."
+            )
+        return ORTModelForSeq2SeqLM.from_pretrained(ONNX_MODEL_DIR, use_cache=True)
+
+    else:
+        raise ValueError(f"Invalid backend! Choose: {' | '.join(BACKENDS)}")
+
+
+def load_draft_model(backend=BACKEND):
+    """
+    Loads the draft model used by assisted decoding.
+    It must share the main model's tokenizer (see build_draft_model.py).
+    """
+
+    from transformers import AutoModelForSeq2SeqLM
+
+    if backend == "onnx":
+        raise ValueError("Assisted decoding needs a PyTorch backend (torch | int8)")
+    if not os.path.isdir(DRAFT_MODEL_DIR):
+        raise FileNotFoundError(
+            f"Draft model not found in '{DRAFT_MODEL_DIR}'. "
+            "Run `python build_draft_model.py` first."
+        )
+
+    draft = AutoModelForSeq2SeqLM.from_pretrained(DRAFT_MODEL_DIR)
+    draft.eval()
+    if backend == "int8":
+        import torch
 
+        draft = torch.quantization.quantize_dynamic(
+            draft, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return draft
 
-# Load the tokenizer and model from Hugging Face Transformers.
+
+# Lazily-initialized registry of the tokenizer and model.
 # The tokenizer converts input Persian text into tokens usable by the model.
 # The model generates the summarization output sequence.
-# They are loaded here once and imported by other modules,
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
+# Each is loaded once, on first use, and shared by all other modules.
+# Separate locks let routing use the tokenizer while the model still loads.
+_tokenizer = None
+_model = None
+_draft_model = None
+_tokenizer_lock = threading.Lock()
+_model_lock = threading.Lock()
+_draft_model_lock = threading.Lock()
+
+
+def get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            # Double-checked: another thread may have loaded it meanwhile
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    return _tokenizer
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model(BACKEND)
+    return _model
+
+
+def get_draft_model():
+    # Only loaded when a request actually uses the "assisted" profile
+    global _draft_model
+    if _draft_model is None:
+        with _draft_model_lock:
+            if _draft_model is None:
+                draft = load_draft_model(BACKEND)
+                # A draft built by build_draft_model.py has the main model's
+                # encoder: use the loaded one instead of a second copy
+                if getattr(draft.config, "draft_shares_encoder", False):
+                    draft.encoder = get_model().encoder
+                _draft_model = draft
+    return _draft_model
+
+
+def is_model_loaded():
+    return _model is not None
+
+
+def warm_up(background=True):
+    """
+    Loads the tokenizer and model ahead of the first request.
+    With background=True this returns immediately and loading happens
+    in a daemon thread (requests arriving meanwhile wait on the same lock).
+    """
+
+    def _load():
+        get_tokenizer()
+        get_model()
+
+    if not background:
+        _load()
+        return None
+
+    thread = threading.Thread(target=_load, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def init_worker_process(torch_threads):
+    """
+    Process-pool initializer for inference workers: splits the CPU cores
+    between workers instead of oversubscribing them, then loads this
+    worker's model replica once.
+    """
+
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    warm_up(background=False)
+
+
+# Number of sequences sent to model.generate in a single padded batch.
+# Larger batches amortize the per-call overhead of beam search on CPU,
+# at the cost of more memory per call.
+DEFAULT_BATCH_SIZE = 8
+
+# Decoding settings shared by every generate call.
+# (Also part of the summary cache key, so changing them invalidates old entries.)
+GENERATION_PARAMS = {
+    "no_repeat_ngram_size": 3,
+    "early_stopping": True,
+}
+
+
+def generate_summaries(texts, min_length, max_length, num_beams=4,
+                       batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Summarize several texts with padded, batched generate calls.
+
+    Parameters
+    ----------
+    texts : list of str
+        Already-normalized input texts.
+    min_length, max_length : int
+        Output length limits shared by every text in the call.
+    num_beams : int, optional (default=4)
+        Beam width used by beam search.
+    batch_size : int, optional (default=DEFAULT_BATCH_SIZE)
+        Maximum number of texts per generate call.
+        batch_size=1 reproduces the original one-call-per-text loop.
+
+    Returns
+    -------
+    list of str
+        One summary per input text, in input order.
+    """
+
+    tokenizer = get_tokenizer()
+    token_id_lists = [
+        tokenizer.encode(text, add_special_tokens=False) for text in texts
+    ]
+    return generate_summaries_from_ids(
+        token_id_lists, min_length, max_length,
+        num_beams=num_beams, batch_size=batch_size
+    )
+
+
+def with_special_tokens(tokenizer, token_ids):
+    """Model input of one sequence: [CLS] token_ids [SEP]."""
+    build = getattr(tokenizer, "build_inputs_with_special_tokens", None)
+    if build is not None:
+        return build(token_ids)
+    # transformers 5 tokenizers no longer have build_inputs_with_special_tokens
+    return [tokenizer.cls_token_id] + list(token_ids) + [tokenizer.sep_token_id]
+
+
+def generate_summaries_from_ids(token_id_lists, min_length, max_length,
+                                num_beams=4, batch_size=DEFAULT_BATCH_SIZE,
+                                decoding=None, buckets=LENGTH_BUCKETS):
+    """
+    Same as generate_summaries, but takes token IDs (without special tokens)
+    instead of text, so already-tokenized inputs are never decoded and
+    re-encoded. Each input is truncated to the 512-token model limit.
+
+    min_length and max_length are either one value for every input or a
+    list with one value per input (e.g. "auto" mode); inputs with different
+    limits still share generate calls.
+
+    decoding is an optional dict of generate arguments (a decoding profile,
+    see decoding.py) that overrides num_beams and GENERATION_PARAMS.
+    A profile with "assisted": True decodes greedily with the draft model
+    proposing tokens (one input per generate call).
+
+    Inputs are grouped into token-length buckets (see length_buckets.py) so
+    a micro-batch only pads up to its bucket; buckets=None keeps the input
+    order. Summaries are always returned in input order.
+    """
+
+    generate_kwargs = dict(GENERATION_PARAMS, num_beams=num_beams)
+    if decoding:
+        generate_kwargs.update(decoding)
+
+    assisted = generate_kwargs.pop("assisted", False)
+    if assisted:
+        # Hugging Face assisted generation verifies one sequence at a time
+        batch_size = 1
+        buckets = None
+
+    n_inputs = len(token_id_lists)
+    min_lengths = list(min_length) if isinstance(min_length, (list, tuple)) else [min_length] * n_inputs
+    max_lengths = list(max_length) if isinstance(max_length, (list, tuple)) else [max_length] * n_inputs
+
+    tokenizer = get_tokenizer()
+    model = get_model()
+    max_content = 512 - tokenizer.num_special_tokens_to_add()
+    inputs_ids = [
+        with_special_tokens(tokenizer, ids[:max_content])
+        for ids in token_id_lists
+    ]
+    summaries = [None] * n_inputs
+
+    for batch in plan_batches([len(ids) for ids in inputs_ids], batch_size, buckets):
+        # Pad only to the longest input inside this micro-batch
+        inputs = tokenizer.pad(
+            {"input_ids": [inputs_ids[i] for i in batch]},
+            padding=True,
+            return_tensors="pt"
+        )
+
+        batch_min = [min_lengths[i] for i in batch]
+        batch_max = [max_lengths[i] for i in batch]
+        if len(set(batch_min)) == 1 and len(set(batch_max)) == 1:
+            length_kwargs = {"min_length": batch_min[0], "max_length": batch_max[0]}
+        else:
+            # Per-input limits inside one call
+            # (min_length=0 overrides any default from the model's config)
+            length_kwargs = {
+                "min_length": 0,
+                "max_length": max(batch_max) + 1,
+                "logits_processor": [PerItemLengthProcessor(
+                    batch_min, batch_max, _eos_token_id(model, tokenizer),
+                    num_beams=generate_kwargs["num_beams"],
+                )],
+            }
+
+        # Encoder states of inputs seen before (e.g. another mode) are reused
+        encoder_outputs = encode_inputs(model, tokenizer, [inputs_ids[i] for i in batch], inputs)
+        if encoder_outputs is not None:
+            length_kwargs["encoder_outputs"] = encoder_outputs
+        if assisted:
+            # The draft model proposes tokens and the main model verifies them
+            length_kwargs["assistant_model"] = get_draft_model()
+
+        with stage_timer("generate"):
+            summary_ids = model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **length_kwargs,
+                **generate_kwargs
+            )
+
+        with stage_timer("decode"):
+            decoded = tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+        for i, summary in zip(batch, decoded):
+            summaries[i] = summary
+
+        inc("summarizer_generate_calls_total")
+        inc("summarizer_generate_inputs_total", len(batch))
+        inc("summarizer_batch_tokens_total", sum(len(inputs_ids[i]) for i in batch), kind="real")
+        inc("summarizer_batch_tokens_total", inputs["input_ids"].numel(), kind="padded")
+        inc("summarizer_output_tokens_total", summary_ids.numel())
+
+    return summaries
+
+
+def encode_inputs(model, tokenizer, input_id_lists, inputs):
+    """
+    Encoder outputs of one padded batch, reusing states from encoder_cache.
+
+    Parameters
+    ----------
+    model, tokenizer : objects returned by get_model() / get_tokenizer()
+    input_id_lists : list of list of int
+        The unpadded model inputs (special tokens included).
+    inputs : dict
+        Their padded batch ("input_ids" / "attention_mask" tensors).
+
+    Returns
+    -------
+    BaseModelOutput or None
+        To pass to generate as encoder_outputs; None when the cache is
+        disabled or cannot be used (ONNX backend, left padding), in which
+        case generate runs the encoder itself.
+    """
+
+    if not encoder_cache.enabled or BACKEND == "onnx" or tokenizer.padding_side != "right":
+        return None
+
+    import torch
+    from transformers.modeling_outputs import BaseModelOutput
+
+    keys = [make_encoder_key(ids) for ids in input_id_lists]
+    states = {}
+    for key in keys:
+        if key not in states:
+            states[key] = encoder_cache.get(key)
+            record_cache_lookup("encoder", states[key] is not None)
+
+    # One encoder row per distinct missing input (the same text may appear
+    # several times, e.g. once per mode)
+    rows = {}
+    for i, key in enumerate(keys):
+        if states[key] is None:
+            rows.setdefault(key, i)
+    if rows:
+        indices = list(rows.values())
+        with stage_timer("encode"), torch.no_grad():
+            hidden = model.get_encoder()(
+                input_ids=inputs["input_ids"][indices],
+                attention_mask=inputs["attention_mask"][indices],
+            ).last_hidden_state
+        for row, i in enumerate(indices):
+            # Only real positions are kept, so the entry fits any padded batch
+            state = hidden[row, :len(input_id_lists[i])].clone()
+            states[keys[i]] = state
+            encoder_cache.put(keys[i], state)
+
+    # Padded positions are masked out of cross-attention, so zeros are fine
+    first = states[keys[0]]
+    batch_states = first.new_zeros((len(keys), inputs["input_ids"].shape[1], first.shape[-1]))
+    for row, key in enumerate(keys):
+        batch_states[row, :states[key].shape[0]] = states[key]
+    return BaseModelOutput(last_hidden_state=batch_states)
+
+
+def _eos_token_id(model, tokenizer):
+    # bert2bert ends summaries with [SEP] when no EOS id is configured
+    config = getattr(model, "generation_config", None) or model.config
+    eos = getattr(config, "eos_token_id", None)
+    return eos if eos is not None else tokenizer.sep_token_id
@@ -3,15 +3,40 @@
 # This module provides text normalization utilities specifically
 # designed for Persian text.
 # The goal of preprocessing is to reduce noise and inconsistencies before the text is passed to the summarization model.
+#
+# The patterns and replacement tables are built once at import time.
+# Character replacements only run when the character is present, symbols
+# are removed with one precompiled regex, and whitespace is collapsed with
+# str.split/str.join instead of a second regex pass.
 
 
 import re
 
+
+# Arabic characters and their Persian equivalents
+ARABIC_TO_PERSIAN = {
+    'ي': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ؤ': 'و',
+    'إ': 'ا',
+    'أ': 'ا'
+}
+
+# Zero Width Non-Joiner (half-space)
+HALF_SPACE = '\u200c'
+
+# Unnecessary symbols (keep '.' and '?'); runs of symbols are removed in one match
+SYMBOLS_PATTERN = re.compile(r'[\"\'\(\)\[\]\{\}\*_,;:«»]+')
+
+_REPLACEMENTS = tuple(ARABIC_TO_PERSIAN.items())
+
+
 def normalize_persian_text(text, remove_half_space=True, remove_symbols=True):
     """
     Parameters
     ----------
-    text : str    
+    text : str
     remove_half_space : bool, optional (default=True)
         If True, removes the Zero Width Non-Joiner character (\u200c),
         replacing it with a regular space.
@@ -27,26 +52,32 @@ def normalize_persian_text(text, remove_half_space=True, remove_symbols=True):
     """
 
     # 1. Remove Zero Width Non-Joiner (half‑space)
-    if remove_half_space:
-        text = text.replace('\u200c', ' ')
+    if remove_half_space and HALF_SPACE in text:
+        text = text.replace(HALF_SPACE, ' ')
 
     # 2. Normalize Arabic characters to their Persian equivalents
-    replacements = {
-        'ي': 'ی',
-        'ك': 'ک',
-        'ة': 'ه',
-        'ؤ': 'و',
-        'إ': 'ا',
-        'أ': 'ا'
-    }
-    for src, tgt in replacements.items():
-        text = text.replace(src, tgt)
+    # (the `in` check is a fast scan; most Persian input has none of them)
+    for src, tgt in _REPLACEMENTS:
+        if src in text:
+            text = text.replace(src, tgt)
 
     # 3. Remove unnecessary symbols (keep '.' and '?')
     if remove_symbols:
-        text = re.sub(r'[\"\'\(\)\[\]\{\}\*_,;:«»]', '', text)
+        text = SYMBOLS_PATTERN.sub('', text)
 
     # 4. Normalize whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    # str.split() uses the same Unicode whitespace set as the regex \s
+    # and also drops leading/trailing whitespace
+    return ' '.join(text.split())
+
+
+def normalize_persian_texts(texts, remove_half_space=True, remove_symbols=True):
+    """
+    Batch version of normalize_persian_text: normalizes a list of texts
+    with the same options and returns a list in the same order.
+    """
 
-    return text
+    return [
+        normalize_persian_text(text, remove_half_space, remove_symbols)
+        for text in texts
+    ]
@@ -0,0 +1,256 @@
+
+# streaming.py
+# Token-by-token summary delivery for lower perceived latency.
+#
+# Generation runs in a worker thread and partial text is read from a
+# TextIteratorStreamer as soon as each token is decoded.
+# The decoding plan is selected as in the scheduler (decoding.py). Hugging
+# Face streamers do not support beam search, so tokens are only streamed
+# when the final profile is greedy (or assisted); a beam-search final pass
+# is generated whole and yielded once. For chunked documents, Stage 1
+# (chunk summaries) is reported as per-chunk progress, and the chunk
+# summaries are reduced until they fit one model input before the final pass.
+#
+# Events yielded by stream_summary():
+#   ("progress", (done_chunks, total_chunks))
+#   ("partial",  text_so_far)
+#   ("done",     final_summary)
+
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from model import (
+    get_tokenizer,
+    get_model,
+    get_draft_model,
+    with_special_tokens,
+    generate_summaries_from_ids,
+    encode_inputs,
+    GENERATION_PARAMS,
+    DEFAULT_BATCH_SIZE,
+)
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import get_direct_lengths
+from chunk_summarizer import (
+    chunk_document,
+    get_chunk_lengths,
+    summarize_chunks,
+    merge_summaries,
+)
+from decoding import get_profile, select_plan
+from summary_cache import summary_cache, make_key, hash_text
+from metrics import request_span, record_cache_lookup
+
+
+# Longest wait for the next token before a streamed request is abandoned
+STREAM_TOKEN_TIMEOUT = 60.0
+
+# Time-to-first-token of the most recent streamed requests (seconds)
+_ttft_history = deque(maxlen=1000)
+_ttft_lock = threading.Lock()
+
+
+def _stream_generate(token_ids, min_length, max_length, profile="greedy"):
+    """
+    Runs generate with a decoding profile in a background thread and
+    yields the accumulated summary text after every new token.
+
+    Beam-search profiles cannot be streamed: their summary is generated
+    in one call and yielded once.
+    """
+
+    decoding = dict(GENERATION_PARAMS, **get_profile(profile))
+    if decoding["num_beams"] > 1:
+        yield generate_summaries_from_ids(
+            [token_ids], min_length=min_length, max_length=max_length,
+            decoding=get_profile(profile)
+        )[0]
+        return
+
+    # Imported here so that importing this module stays cheap
+    import torch
+    from transformers import TextIteratorStreamer
+
+    tokenizer = get_tokenizer()
+    max_content = 512 - tokenizer.num_special_tokens_to_add()
+    model_input = with_special_tokens(tokenizer, token_ids[:max_content])
+    input_ids = torch.tensor([model_input])
+    attention_mask = torch.ones_like(input_ids)
+
+    # Reuses the encoder states when this text was summarized before
+    model = get_model()
+    encoder_kwargs = {}
+    encoder_outputs = encode_inputs(
+        model, tokenizer, [model_input],
+        {"input_ids": input_ids, "attention_mask": attention_mask},
+    )
+    if encoder_outputs is not None:
+        encoder_kwargs["encoder_outputs"] = encoder_outputs
+    if decoding.pop("assisted", False):
+        # The draft model proposes tokens and the main model verifies them
+        encoder_kwargs["assistant_model"] = get_draft_model()
+
+    # skip_prompt drops the decoder start token echoed by generate;
+    # timeout stops the reader from waiting forever on a stalled generate
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True,
+        timeout=STREAM_TOKEN_TIMEOUT,
+    )
+
+    errors = []
+
+    def generate():
+        try:
+            model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                min_length=min_length,
+                max_length=max_length,
+                streamer=streamer,
+                **encoder_kwargs,
+                **decoding,
+            )
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            # Ends the iteration below even when generate failed
+            streamer.end()
+
+    worker = threading.Thread(target=generate, daemon=True)
+    worker.start()
+
+    text = ""
+    try:
+        for piece in streamer:
+            text += piece
+            if piece.strip():
+                yield text.strip()
+    except queue.Empty:
+        raise TimeoutError(
+            f"No token generated for {STREAM_TOKEN_TIMEOUT:.0f}s"
+        ) from None
+
+    worker.join()
+    if errors:
+        raise errors[0]
+
+
+def stream_summary(text, mode, batch_size=DEFAULT_BATCH_SIZE, budget_ms=None, plan=None):
+    """
+    Generator of (event, payload) tuples for one summarization request.
+    `text` may be a str or an already PreparedDocument.
+
+    budget_ms and plan select the decoding plan as in summarize_chunked;
+    without either the default plan (beam search) is used.
+    """
+
+    start = time.perf_counter()
+    first_token_seen = False
+    tokenizer = get_tokenizer()
+    doc = text if isinstance(text, PreparedDocument) else PreparedDocument(text, tokenizer)
+
+    is_long = is_long_text(doc, tokenizer)
+    chunks = chunk_document(doc) if is_long else []
+    if plan is None:
+        plan = select_plan(budget_ms, n_chunks=len(chunks), batch_size=batch_size)
+    intermediate_profile, final_profile = plan
+
+    # Streamed summaries are cached apart from the scheduler's
+    cache_key = make_key("summary", hash_text(doc.text), mode, "stream", *plan)
+    cached = summary_cache.get(cache_key)
+    record_cache_lookup("summary", cached is not None)
+    if cached is not None:
+        _record_ttft(time.perf_counter() - start)
+        yield "done", cached
+        return
+
+    if is_long:
+        (chunk_min, chunk_max), (min_len, max_len) = get_chunk_lengths(
+            mode, input_len=doc.num_tokens
+        )
+
+        map_fn = partial(summarize_chunks, batch_size=batch_size, profile=intermediate_profile)
+
+        # -------- Stage 1: per-chunk progress --------
+        intermediate_summaries = []
+        yield "progress", (0, len(chunks))
+        for i in range(0, len(chunks), batch_size):
+            intermediate_summaries.extend(
+                map_fn(chunks[i:i + batch_size], chunk_min, chunk_max)
+            )
+            yield "progress", (len(intermediate_summaries), len(chunks))
+
+        # Reduce levels until the merged summaries fit the model window
+        final_ids = merge_summaries(
+            intermediate_summaries, (chunk_min, chunk_max), map_fn=map_fn
+        )
+    else:
+        min_len, max_len = get_direct_lengths(mode, min(doc.num_tokens, 512))
+        final_ids = doc.token_ids
+
+    # -------- Streamed final pass --------
+    summary = ""
+    for summary in _stream_generate(final_ids, min_len, max_len, final_profile):
+        if not first_token_seen:
+            first_token_seen = True
+            _record_ttft(time.perf_counter() - start)
+        yield "partial", summary
+
+    summary_cache.put(cache_key, summary)
+    yield "done", summary
+
+
+async def astream_summary(text, mode):
+    """
+    Async wrapper around stream_summary for the bot.
+    The generator runs in a worker thread; events are forwarded to the
+    event loop through an asyncio queue, so the loop is never blocked.
+    """
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    finished = object()
+
+    def produce():
+        try:
+            with request_span("streamed"):
+                for event in stream_summary(text, mode):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+        except Exception as exc:
+            loop.call_soon_threadsafe(events.put_nowait, ("error", exc))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, finished)
+
+    threading.Thread(target=produce, name="summary-stream", daemon=True).start()
+
+    while True:
+        event = await events.get()
+        if event is finished:
+            return
+        if event[0] == "error":
+            raise event[1]
+        yield event
+
+
+def _record_ttft(seconds):
+    with _ttft_lock:
+        _ttft_history.append(seconds)
+
+
+def streaming_metrics():
+    """Time-to-first-token statistics (ms) over recent streamed requests."""
+    with _ttft_lock:
+        values = sorted(_ttft_history)
+    if not values:
+        return {"requests": 0, "ttft_p50_ms": 0.0, "ttft_p95_ms": 0.0}
+    return {
+        "requests": len(values),
+        "ttft_p50_ms": 1000 * values[len(values) // 2],
+        "ttft_p95_ms": 1000 * values[int(0.95 * (len(values) - 1))],
+    }
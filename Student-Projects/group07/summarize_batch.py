@@ -0,0 +1,332 @@
+
+# summarize_batch.py
+# Offline batch summarization of Persian corpora (JSONL or CSV).
+#
+#   1) Records are streamed from the input file, a window at a time
+#   2) Each window is tokenized once and split into batches by token-length
+#      bucket, so the texts padded into one generate batch have similar lengths
+#   3) Batches run in-process or on a pool of worker processes
+#      (one model replica per worker)
+#   4) Every finished batch is appended to the output JSONL and flushed
+#
+# The output file is also the checkpoint: on restart, ids already present
+# in it are skipped, so an interrupted run resumes where it stopped.
+#
+# Usage:
+#   python summarize_batch.py articles.jsonl --out summaries.jsonl --mode medium
+#   python summarize_batch.py articles.csv --text_field body --id_field url \
+#       --out summaries.jsonl --workers 3
+
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from model import (
+    get_tokenizer,
+    generate_summaries_from_ids,
+    init_worker_process,
+    DEFAULT_BATCH_SIZE,
+)
+from document import PreparedDocument
+from length_router import is_long_text
+from direct_summarizer import get_direct_lengths
+from chunk_summarizer import summarize_chunked
+from decoding import get_profile, select_plan
+from length_buckets import plan_batches
+
+
+# Records tokenized and sorted together
+DEFAULT_SORT_WINDOW = 1024
+
+# Seconds between two progress lines
+PROGRESS_INTERVAL_S = 30
+
+
+# ---------- Input / output ----------
+
+def detect_format(path, fmt=None):
+    """Returns "jsonl" or "csv" (from `fmt` or the file extension)."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt in ("jsonl", "json", "ndjson"):
+        return "jsonl"
+    if fmt in ("csv", "tsv"):
+        return fmt
+    raise ValueError("Unknown input format! Choose: jsonl | csv | tsv")
+
+
+def read_records(path, fmt, text_field="text", id_field="id"):
+    """
+    Streams (doc_id, text) pairs from a JSONL/CSV file.
+    Records without `id_field` use their row number as id.
+    Empty texts are skipped.
+    """
+
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            # Articles can be longer than the default 128 KB field limit
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(f, delimiter="\t" if fmt == "tsv" else ",")
+
+        for row_number, row in enumerate(rows):
+            text = row.get(text_field)
+            if not text:
+                continue
+            yield str(row.get(id_field, row_number)), text
+
+
+def read_done_ids(out_path):
+    """
+    Ids already summarized in `out_path`. A half-written last line
+    (from a crash during a write) is cut off so appending stays valid JSONL.
+    """
+
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+
+    valid_bytes = 0
+    with open(out_path, "rb") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+
+    if valid_bytes < os.path.getsize(out_path):
+        with open(out_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+# ---------- Work units ----------
+
+def make_units(docs, mode, batch_size):
+    """
+    Splits one window of (doc_id, PreparedDocument) into work units:
+      ("direct", items, lengths) : up to batch_size short texts from one
+                                   token-length bucket, with one
+                                   (min_len, max_len) per text
+      ("chunked", [item], None)  : one long text
+    """
+
+    tokenizer = get_tokenizer()
+    short = []
+    units = []
+    for doc_id, doc in docs:
+        if is_long_text(doc, tokenizer):
+            units.append(("chunked", [(doc_id, doc)], None))
+        else:
+            short.append((doc_id, doc))
+
+    input_lens = [min(doc.num_tokens, 512) for _, doc in short]
+    for indices in plan_batches(input_lens, batch_size):
+        units.append((
+            "direct",
+            [short[i] for i in indices],
+            [get_direct_lengths(mode, input_lens[i]) for i in indices],
+        ))
+    return units
+
+
+def summarize_unit(kind, items, lengths, mode, batch_size=DEFAULT_BATCH_SIZE, budget_ms=None,
+                   extractive_budget=None):
+    """
+    Summarizes one work unit (in the calling process or a pool worker).
+    Returns a list of (doc_id, input tokens, summary).
+    """
+
+    if kind == "direct":
+        _, final_profile = select_plan(budget_ms)
+        summaries = generate_summaries_from_ids(
+            [doc.token_ids for _, doc in items],
+            min_length=[min_len for min_len, _ in lengths],
+            max_length=[max_len for _, max_len in lengths],
+            batch_size=batch_size,
+            decoding=get_profile(final_profile),
+        )
+    else:
+        summaries = [
+            summarize_chunked(doc, mode, batch_size=batch_size, budget_ms=budget_ms,
+                              extractive_budget=extractive_budget)
+            for _, doc in items
+        ]
+    return [(doc_id, doc.num_tokens, summary) for (doc_id, doc), summary in zip(items, summaries)]
+
+
+def iter_units(records, done, mode, batch_size, sort_window):
+    """Reads records a window at a time and yields the window's work units."""
+
+    tokenizer = get_tokenizer()
+    window = []
+    for doc_id, text in records:
+        if doc_id in done:
+            continue
+        window.append((doc_id, PreparedDocument(text, tokenizer)))
+        if len(window) >= sort_window:
+            yield from make_units(window, mode, batch_size)
+            window = []
+    if window:
+        yield from make_units(window, mode, batch_size)
+
+
+# ---------- Runner ----------
+
+class BatchStats:
+    """Throughput counters (docs/s and input tokens/s)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.docs = 0
+        self.tokens = 0
+        self.failed = 0
+        self._last_report = self.start
+
+    def add(self, results):
+        self.docs += len(results)
+        self.tokens += sum(n_tokens for _, n_tokens, _ in results)
+
+    def line(self):
+        elapsed = time.perf_counter() - self.start
+        return (
+            f"docs={self.docs} failed={self.failed} elapsed={elapsed:.1f}s "
+            f"docs/s={self.docs / elapsed:.2f} tokens/s={self.tokens / elapsed:.0f}"
+        )
+
+    def maybe_report(self):
+        now = time.perf_counter()
+        if now - self._last_report >= PROGRESS_INTERVAL_S:
+            self._last_report = now
+            print(self.line(), flush=True)
+
+
+def write_results(out_file, results, mode):
+    for doc_id, n_tokens, summary in results:
+        out_file.write(json.dumps(
+            {"id": doc_id, "mode": mode, "tokens": n_tokens, "summary": summary},
+            ensure_ascii=False,
+        ) + "\n")
+    # Results on disk are the checkpoint, so make them durable per unit
+    out_file.flush()
+    os.fsync(out_file.fileno())
+
+
+def run_batch(in_path, out_path, mode="medium", fmt=None, text_field="text",
+              id_field="id", batch_size=DEFAULT_BATCH_SIZE, workers=1,
+              sort_window=DEFAULT_SORT_WINDOW, budget_ms=None, extractive_budget=None):
+    """
+    Summarizes every record of `in_path` into `out_path` (JSONL),
+    resuming from the records already present in `out_path`.
+    Returns the final BatchStats.
+    """
+
+    fmt = detect_format(in_path, fmt)
+    done = read_done_ids(out_path)
+    if done:
+        print(f"Resuming: {len(done)} documents already summarized", flush=True)
+
+    records = read_records(in_path, fmt, text_field, id_field)
+    units = iter_units(records, done, mode, batch_size, sort_window)
+    stats = BatchStats()
+
+    with open(out_path, "a", encoding="utf-8") as out_file:
+        if workers <= 1:
+            for kind, items, lengths in units:
+                try:
+                    results = summarize_unit(
+                        kind, items, lengths, mode, batch_size, budget_ms, extractive_budget
+                    )
+                except Exception as exc:
+                    stats.failed += len(items)
+                    print(f"Failed {[doc_id for doc_id, _ in items]}: {exc}", file=sys.stderr)
+                    continue
+                write_results(out_file, results, mode)
+                stats.add(results)
+                stats.maybe_report()
+            return stats
+
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        # "spawn" avoids forking a process that already holds torch threads
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker_process,
+            initargs=(torch_threads,),
+        ) as pool:
+            # Keep a bounded number of units in flight so reading and
+            # tokenizing stay just ahead of the workers
+            pending = {}
+            units = iter(units)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < 2 * workers:
+                    unit = next(units, None)
+                    if unit is None:
+                        exhausted = True
+                        break
+                    kind, items, lengths = unit
+                    future = pool.submit(
+                        summarize_unit, kind, items, lengths, mode, batch_size, budget_ms,
+                        extractive_budget
+                    )
+                    pending[future] = items
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    items = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as exc:
+                        stats.failed += len(items)
+                        print(f"Failed {[doc_id for doc_id, _ in items]}: {exc}", file=sys.stderr)
+                        continue
+                    write_results(out_file, results, mode)
+                    stats.add(results)
+                stats.maybe_report()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a JSONL/CSV corpus of Persian texts.")
+    parser.add_argument("input", type=str, help="Input .jsonl, .csv or .tsv file.")
+    parser.add_argument("--out", type=str, required=True, help="Output JSONL (also the checkpoint).")
+    parser.add_argument("--format", type=str, default=None, help="jsonl | csv | tsv (default: from extension).")
+    parser.add_argument("--mode", type=str, default="medium", help="short | medium | long | auto")
+    parser.add_argument("--text_field", type=str, default="text")
+    parser.add_argument("--id_field", type=str, default="id")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (one model each).")
+    parser.add_argument("--sort_window", type=int, default=DEFAULT_SORT_WINDOW,
+                        help="Records sorted by length together.")
+    parser.add_argument("--budget_ms", type=float, default=None,
+                        help="Per-document latency budget (selects the decoding plan).")
+    parser.add_argument("--extractive_budget", type=int, default=None,
+                        help="Keep only the top sentences of long texts, up to this many tokens.")
+    args = parser.parse_args()
+
+    stats = run_batch(
+        args.input, args.out,
+        mode=args.mode,
+        fmt=args.format,
+        text_field=args.text_field,
+        id_field=args.id_field,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        sort_window=args.sort_window,
+        budget_ms=args.budget_ms,
+        extractive_budget=args.extractive_budget,
+    )
+    print("Done: " + stats.line())
+
+
+if __name__ == "__main__":
+    main()
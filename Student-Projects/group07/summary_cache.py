@@ -0,0 +1,164 @@
+
+# summary_cache.py
+# Content-addressed cache for generated summaries.
+#
+# Users often ask for the same text again in another mode (change_mode,
+# history items). Summaries are keyed by a hash of the normalized input
+# plus everything that affects the output (mode, model, backend, generation params),
+# so identical requests never run beam search twice.
+#
+# Two tiers:
+#   1) In-memory LRU, bounded by the total size of the stored summaries
+#   2) Optional SQLite tier that survives bot restarts
+#
+# Two caches are used by the pipeline:
+#   - summary_cache : final summaries (per text + mode)
+#   - chunk_cache   : Stage 1 chunk summaries (per chunk + length limits),
+#                     so switching mode reuses chunks whose lengths match
+
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from model import MODEL_NAME, BACKEND, GENERATION_PARAMS
+
+
+# Memory budget of each in-memory tier (bytes of stored keys + summaries)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Path of the SQLite disk tier; disabled when the variable is not set
+CACHE_DB_PATH = os.getenv("SUMMARY_CACHE_DB")
+
+
+def hash_text(text):
+    """SHA-256 of a normalized text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_token_ids(token_ids):
+    """SHA-256 of a token-ID sequence."""
+    return hashlib.sha256(",".join(map(str, token_ids)).encode("ascii")).hexdigest()
+
+
+def make_key(*parts):
+    """
+    Builds a cache key from the content hash and every output-affecting
+    parameter. Parts must be JSON-serializable.
+    """
+    payload = json.dumps(
+        [MODEL_NAME, BACKEND, GENERATION_PARAMS, *parts],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Two-tier (memory LRU + optional SQLite) string cache.
+
+    Parameters
+    ----------
+    max_bytes : int, optional (default=DEFAULT_MAX_BYTES)
+        Upper bound for the in-memory tier. Least recently used
+        entries are evicted once it is exceeded.
+    db_path : str, optional
+        SQLite file for the disk tier. None disables it.
+    table : str, optional (default="summaries")
+        Table name, so several caches can share one database file.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, db_path=None, table="summaries"):
+        self.max_bytes = max_bytes
+        self.table = table
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _size(key, value):
+        return len(key) + len(value.encode("utf-8"))
+
+    def _remember(self, key, value):
+        # Insert into the memory tier and evict from the LRU end if needed
+        if key in self._entries:
+            self._bytes -= self._size(key, self._entries.pop(key))
+        self._entries[key] = value
+        self._bytes += self._size(key, value)
+
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_value)
+            self._stats["evictions"] += 1
+
+    def get(self, key):
+        """Returns the cached summary or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                    (key, value),
+                )
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss/eviction counters and current memory usage."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Empties the memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Shared caches used by the pipeline
+summary_cache = SummaryCache(db_path=CACHE_DB_PATH, table="summaries")
+chunk_cache = SummaryCache(db_path=CACHE_DB_PATH, table="chunk_summaries")
@@ -7,17 +7,82 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
+from telegram.error import BadRequest
 from datetime import datetime
+import logging
+import os
+import time
 
 # --- NLP imports ---
-from direct_summarizer import summarize_direct
-from chunk_summarizer import summarize_chunked
-from length_router import is_long_text
-from model import tokenizer
+from model import warm_up
+from inference_scheduler import InferenceScheduler
+from streaming import astream_summary, streaming_metrics
+from history_store import SQLiteHistoryStore, HISTORY_PAGE_SIZE
+from execution import ExecutionLayer, UserBusyError, QueueFullError, summarize_text
+from summary_cache import summary_cache, chunk_cache
+from encoder_cache import encoder_cache
+from metrics import registry, start_metrics_server
 
 
-# In-memory user storage
-user_data_store = {}
+# Persistent per-user history (capped, compressed, paginated)
+history_store = SQLiteHistoryStore()
+
+# Runs inference on a worker thread and batches concurrent requests,
+# so the event loop keeps serving other chats during generation
+scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=20)
+
+# Thread pool for blocking I/O (history reads and writes), optional inference
+# processes (BOT_CPU_WORKERS) and per-user / global admission limits
+execution = ExecutionLayer()
+
+# Stream partial summaries into the message while they are generated
+# (BOT_STREAMING=1). Off by default: requests go through the scheduler
+# (or the BOT_CPU_WORKERS processes) with the default beam-search plan.
+# Streamed requests use the same decoding plan; tokens only appear one by
+# one when its final profile is greedy (e.g. SUMMARIZER_ASSISTED=1), since
+# beam search cannot be streamed.
+STREAMING = os.getenv("BOT_STREAMING", "0") == "1"
+
+# Minimum seconds between two edits of the same message (Telegram rate limits)
+STREAM_EDIT_INTERVAL = 1.5
+
+
+# Streamed summarization
+
+async def stream_to_message(query, text, mode):
+    """
+    Edits the callback message with per-chunk progress and partial
+    summaries, at most once every STREAM_EDIT_INTERVAL seconds.
+    Returns the final summary.
+    """
+
+    last_edit = 0.0
+    last_shown = None
+    summary = ""
+
+    async for event, payload in astream_summary(text, mode):
+        if event == "done":
+            summary = payload
+            continue
+
+        if event == "progress":
+            done, total = payload
+            shown = f"⏳ خلاصه‌سازی بخش‌ها: {done}/{total}"
+        else:
+            shown = f"✍️ خلاصه ({mode}):\n\n{payload} ▌"
+
+        now = time.monotonic()
+        if shown == last_shown or now - last_edit < STREAM_EDIT_INTERVAL:
+            continue
+
+        try:
+            await query.edit_message_text(shown)
+        except BadRequest:
+            # e.g. "message is not modified"; the next update will retry
+            pass
+        last_edit, last_shown = now, shown
+
+    return summary
 
 
 # /start
@@ -33,13 +98,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def receive_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
-    user_id = update.message.from_user.id
-
     context.user_data["current_text"] = text
 
-    if user_id not in user_data_store:
-        user_data_store[user_id] = []
-
     keyboard = [
         [
             InlineKeyboardButton("Short", callback_data="mode_short"),
@@ -70,22 +130,34 @@ async def handle_mode(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text(" متنی برای خلاصه‌سازی یافت نشد.")
         return
 
+    user_id = query.from_user.id
+
     # --- Summarization ---
-    if is_long_text(text, tokenizer):
-        summary = summarize_chunked(text, mode=mode)
-    else:
-        summary = summarize_direct(text, mode=mode)
+    # Routing (direct vs chunked) happens inside the scheduler / streamer.
+    # Over the per-user or global limit, the request is rejected right away
+    # and the mode keyboard stays usable for a retry. Any other failure
+    # (generation, worker process) is logged and reported to the user.
+    try:
+        async with execution.admit(user_id):
+            if STREAMING:
+                summary = await stream_to_message(query, text, mode)
+            elif execution.cpu_workers:
+                summary = await execution.run_cpu(summarize_text, text, mode)
+            else:
+                summary = await scheduler.submit(text, mode)
+    except UserBusyError:
+        await query.message.reply_text("⏳ خلاصهٔ قبلی شما هنوز در حال ساخت است؛ کمی صبر کن.")
+        return
+    except QueueFullError:
+        await query.message.reply_text("🚦 ربات در حال حاضر شلوغ است؛ چند لحظه بعد دوباره امتحان کن.")
+        return
+    except Exception as e:
+        logging.error(f"Summarization failed for user {user_id}: {e}")
+        await query.message.reply_text("❌ خطایی در ساخت خلاصه رخ داد؛ دوباره امتحان کن.")
+        return
 
     # --- Save history ---
-    user_id = query.from_user.id
-    timestamp = datetime.now().strftime("%H:%M | %Y-%m-%d")
-
-    user_data_store[user_id].append({
-        "text": text,
-        "summary": summary,
-        "mode": mode,
-        "time": timestamp
-    })
+    await execution.run_io(history_store.add, user_id, text, summary, mode)
 
     # --- Save last summary for navigation ---
     context.user_data["last_summary"] = summary
@@ -152,26 +224,61 @@ async def back_to_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # Show history
 
+def format_time(created_at):
+    # created_at is in milliseconds since the epoch
+    return datetime.fromtimestamp(created_at / 1000).strftime("%H:%M | %Y-%m-%d")
+
+
 async def show_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
     user_id = query.from_user.id
-    history = user_data_store.get(user_id, [])
 
-    if not history:
+    # callback_data: "history" (newest page) or
+    # "histpage_<older|newer>_<created_at>_<id>" (page next to a cursor)
+    before = after = None
+    if query.data.startswith("histpage_"):
+        _, direction, created_at, item_id = query.data.split("_")
+        cursor = (int(created_at), int(item_id))
+        if direction == "older":
+            before = cursor
+        else:
+            after = cursor
+
+    items, has_older, has_newer = await execution.run_io(
+        history_store.page, user_id, before=before, after=after, limit=HISTORY_PAGE_SIZE
+    )
+
+    if not items:
         await query.edit_message_text("🕘 تاریخچه‌ای وجود ندارد.")
         return
 
     keyboard = []
-    for i, item in enumerate(history):
+    for item in items:
         keyboard.append([
             InlineKeyboardButton(
-                f"{item['time']} | {item['mode']}",
-                callback_data=f"hist_{i}",
+                f"{format_time(item['created_at'])} | {item['mode']}",
+                callback_data=f"hist_{item['id']}",
             )
         ])
 
+    navigation = []
+    if has_newer:
+        first = items[0]
+        navigation.append(InlineKeyboardButton(
+            "⬅️ جدیدتر",
+            callback_data=f"histpage_newer_{first['created_at']}_{first['id']}",
+        ))
+    if has_older:
+        last = items[-1]
+        navigation.append(InlineKeyboardButton(
+            "قدیمی‌تر ➡️",
+            callback_data=f"histpage_older_{last['created_at']}_{last['id']}",
+        ))
+    if navigation:
+        keyboard.append(navigation)
+
     keyboard.append([
         InlineKeyboardButton("🔙 بازگشت", callback_data="back_to_summary")
     ])
@@ -189,9 +296,18 @@ async def show_history_item(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = query.from_user.id
-    index = int(query.data.replace("hist_", ""))
-
-    item = user_data_store[user_id][index]
+    item_id = int(query.data.replace("hist_", ""))
+
+    item = await execution.run_io(history_store.get, user_id, item_id)
+    if item is None:
+        # Dropped from the capped history meanwhile
+        await query.edit_message_text(
+            "🕘 این مورد دیگر در تاریخچه نیست.",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔙 بازگشت", callback_data="history")]
+            ]),
+        )
+        return
 
     context.user_data["current_text"] = item["text"]
     context.user_data["last_summary"] = item["summary"]
@@ -222,10 +338,77 @@ async def new_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+# Metrics endpoint
+
+def bot_gauges():
+    """Scrape-time gauges: scheduler, admission control, caches, streaming."""
+
+    scheduler_stats = scheduler.metrics()
+    execution_stats = execution.metrics()
+    stream_stats = streaming_metrics()
+    caches = {
+        "summary": summary_cache.stats(),
+        "chunk": chunk_cache.stats(),
+        "encoder": encoder_cache.stats(),
+    }
+
+    return [
+        ("summarizer_scheduler_queue_depth", "Requests waiting for the inference thread.",
+         [({}, scheduler_stats["queue_depth"])]),
+        ("summarizer_scheduler_avg_batch_size", "Average direct micro-batch size.",
+         [({}, scheduler_stats["avg_batch_size"])]),
+        ("summarizer_scheduler_avg_latency_ms", "Average scheduler latency (enqueue to result).",
+         [({}, scheduler_stats["avg_latency_ms"])]),
+        ("summarizer_pending_requests", "Requests admitted and not finished.",
+         [({}, execution_stats["pending"])]),
+        ("summarizer_rejected_requests", "Requests rejected by admission control since start.",
+         [({"reason": reason}, execution_stats[f"rejected_{reason}"])
+          for reason in ("user_busy", "queue_full")]),
+        ("summarizer_cache_entries", "Entries in the in-memory cache tier.",
+         [({"cache": name}, stats["entries"]) for name, stats in caches.items()]),
+        ("summarizer_cache_bytes", "Bytes held by the in-memory cache tier.",
+         [({"cache": name}, stats["bytes"]) for name, stats in caches.items()]),
+        ("summarizer_cache_hit_rate", "Hit rate of the cache since start.",
+         [({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()]),
+        ("summarizer_stream_ttft_ms", "Time to first streamed token over recent requests.",
+         [({"quantile": "0.5"}, stream_stats["ttft_p50_ms"]),
+          ({"quantile": "0.95"}, stream_stats["ttft_p95_ms"])]),
+    ]
+
+
+registry.add_collector(bot_gauges)
+
+
 # Main
 
+async def start_scheduler(app):
+    # Load the model in the background so the first user isn't penalized
+    # (non-streamed requests in inference processes use their own replicas)
+    if STREAMING or not execution.cpu_workers:
+        warm_up(background=True)
+    scheduler.start()
+    execution.start()
+    app.bot_data["metrics_server"] = start_metrics_server()
+
+
+async def stop_scheduler(app):
+    metrics_server = app.bot_data.get("metrics_server")
+    if metrics_server is not None:
+        metrics_server.shutdown()
+    scheduler.stop()
+    execution.shutdown()
+    history_store.close()
+
+
 def main():
-    app = ApplicationBuilder().token("YOUR_TELEGRAM_BOT_TOKEN").build()
+    app = (
+        ApplicationBuilder()
+        .token("YOUR_TELEGRAM_BOT_TOKEN")
+        .concurrent_updates(True)
+        .post_init(start_scheduler)
+        .post_shutdown(stop_scheduler)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(
@@ -237,6 +420,7 @@ def main():
         back_to_summary, pattern="^back_to_summary$"))
 
     app.add_handler(CallbackQueryHandler(show_history, pattern="^history$"))
+    app.add_handler(CallbackQueryHandler(show_history, pattern="^histpage_"))
     app.add_handler(CallbackQueryHandler(show_history_item, pattern="^hist_"))
     app.add_handler(CallbackQueryHandler(new_summary, pattern="^new$"))
 
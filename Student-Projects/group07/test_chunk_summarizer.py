@@ -0,0 +1,47 @@
+
+# test_chunk_summarizer.py
+# Length-control tests: auto mode must stay within the model's window for
+# inputs of any size, and long texts must summarize end to end.
+#
+# Run from the group07 directory:
+#   python -m pytest -q test_chunk_summarizer.py
+
+
+import pytest
+
+import model
+from benchmarks.common import make_document
+from benchmarks.make_tiny_model import make_tiny_model
+from chunk_summarizer import (
+    MAX_FINAL_TOKENS,
+    MAX_SUMMARY_TOKENS,
+    get_chunk_lengths,
+    summarize_chunked,
+)
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    # Swap the registry to a small random model so generate runs quickly
+    out_dir = make_tiny_model(str(tmp_path_factory.mktemp("tiny_model")))
+    saved = model.MODEL_NAME, model._tokenizer, model._model
+    model.MODEL_NAME, model._tokenizer, model._model = out_dir, None, None
+    yield model.get_tokenizer()
+    model.MODEL_NAME, model._tokenizer, model._model = saved
+
+
+@pytest.mark.parametrize("input_len", [100, 1000, 4000, 15000])
+def test_auto_lengths_are_bounded(input_len):
+    (chunk_min, chunk_max), (final_min, final_max) = get_chunk_lengths(
+        "auto", input_len=input_len
+    )
+    assert chunk_min <= chunk_max <= MAX_SUMMARY_TOKENS
+    assert final_min <= final_max <= MAX_FINAL_TOKENS
+
+
+def test_auto_mode_summarizes_long_text(tiny_model):
+    text = make_document(4500, tiny_model, seed=0)
+    assert len(tiny_model.encode(text, add_special_tokens=False)) > 4000
+
+    summary = summarize_chunked(text, "auto", plan=("greedy", "greedy"))
+    assert isinstance(summary, str)
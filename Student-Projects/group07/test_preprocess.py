@@ -0,0 +1,90 @@
+
+# test_preprocess.py
+# Equivalence tests: the single-pass normalizer must produce exactly the
+# same output as the original multi-pass implementation.
+#
+# Run from the group07 directory:
+#   python -m pytest -q test_preprocess.py
+
+
+import random
+import re
+
+import pytest
+
+from preprocess import normalize_persian_text, normalize_persian_texts
+
+
+def reference_normalize(text, remove_half_space=True, remove_symbols=True):
+    # The original implementation, kept verbatim as the oracle
+    if remove_half_space:
+        text = text.replace('\u200c', ' ')
+    replacements = {
+        'ي': 'ی',
+        'ك': 'ک',
+        'ة': 'ه',
+        'ؤ': 'و',
+        'إ': 'ا',
+        'أ': 'ا'
+    }
+    for src, tgt in replacements.items():
+        text = text.replace(src, tgt)
+    if remove_symbols:
+        text = re.sub(r'[\"\'\(\)\[\]\{\}\*_,;:«»]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+# Characters that exercise every normalization rule
+ALPHABET = (
+    "abc سلامدنیا"
+    "يكةؤإأیکهوا"
+    "\"'()[]{}*_,;:«»"
+    ".?؟!-"
+    "\u200c \t\n\r\x0b\x0c\xa0\u2009\u3000\x1c\u2028"
+)
+
+OPTIONS = [(h, s) for h in (True, False) for s in (True, False)]
+
+
+def random_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 80)))
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize("remove_half_space,remove_symbols", OPTIONS)
+def test_matches_reference_on_random_text(remove_half_space, remove_symbols):
+    for text in random_texts(2000):
+        assert normalize_persian_text(
+            text, remove_half_space, remove_symbols
+        ) == reference_normalize(text, remove_half_space, remove_symbols)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "\u200c",
+    "كتاب\u200cهاي «جديد» (چاپ دوم)؛ قيمت: ۲۰۰*",
+    "  متن\n\nچند   خطی\tبا فاصله\u200cهای   زیاد  ",
+    "آيا اين سؤال است؟ بله.",
+])
+def test_matches_reference_on_examples(text):
+    for remove_half_space, remove_symbols in OPTIONS:
+        assert normalize_persian_text(
+            text, remove_half_space, remove_symbols
+        ) == reference_normalize(text, remove_half_space, remove_symbols)
+
+
+@pytest.mark.parametrize("remove_half_space,remove_symbols", OPTIONS)
+def test_batch_matches_single(remove_half_space, remove_symbols):
+    texts = random_texts(200, seed=1)
+    assert normalize_persian_texts(texts, remove_half_space, remove_symbols) == [
+        normalize_persian_text(t, remove_half_space, remove_symbols) for t in texts
+    ]
+
+
+def test_batch_empty():
+    assert normalize_persian_texts([]) == []
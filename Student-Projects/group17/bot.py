@@ -16,6 +16,7 @@ from groq import Groq
 
 import config
 import database
+from execution import ExecutionLayer, UserBusyError, QueueFullError
 
 load_dotenv()
 
@@ -27,6 +28,10 @@ logging.basicConfig(
 groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 database.init_db()
 
+# Groq and SQLite calls are blocking; they run on this layer's thread pool
+# so one slow request does not stall every other chat
+execution = ExecutionLayer()
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler for the /start command. Shows persistent menu buttons."""
     
@@ -70,7 +75,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    settings = database.get_user_settings(user_id)
+    settings = await execution.run_io(database.get_user_settings, user_id)
     
     model_name = next((k for k, v in config.AVAILABLE_MODELS.items() if v == settings['model']), settings['model'])
 
@@ -102,7 +107,16 @@ async def settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def process_summary(user_id, text, message_obj, context):
     try:
-        s = database.get_user_settings(user_id)
+        async with execution.admit(user_id):
+            await generate_summary(user_id, text, message_obj)
+    except UserBusyError:
+        await message_obj.edit_text(text=config.BUSY_USER_TEXT)
+    except QueueFullError:
+        await message_obj.edit_text(text=config.BUSY_SERVER_TEXT)
+
+async def generate_summary(user_id, text, message_obj):
+    try:
+        s = await execution.run_io(database.get_user_settings, user_id)
         
         lang_instr = "Keep original language" if s['language'] == "Auto" else f"Translate and write output in {s['language']}"
         length_instr = config.LENGTH_OPTIONS.get(s['length'], "standard summary")
@@ -121,7 +135,8 @@ async def process_summary(user_id, text, message_obj, context):
 
         temp_val = config.CREATIVITY_LEVELS.get(s['creativity'], 0.5)
 
-        chat_completion = groq_client.chat.completions.create(
+        chat_completion = await execution.run_io(
+            groq_client.chat.completions.create,
             messages=messages,
             model=s['model'],
             temperature=temp_val,
@@ -168,7 +183,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # --- SUBMENUS ---
-    settings = database.get_user_settings(user_id)
+    settings = await execution.run_io(database.get_user_settings, user_id)
 
     async def show_selection_menu(title, options_dict, prefix, current_value, use_keys_as_value=False):
         keyboard = []
@@ -217,27 +232,27 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if data.startswith("set_model_"):
         selected_name = data.replace("set_model_", "")
         model_id = config.AVAILABLE_MODELS.get(selected_name)
-        database.update_user_setting(user_id, "model", model_id)
+        await execution.run_io(database.update_user_setting, user_id, "model", model_id)
         await settings_menu(update, context)
         return
 
     if data.startswith("set_lang_"):
-        database.update_user_setting(user_id, "language", data.replace("set_lang_", ""))
+        await execution.run_io(database.update_user_setting, user_id, "language", data.replace("set_lang_", ""))
         await settings_menu(update, context)
         return
 
     if data.startswith("set_len_"):
-        database.update_user_setting(user_id, "length", data.replace("set_len_", ""))
+        await execution.run_io(database.update_user_setting, user_id, "length", data.replace("set_len_", ""))
         await settings_menu(update, context)
         return
 
     if data.startswith("set_tone_"):
-        database.update_user_setting(user_id, "tone", data.replace("set_tone_", ""))
+        await execution.run_io(database.update_user_setting, user_id, "tone", data.replace("set_tone_", ""))
         await settings_menu(update, context)
         return
 
     if data.startswith("set_creat_"):
-        database.update_user_setting(user_id, "creativity", data.replace("set_creat_", ""))
+        await execution.run_io(database.update_user_setting, user_id, "creativity", data.replace("set_creat_", ""))
         await settings_menu(update, context)
         return
 
@@ -246,7 +261,21 @@ if __name__ == '__main__':
         print("Error: .env file missing API keys.")
         exit(1)
 
-    application = ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+    async def start_execution(app):
+        execution.start()
+
+    async def stop_execution(app):
+        execution.shutdown()
+
+    # concurrent_updates lets updates from different chats be handled in parallel
+    application = (
+        ApplicationBuilder()
+        .token(os.getenv("TELEGRAM_BOT_TOKEN"))
+        .concurrent_updates(True)
+        .post_init(start_execution)
+        .post_shutdown(stop_execution)
+        .build()
+    )
 
     application.add_handler(CommandHandler('start', start))
     application.add_handler(CommandHandler('settings', settings_menu))
@@ -86,3 +86,11 @@ Summarize the user's input text. The summary must be {length_instruction}.
 **Language:**
 {language_instruction}
 """
+
+# --- EXECUTION ---
+IO_WORKERS = 16          # Threads for blocking calls (Groq API, SQLite)
+MAX_PENDING = 64         # Requests in flight (all users) before "busy" replies
+PER_USER_LIMIT = 1       # Requests in flight per user
+
+BUSY_USER_TEXT = "⏳ Your previous summary is still being generated. Please wait."
+BUSY_SERVER_TEXT = "🚦 The bot is busy right now. Please try again in a moment."
@@ -0,0 +1,77 @@
+# execution.py
+# Runs blocking work off the asyncio event loop and limits how much
+# work the bot accepts at once.
+#
+#   - run_io  : blocking I/O (Groq client, SQLite) on a thread pool
+#   - admit   : per-user and global in-flight limits; over the limit a
+#               BackPressureError is raised at once instead of queueing
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+import config
+
+
+class BackPressureError(Exception):
+    """Request rejected because the bot is at capacity."""
+
+
+class QueueFullError(BackPressureError):
+    """Too many requests in flight across all users."""
+
+
+class UserBusyError(BackPressureError):
+    """The user already has the maximum number of requests in flight."""
+
+
+class ExecutionLayer:
+    def __init__(self, io_workers=config.IO_WORKERS, max_pending=config.MAX_PENDING,
+                 per_user_limit=config.PER_USER_LIMIT):
+        self.io_workers = io_workers
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+
+        self._io_pool = None
+
+        # Only used from the event loop thread, so no lock is needed
+        self._pending = 0
+        self._per_user = {}
+        self.stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_user_busy": 0}
+
+    def start(self):
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="bot-io")
+
+    def shutdown(self):
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool = None
+
+    @asynccontextmanager
+    async def admit(self, user_id):
+        """Holds a request slot for user_id; raises UserBusyError / QueueFullError when full."""
+        if self._per_user.get(user_id, 0) >= self.per_user_limit:
+            self.stats["rejected_user_busy"] += 1
+            raise UserBusyError(user_id)
+        if self._pending >= self.max_pending:
+            self.stats["rejected_queue_full"] += 1
+            raise QueueFullError(self._pending)
+
+        self._pending += 1
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        self.stats["admitted"] += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+            self._per_user[user_id] -= 1
+            if not self._per_user[user_id]:
+                del self._per_user[user_id]
+
+    async def run_io(self, fn, *args, **kwargs):
+        """Runs a blocking I/O call on the thread pool."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, partial(fn, *args, **kwargs))
@@ -0,0 +1,117 @@
+# soak_test.py
+# Soak test for the bot handlers: N simulated chats send texts at the same
+# time and the full handle_message -> process_summary path runs, with the
+# Groq client replaced by one that sleeps for --latency seconds (no API
+# calls, no Telegram connection).
+#
+# Reports handler latency p50/p99, event loop lag and back-pressure rejections.
+#
+# Usage:
+#   python soak_test.py --chats 50 --requests 4 --latency 1.5
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+import database
+
+# Keep the bot's real settings database untouched
+database.DB_NAME = os.path.join(tempfile.mkdtemp(), "soak_users.db")
+os.environ.setdefault("GROQ_API_KEY", "soak-test")
+
+import bot  # noqa: E402  (after the database path is redirected)
+
+
+class SlowGroqClient:
+    """Stands in for groq.Groq: a blocking call that takes `latency` seconds."""
+
+    def __init__(self, latency):
+        def create(**kwargs):
+            time.sleep(latency)
+            message = SimpleNamespace(content="<b>Summary</b>")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else float("nan")
+
+
+def fake_update(user_id, text):
+    """Just enough of Update / Context for handle_message."""
+    results = []
+
+    async def edit_text(text, **kwargs):
+        results.append(text)
+
+    async def reply_text(text, **kwargs):
+        return SimpleNamespace(edit_text=edit_text)
+
+    message = SimpleNamespace(text=text, reply_text=reply_text)
+    update = SimpleNamespace(message=message, effective_user=SimpleNamespace(id=user_id))
+    return update, SimpleNamespace(user_data={}), results
+
+
+async def heartbeat(lags, stop, interval=0.01):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def simulate_chat(user_id, n_requests, think_time, latencies, rejected):
+    rng = random.Random(user_id)
+    for i in range(n_requests):
+        update, context, results = fake_update(user_id, f"Text {i} from chat {user_id}. " * 50)
+
+        start = time.perf_counter()
+        await bot.handle_message(update, context)
+        if results and results[-1] in (bot.config.BUSY_USER_TEXT, bot.config.BUSY_SERVER_TEXT):
+            rejected.append(results[-1])
+        else:
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.sleep(rng.uniform(0, think_time))
+
+
+async def run(args):
+    bot.groq_client = SlowGroqClient(args.latency)
+    bot.execution.max_pending = args.max_pending
+    bot.execution.start()
+
+    latencies, rejected, lags = [], [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_chat(u, args.requests, args.think_time, latencies, rejected)
+        for u in range(args.chats)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    bot.execution.shutdown()
+
+    print(f"chats={args.chats} completed={len(latencies)} rejected={len(rejected)} elapsed={elapsed:.2f}s")
+    print(f"handler latency: p50={percentile(latencies, 0.5):.3f}s p99={percentile(latencies, 0.99):.3f}s")
+    print(f"event loop lag:  p50={1000 * percentile(lags, 0.5):.1f}ms "
+          f"p99={1000 * percentile(lags, 0.99):.1f}ms max={1000 * max(lags, default=0):.1f}ms")
+    print(f"execution stats: {bot.execution.stats}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="Requests per chat.")
+    parser.add_argument("--latency", type=float, default=1.5, help="Simulated Groq latency (s).")
+    parser.add_argument("--think_time", type=float, default=1.0, help="Max pause between requests (s).")
+    parser.add_argument("--max_pending", type=int, default=bot.config.MAX_PENDING)
+    asyncio.run(run(parser.parse_args()))